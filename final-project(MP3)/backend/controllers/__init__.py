@@ -22,3 +22,9 @@ along with MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
 """
 
 from backend.controllers.song_controller import router as song_router  # pylint: disable=import-error
+from backend.controllers.song_controller import services as song_service  # pylint: disable=import-error
+from backend.controllers.health_controller import router as health_router  # pylint: disable=import-error
+from backend.controllers.metrics_controller import router as metrics_router  # pylint: disable=import-error
+from backend.controllers.metrics_controller import MetricsMiddleware  # pylint: disable=import-error
+from backend.controllers.diagnostics_controller import router as diagnostics_router  # pylint: disable=import-error
+from backend.controllers.diagnostics_controller import DiagnosticsMiddleware  # pylint: disable=import-error
@@ -0,0 +1,201 @@
+"""This module defines the request tracing hooks and the diagnostics
+endpoints of the MP3AVLtree project.
+
+DiagnosticsMiddleware opens a trace for each sampled request and claims
+requests for the on-demand profiler. TracedRoute wraps every song endpoint
+in a span, so a trace separates the endpoint itself from the request
+validation and response serialization around it.
+
+The /admin endpoints turn tracing on or off and arm the profiler for the
+next N requests without a redeploy. They require the ``X-Admin-Token``
+header to match ``MP3_ADMIN_TOKEN`` and are disabled when it is unset.
+Other settings:
+
+- ``MP3_TRACING=1`` traces from startup; ``MP3_TRACE_SAMPLE_RATE`` sets the
+  fraction of requests traced (default 1).
+- ``MP3_TRACE_FILE`` is the JSON lines file traces are appended to
+  (default ``diagnostics/traces.jsonl``).
+- ``MP3_PROFILE_DIR`` is the directory profiles are written to (default
+  ``diagnostics/profiles``).
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or 
+modify it under the terms of the GNU General Public License as 
+published by the Free Software Foundation, either version 3 of 
+the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, 
+but WITHOUT ANY WARRANTY; without even the implied warranty of 
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU 
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License 
+along with MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import hmac
+import os
+from typing import Callable, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, Field  # pylint: disable=no-name-in-module
+from backend.profiling import PROFILER  # pylint: disable=import-error
+from backend.tracing import TRACER, traced  # pylint: disable=import-error
+
+ADMIN_TOKEN = os.environ.get("MP3_ADMIN_TOKEN")
+
+TRACER.configure(
+    enabled=os.environ.get("MP3_TRACING", "0") == "1",
+    sample_rate=float(os.environ.get("MP3_TRACE_SAMPLE_RATE", "1")),
+    path=os.environ.get("MP3_TRACE_FILE", os.path.join("diagnostics", "traces.jsonl")),
+)
+PROFILER.output_dir = os.environ.get("MP3_PROFILE_DIR", os.path.join("diagnostics", "profiles"))
+
+
+class TracedRoute(APIRoute):
+    """Route whose endpoint runs in a span named after its module and function."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        """Wraps the endpoint before FastAPI inspects it.
+
+        Args:
+            path (str): Route path.
+            endpoint (Callable): Endpoint function.
+            **kwargs: Other APIRoute arguments.
+        """
+        module = endpoint.__module__.rsplit(".", 1)[-1]
+        super().__init__(path, traced(f"{module}.{endpoint.__name__}")(endpoint), **kwargs)
+
+
+class DiagnosticsMiddleware:
+    """ASGI middleware that traces sampled requests and feeds the profiler."""
+
+    def __init__(self, app):
+        """Wraps an ASGI application.
+
+        Args:
+            app: The ASGI application to wrap.
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        """Serves the request inside a trace, profiling it if requested.
+
+        The root span is renamed after the matched route template once the
+        request has been routed, and records the response status.
+
+        Args:
+            scope: ASGI connection scope.
+            receive: ASGI receive callable.
+            send: ASGI send callable.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profiled = PROFILER.armed and PROFILER.request_started()
+        try:
+            with TRACER.trace(f"{scope['method']} {scope['path']}", path=scope["path"]) as trace:
+                if trace is None:
+                    await self.app(scope, receive, send)
+                    return
+
+                async def send_with_status(message):
+                    if message["type"] == "http.response.start":
+                        trace.root.attributes["status"] = message["status"]
+                    await send(message)
+
+                try:
+                    await self.app(scope, receive, send_with_status)
+                finally:
+                    route = scope.get("route")
+                    if route is not None:
+                        trace.root.name = f"{scope['method']} {route.path}"
+        finally:
+            if profiled:
+                await run_in_threadpool(PROFILER.request_finished)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Checks the admin token of a request.
+
+    Args:
+        x_admin_token (Optional[str]): Value of the ``X-Admin-Token`` header.
+
+    Raises:
+        HTTPException: 403 if admin endpoints are disabled or the token
+            does not match.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set MP3_ADMIN_TOKEN.")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+class TracingSettings(BaseModel):
+    """Changes to the tracing settings; omitted fields are kept.
+
+    Attributes:
+        enabled (Optional[bool]): Whether requests are traced.
+        sample_rate (Optional[float]): Fraction of requests traced.
+    """
+    enabled: Optional[bool] = None
+    sample_rate: Optional[float] = Field(None, ge=0, le=1)
+
+
+@router.get("/admin/diagnostics", response_model=dict, summary="Get the tracing and profiling state")
+def get_diagnostics() -> dict:
+    """Reports the tracing settings and the profiler state.
+
+    Returns:
+        dict: ``tracing`` and ``profiling`` status.
+    """
+    return {"tracing": TRACER.status(), "profiling": PROFILER.status()}
+
+
+@router.put("/admin/tracing", response_model=dict, summary="Turn request tracing on or off")
+def update_tracing(settings: TracingSettings) -> dict:
+    """Changes the tracing settings at runtime.
+
+    Args:
+        settings (TracingSettings): Settings to change.
+
+    Returns:
+        dict: The tracing status after the change.
+    """
+    TRACER.configure(enabled=settings.enabled, sample_rate=settings.sample_rate)
+    return TRACER.status()
+
+
+@router.post("/admin/profile", response_model=dict, status_code=202, summary="Profile the next requests")
+def start_profile(
+    requests: int = Query(10, ge=1, le=10000, description="Number of requests to profile"),
+    interval_ms: float = Query(5.0, gt=0, le=1000, description="Milliseconds between stack samples"),
+) -> dict:
+    """Arms the sampling profiler for the next requests.
+
+    The profile is written to ``MP3_PROFILE_DIR`` when the last of them
+    finishes; GET /admin/diagnostics then reports the file paths.
+
+    Args:
+        requests (int): Number of requests to profile.
+        interval_ms (float): Milliseconds between stack samples.
+
+    Returns:
+        dict: The profiler status.
+
+    Raises:
+        HTTPException: 409 if a profile is already being taken.
+    """
+    try:
+        PROFILER.arm(requests, interval_ms / 1000)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    return PROFILER.status()
@@ -0,0 +1,51 @@
+"""This module defines the health-check endpoints of the MP3AVLtree project.
+
+Liveness only tells whether the process is serving HTTP, so it passes as soon
+as the application starts. Readiness tells whether the song catalog, which is
+loaded in the background, can be queried, and reports the loading progress.
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or 
+modify it under the terms of the GNU General Public License as 
+published by the Free Software Foundation, either version 3 of 
+the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, 
+but WITHOUT ANY WARRANTY; without even the implied warranty of 
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU 
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License 
+along with MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from backend.controllers.song_controller import services  # pylint: disable=import-error
+
+router = APIRouter()
+
+
+@router.get("/health/live", response_model=dict, summary="Liveness probe")
+def liveness() -> dict:
+    """Reports that the process is up.
+
+    Returns:
+        dict: Always ``{"status": "alive"}``.
+    """
+    return {"status": "alive"}
+
+
+@router.get("/health/ready", response_model=dict, summary="Readiness probe with catalog load progress")
+def readiness():
+    """Reports whether the song catalog is loaded.
+
+    Returns:
+        JSONResponse: 200 once the catalog is ready, 503 while it is loading
+        or if loading failed; the body holds the loading status.
+    """
+    status = services.status
+    return JSONResponse(status_code=200 if status["state"] == "ready" else 503, content=status)
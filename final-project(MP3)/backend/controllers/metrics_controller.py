@@ -0,0 +1,144 @@
+"""This module defines the metrics endpoint of the MP3AVLtree project.
+
+GET /metrics renders every metric of backend.metrics in the Prometheus text
+format. MetricsMiddleware records the latency of each request in a
+histogram labelled by method, route template and status class; the route
+template (e.g. ``/songs/{song_id}``) keeps the number of series bounded.
+The shape and operation counters of the index trees are read from the
+service only when the endpoint is scraped.
+
+Metrics live in the memory of each process. With several uvicorn workers
+sharing the catalog (MP3_SHARED_CATALOG=1), every scrape is answered by
+whichever worker accepts the connection, so each sample carries a
+``worker`` label with that process ID: every worker's counters form their
+own series instead of one series that jumps between workers. Sum them
+after taking rates, e.g. ``sum without (worker) (rate(...[5m]))``. A
+worker is only sampled when it happens to answer, so these rates are
+approximate; run one worker per scraped port where exact totals matter.
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or 
+modify it under the terms of the GNU General Public License as 
+published by the Free Software Foundation, either version 3 of 
+the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, 
+but WITHOUT ANY WARRANTY; without even the implied warranty of 
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU 
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License 
+along with MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import time
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from backend.controllers.song_controller import SHARED_CATALOG, services  # pylint: disable=import-error
+from backend.metrics import REGISTRY, CallbackMetric, Histogram  # pylint: disable=import-error
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REQUEST_SECONDS = Histogram(
+    "mp3_http_request_seconds",
+    "Time spent serving HTTP requests, by method, route and status class.",
+    ("method", "route", "status"),
+)
+
+
+def _tree_samples(field: str):
+    """Builds a callback reading one statistic of every index tree.
+
+    Args:
+        field (str): Key of OrderedMap.stats() to report.
+
+    Returns:
+        Callable: Callback returning one sample per tree.
+    """
+    def collect():
+        return [({"tree": tree}, stats[field]) for tree, stats in services.tree_stats().items()]
+    return collect
+
+
+CallbackMetric("mp3_tree_size", "Number of keys stored in each index tree.", "gauge", _tree_samples("size"))
+CallbackMetric(
+    "mp3_tree_height", "Height of each index tree, as reported by its engine.", "gauge", _tree_samples("height")
+)
+CallbackMetric(
+    "mp3_tree_rotations_total",
+    "Rebalancing steps (rotations, node splits and merges) performed by each index tree.",
+    "counter",
+    _tree_samples("rotations"),
+)
+CallbackMetric(
+    "mp3_tree_nodes_visited_total",
+    "Nodes examined by lookups, inserts and deletes in each index tree.",
+    "counter",
+    _tree_samples("nodes_visited"),
+)
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, summary="Prometheus metrics")
+def metrics() -> PlainTextResponse:
+    """Renders the metrics in the Prometheus text exposition format.
+
+    Returns:
+        PlainTextResponse: Every registered metric, labelled with the worker
+        process when several workers share the catalog.
+    """
+    extra_labels = {"worker": str(os.getpid())} if SHARED_CATALOG else None
+    return PlainTextResponse(REGISTRY.render(extra_labels), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+class MetricsMiddleware:
+    """ASGI middleware that observes the latency of every HTTP request.
+
+    It is a plain ASGI wrapper rather than a BaseHTTPMiddleware, so streamed
+    responses are neither buffered nor moved to another task, and the
+    timing covers the whole response body.
+    """
+
+    def __init__(self, app):
+        """Wraps an ASGI application.
+
+        Args:
+            app: The ASGI application to wrap.
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        """Serves the request and records its latency.
+
+        Args:
+            scope: ASGI connection scope.
+            receive: ASGI receive callable.
+            send: ASGI send callable.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                f"{status[0] // 100}xx",
+            )
@@ -23,46 +23,377 @@ You should have received a copy of the GNU General Public License
 along with MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
 """
 
-from typing import List, Dict
-from fastapi import APIRouter, HTTPException
-from backend.services.song_service import SongService  # pylint: disable=import-error
-from backend.repositories.song_repo import SongDAO  # pylint: disable=import-error
+import json
+import os
+from typing import Iterable, Iterator, List, Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError  # pylint: disable=no-name-in-module
+from backend.controllers.diagnostics_controller import TracedRoute  # pylint: disable=import-error
+from backend.services.index_engines import DEFAULT_ENGINE  # pylint: disable=import-error
+from backend.services.song_service import SongConflictError, SongNotFoundError, SongService  # pylint: disable=import-error
+from backend.repositories.song_repo import SongDAO, SongRepository  # pylint: disable=import-error
+from backend.repositories.sqlite_repo import SQLITE_PATH, SqliteSongRepository  # pylint: disable=import-error
 
-router = APIRouter()
-services = SongService()
+CACHE_CONTROL = "no-cache"
+CATALOG_WAIT_SECONDS = float(os.environ.get("MP3_CATALOG_WAIT_SECONDS", "5"))
+SHARED_CATALOG = os.environ.get("MP3_SHARED_CATALOG", "0") == "1"
+STORAGE = os.environ.get("MP3_STORAGE", "json")
+INDEX_ENGINE = os.environ.get("MP3_INDEX_ENGINE", DEFAULT_ENGINE)
+
+
+def create_repository() -> SongRepository:
+    """Creates the song repository selected by ``MP3_STORAGE``.
+
+    ``json`` (the default) keeps the catalog in ``songs.json`` plus its
+    journal; ``sqlite`` keeps it in the database at ``MP3_SQLITE_PATH``,
+    which is filled from ``songs.json`` the first time it is created.
+
+    Returns:
+        SongRepository: The configured repository.
+
+    Raises:
+        ValueError: If ``MP3_STORAGE`` names an unknown backend.
+    """
+    if STORAGE == "sqlite":
+        return SqliteSongRepository(os.environ.get("MP3_SQLITE_PATH", SQLITE_PATH), shared=SHARED_CATALOG)
+    if STORAGE != "json":
+        raise ValueError(f"Unknown MP3_STORAGE {STORAGE!r}; use 'json' or 'sqlite'.")
+    return SongRepository(shared=SHARED_CATALOG)
+
+
+services = SongService(create_repository(), autoload=False, engine=INDEX_ENGINE)
+song_list_adapter = TypeAdapter(List[SongDAO])
+
+
+def require_catalog() -> None:
+    """Waits for the song catalog to finish loading before serving a request.
+
+    With ``MP3_SHARED_CATALOG=1`` (several uvicorn workers sharing the data
+    files) it also applies the changes other workers made since the last
+    request.
+
+    Raises:
+        HTTPException: 503 with a Retry-After header if the catalog is not
+            ready within ``MP3_CATALOG_WAIT_SECONDS``, or if loading failed.
+    """
+    if services.wait_until_ready(CATALOG_WAIT_SECONDS):
+        services.refresh()
+        return
+    status = services.status
+    detail = "Song catalog failed to load." if status["state"] == "failed" else "Song catalog is still loading."
+    raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": "1"})
+
+
+router = APIRouter(dependencies=[Depends(require_catalog)], route_class=TracedRoute)
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Checks whether a conditional request already holds the given ETag.
+
+    Tags are compared weakly, as ``If-None-Match`` requires: a ``W/``
+    prefix on either side is ignored.
+
+    Args:
+        request (Request): Incoming request.
+        etag (str): Current entity tag, strong or weak.
+
+    Returns:
+        bool: True if ``If-None-Match`` lists the tag (or is ``*``).
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def _ndjson_etag(etag: str) -> str:
+    """Derives the entity tag of the NDJSON form of a listing.
+
+    The NDJSON and JSON forms of the same catalog version are different
+    representations, so they must not share a tag. Streams are only
+    weakly consistent (see get_all_songs), so the tag is weak.
+
+    Args:
+        etag (str): Strong entity tag of the JSON form.
+
+    Returns:
+        str: Weak entity tag of the NDJSON form.
+    """
+    return f'W/{etag[:-1]}-ndjson"'
+
+
+def _not_modified(etag: str) -> Response:
+    """Builds an empty 304 response for an unchanged catalog.
+
+    Args:
+        etag (str): Current entity tag.
+
+    Returns:
+        Response: 304 Not Modified response.
+    """
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept"})
+
+
+def _wants_ndjson(request: Request, response_format: Optional[str]) -> bool:
+    """Checks whether the client asked for a streamed NDJSON response.
+
+    Args:
+        request (Request): Incoming request.
+        response_format (Optional[str]): Value of the ``format`` query parameter.
+
+    Returns:
+        bool: True for ``format=ndjson`` or an ``Accept`` header asking for NDJSON.
+    """
+    if response_format is not None:
+        return response_format == "ndjson"
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _ndjson_lines(songs: Iterable[dict]) -> Iterator[bytes]:
+    """Serializes songs lazily, one JSON document per line.
+
+    Args:
+        songs (Iterable[dict]): Song fields.
+
+    Yields:
+        bytes: One encoded line per song.
+    """
+    for song in songs:
+        yield json.dumps(song, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
 
 
 @router.get("/songs/all", response_model=List[SongDAO], summary="Get All Songs sorted by title")
-def get_all_songs() -> List[dict]:
-    """Fetches all songs sorted alphabetically by title.
+def get_all_songs(
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    response_format: Optional[str] = Query(None, alias="format", pattern="^(json|ndjson)$"),
+):
+    """Fetches songs sorted alphabetically by title, optionally one page at a time.
+
+    The total number of songs is returned in the ``X-Total-Count`` header.
+    Responses carry the catalog version as ETag; a request whose
+    ``If-None-Match`` matches it gets an empty 304 response. With
+    ``format=ndjson`` (or ``Accept: application/x-ndjson``) the catalog, or
+    the requested page, is streamed one song per line while the tree is
+    traversed. Writes can land between the batches of a stream, so its ETag
+    is weak: the version the stream started from, tagged as NDJSON so it
+    never matches the JSON form. Since the format can follow the
+    ``Accept`` header, responses carry ``Vary: Accept``.
+
+    Args:
+        request (Request): Incoming request, used for conditional headers.
+        response (Response): Outgoing response, used to set headers.
+        offset (int): Number of songs to skip.
+        limit (Optional[int]): Page size; all remaining songs if omitted.
+        response_format (Optional[str]): ``json`` (default) or ``ndjson``.
 
     Returns:
-        List[SongDAO]: List of all song records.
+        List[SongDAO]: List of song records.
     """
-    return services.get_all_sorted_by_title()
+    ndjson = _wants_ndjson(request, response_format)
+    etag = _ndjson_etag(services.etag) if ndjson else services.etag
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+    total = str(services.count())
+    if ndjson:
+        return StreamingResponse(
+            _ndjson_lines(services.iter_all_sorted_by_title(offset=offset, limit=limit)),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers={"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept", "X-Total-Count": total},
+        )
+    if offset == 0 and limit is None:
+        etag, payload = services.get_all_json()
+        return Response(
+            content=payload,
+            media_type="application/json",
+            headers={"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept", "X-Total-Count": total},
+        )
+    response.headers.update({"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept", "X-Total-Count": total})
+    return services.get_page_sorted_by_title(offset, limit if limit is not None else services.count())
 
 
 @router.get("/songs/search/{title}", response_model=List[SongDAO], summary="Search songs by partial title match")
-def search_song_by_title(title: str) -> List[dict]:
+def search_song_by_title(
+    title: str,
+    request: Request,
+    response_format: Optional[str] = Query(None, alias="format", pattern="^(json|ndjson)$"),
+    fuzzy: bool = Query(False),
+    max_distance: Optional[int] = Query(None, ge=0, le=3),
+    limit: int = Query(10, ge=1, le=100),
+):
     """Searches for songs by partial title (case-insensitive).
 
+    With ``format=ndjson`` (or ``Accept: application/x-ndjson``) the matches
+    are streamed one song per line; an empty stream means no match.
+
+    With ``fuzzy=true`` the whole title is matched instead, tolerating up to
+    ``max_distance`` typos; matches are ranked by edit distance and capped
+    at ``limit``. Each extra typo lets the BK-tree prune fewer titles: at
+    20k titles a search compares about 9% of them at distance 3 (30 ms)
+    and 28% at distance 5 (100 ms), so the distance is capped at 3, the
+    most the service picks on its own. The title index is built in the
+    background on the first fuzzy search; until it is ready, fuzzy
+    searches get a 503 with a Retry-After header.
+
     Args:
         title (str): Partial or full title of the song.
+        request (Request): Incoming request, used for content negotiation.
+        response_format (Optional[str]): ``json`` (default) or ``ndjson``.
+        fuzzy (bool): Match the full title by edit distance.
+        max_distance (Optional[int]): Typos tolerated in fuzzy mode, at
+            most 3; scaled to the title length if omitted.
+        limit (int): Maximum number of songs returned in fuzzy mode.
 
     Returns:
         List[SongDAO]: List of matching songs.
 
     Raises:
-        HTTPException: If title is empty or no matches are found.
+        HTTPException: If title is empty or no matches are found, or 503
+            if the fuzzy title index is still being built.
     """
     if not title:
         raise HTTPException(status_code=400, detail="Title cannot be empty.")
+    if fuzzy:
+        matches = services.search_fuzzy(title, limit, max_distance)
+        if matches is None:
+            raise HTTPException(
+                status_code=503, detail="Fuzzy title index is still being built.", headers={"Retry-After": "1"}
+            )
+        if not matches:
+            raise HTTPException(status_code=404, detail="No matching songs found.")
+        return matches
+    if _wants_ndjson(request, response_format):
+        return StreamingResponse(
+            _ndjson_lines(services.iter_search_by_title_partial(title)),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
     matches = services.search_by_title_partial(title)
     if not matches:
         raise HTTPException(status_code=404, detail="No matching songs found.")
     return matches
 
 
+@router.get("/songs/autocomplete", response_model=List[SongDAO], summary="Autocomplete songs by title prefix")
+def autocomplete_songs(prefix: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=100)) -> List[dict]:
+    """Returns the first songs in title order whose title starts with a prefix.
+
+    Args:
+        prefix (str): Title prefix (case-insensitive).
+        limit (int): Maximum number of songs to return.
+
+    Returns:
+        List[SongDAO]: Up to ``limit`` matching songs; empty if none match.
+    """
+    return services.autocomplete(prefix, limit)
+
+
+@router.get("/songs/query", response_model=List[SongDAO], summary="Filter and sort songs by indexed fields")
+def query_songs(
+    response: Response,
+    artist: Optional[str] = Query(None, min_length=1),
+    album: Optional[str] = Query(None, min_length=1),
+    year: Optional[int] = Query(None),
+    year_min: Optional[int] = Query(None),
+    year_max: Optional[int] = Query(None),
+    duration_min: Optional[int] = Query(None, ge=0),
+    duration_max: Optional[int] = Query(None, ge=0),
+    sort: str = Query("title", pattern="^(title|artist|album|year|duration)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """Returns the songs matching all the given predicates, sorted and paged.
+
+    Artist and album match exactly (case-insensitive); year and duration
+    accept inclusive ranges. The total number of matches is returned in the
+    ``X-Total-Count`` header.
+
+    Args:
+        response (Response): Outgoing response, used to set headers.
+        artist (Optional[str]): Artist name.
+        album (Optional[str]): Album name.
+        year (Optional[int]): Exact year; overrides year_min and year_max.
+        year_min (Optional[int]): Earliest year.
+        year_max (Optional[int]): Latest year.
+        duration_min (Optional[int]): Shortest duration, in seconds.
+        duration_max (Optional[int]): Longest duration, in seconds.
+        sort (str): Field to sort by.
+        order (str): ``asc`` or ``desc``.
+        offset (int): Number of matches to skip.
+        limit (int): Maximum number of songs to return.
+
+    Returns:
+        List[SongDAO]: The requested page of matching songs.
+
+    Raises:
+        HTTPException: If a range has its minimum above its maximum.
+    """
+    if year is not None:
+        year_min = year_max = year
+    ranges = {}
+    if artist is not None:
+        ranges["artist"] = (artist, artist)
+    if album is not None:
+        ranges["album"] = (album, album)
+    for field, lo, hi in (("year", year_min, year_max), ("duration", duration_min, duration_max)):
+        if lo is not None and hi is not None and lo > hi:
+            raise HTTPException(status_code=400, detail=f"{field}_min cannot be greater than {field}_max.")
+        if lo is not None or hi is not None:
+            ranges[field] = (lo, hi)
+    total, songs = services.query(ranges, sort_by=sort, descending=order == "desc", offset=offset, limit=limit)
+    response.headers["X-Total-Count"] = str(total)
+    return songs
+
+
+class SongStats(BaseModel):
+    """Statistics over a set of songs.
+
+    Attributes:
+        count (int): Number of songs.
+        total_duration (int): Sum of the durations, in seconds.
+        average_duration (Optional[float]): Mean duration, in seconds.
+        min_year (Optional[int]): Earliest release year.
+        max_year (Optional[int]): Latest release year.
+    """
+    count: int
+    total_duration: int
+    average_duration: Optional[float]
+    min_year: Optional[int]
+    max_year: Optional[int]
+
+
+@router.get("/songs/stats", response_model=SongStats, summary="Get statistics over the library, an artist or a title range")
+def get_song_stats(
+    artist: Optional[str] = Query(None, min_length=1),
+    title_from: Optional[str] = Query(None, min_length=1),
+    title_to: Optional[str] = Query(None, min_length=1),
+):
+    """Returns the song count, duration totals and year bounds of a scope.
+
+    Without parameters the scope is the whole library. ``artist`` narrows it
+    to one artist, and ``title_from``/``title_to`` to the titles between
+    them, including every title that starts with ``title_to``. All matching
+    is case-insensitive. With the default AVL engine no song is read: the
+    figures come from subtree aggregates in O(log n). Other engines
+    (MP3_INDEX_ENGINE) read every song in scope.
+
+    Args:
+        artist (Optional[str]): Artist name.
+        title_from (Optional[str]): First title of the range.
+        title_to (Optional[str]): Last title prefix of the range.
+
+    Returns:
+        SongStats: Statistics of the songs in scope.
+    """
+    return services.stats(artist=artist, title_from=title_from, title_to=title_to)
+
+
 @router.post("/songs/add", response_model=dict, status_code=201, summary="Add a new song to the repository")
 def add_song(song: SongDAO):
     """Adds a new song to the repository.
@@ -83,6 +414,93 @@ def add_song(song: SongDAO):
         raise HTTPException(status_code=400, detail=str(e)) from e
 
 
+class BulkDeleteRequest(BaseModel):
+    """Body of a bulk delete request.
+
+    Attributes:
+        ids (List[int]): IDs of the songs to delete.
+    """
+    ids: List[int]
+
+
+@router.post("/songs/bulk", response_model=dict, status_code=201, summary="Add many songs in one request")
+async def add_songs_bulk(request: Request):
+    """Adds a batch of songs with a single persistence flush.
+
+    The body is either a JSON array of songs or, with ``Content-Type:
+    application/x-ndjson``, one song per line. The batch is all-or-nothing:
+    if any song is invalid or already exists, nothing is added.
+
+    Args:
+        request (Request): Incoming request carrying the songs.
+
+    Returns:
+        dict: Success message and the IDs assigned, in input order.
+
+    Raises:
+        HTTPException: 422 if the body cannot be parsed or a song is
+            invalid, 400 if a song conflicts with the batch or the catalog.
+    """
+    body = await request.body()
+    ids = await run_in_threadpool(_insert_bulk, body, request.headers.get("content-type", ""))
+    return {"message": f"{len(ids)} songs added successfully.", "ids": ids}
+
+
+def _insert_bulk(body: bytes, content_type: str) -> List[int]:
+    """Parses, validates and inserts a bulk request body; runs in the threadpool.
+
+    Parsing and validating a large batch takes long enough to stall every
+    other request if done on the event loop.
+
+    Args:
+        body (bytes): Raw request body.
+        content_type (str): Content-Type header of the request.
+
+    Returns:
+        List[int]: IDs assigned to the songs, in input order.
+
+    Raises:
+        HTTPException: 422 if the body cannot be parsed or a song is
+            invalid, 400 if a song conflicts with the batch or the catalog.
+    """
+    try:
+        if NDJSON_MEDIA_TYPE in content_type:
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body)
+        songs = song_list_adapter.validate_python(items)
+    except ValueError as e:
+        errors = e.errors(include_url=False) if isinstance(e, ValidationError) else str(e)
+        raise HTTPException(status_code=422, detail=errors) from e
+    try:
+        return services.insert_songs([song.model_dump(exclude_none=True) for song in songs])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@router.post("/songs/bulk/delete", response_model=dict, summary="Delete many songs in one request")
+def delete_songs_bulk(body: BulkDeleteRequest):
+    """Deletes a batch of songs with a single persistence flush.
+
+    The batch is all-or-nothing: if any ID does not exist, nothing is deleted.
+
+    Args:
+        body (BulkDeleteRequest): IDs of the songs to delete.
+
+    Returns:
+        dict: Success message.
+
+    Raises:
+        HTTPException: 404 if an ID does not exist, 400 if an ID repeats.
+    """
+    try:
+        services.delete_songs(body.ids)
+    except ValueError as e:
+        status_code = 404 if str(e).startswith("Songs not found") else 400
+        raise HTTPException(status_code=status_code, detail=str(e)) from e
+    return {"message": f"{len(body.ids)} songs deleted successfully."}
+
+
 @router.put("/songs/{song_id}", response_model=SongDAO)
 def update_song(song_id: int, song: Dict):
     """
@@ -96,13 +514,19 @@ def update_song(song_id: int, song: Dict):
         SongDAO: The updated song.
     
     Raises:
-        HTTPException: If the song is not found.
+        HTTPException: 404 if the song is not found, 409 if the update
+            collides with another song, 422 if a value is invalid.
     """
     try:
         updated_song = services.update_song(song_id, song)
         return SongDAO(**updated_song)
-    except ValueError as e:
+    except SongNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from e
+    except SongConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    except (ValueError, OverflowError) as e:
+        errors = e.errors(include_url=False) if isinstance(e, ValidationError) else str(e)
+        raise HTTPException(status_code=422, detail=errors) from e
 
 
 @router.delete("/songs/delete/{song_id}", response_model=dict, summary="Delete a song by its ID")
@@ -116,10 +540,29 @@ def delete_song_by_id(song_id: int):
         dict: Success message.
 
     Raises:
-        HTTPException: If the song does not exist.
+        HTTPException: 404 if the song does not exist.
     """
     try:
         services.delete_song_by_id(song_id)
         return {"message": f"Song with ID {song_id} was deleted successfully."}
-    except ValueError as e:
+    except SongNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from e
+
+
+@router.get("/songs/{song_id}", response_model=SongDAO, summary="Get a song by its ID")
+def get_song_by_id(song_id: int):
+    """Fetches a single song by its ID.
+
+    Args:
+        song_id (int): ID of the song.
+
+    Returns:
+        SongDAO: The requested song.
+
+    Raises:
+        HTTPException: If the song does not exist.
+    """
+    song = services.get_song_by_id(song_id)
+    if song is None:
+        raise HTTPException(status_code=404, detail=f"Song with ID {song_id} not found.")
+    return song
@@ -0,0 +1,307 @@
+"""In-process metrics exposed in the Prometheus text format.
+
+This module is part of the MP3AVLtree project. It provides counters,
+histograms and callback-based metrics that every layer can record into,
+and a registry that renders them for the ``/metrics`` endpoint. Recording
+costs a lock acquisition and a few list operations, so the metrics stay
+on in production; values that already live elsewhere (tree sizes, rotation
+counters) are only read when the endpoint is scraped.
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 100000)
+
+Sample = Tuple[Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    """Escapes a label value for the text format.
+
+    Args:
+        value (str): Raw label value.
+
+    Returns:
+        str: Value with backslashes, quotes and newlines escaped.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """Formats a label set, e.g. ``{route="/songs/all"}``.
+
+    Args:
+        labels (Dict[str, str]): Label names and values.
+
+    Returns:
+        str: The label set, or an empty string without labels.
+    """
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    """Formats a sample value.
+
+    Args:
+        value (float): Sample value.
+
+    Returns:
+        str: Integers without a decimal point, infinity as ``+Inf``.
+    """
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Base class of the metrics held by a Registry.
+
+    Attributes:
+        name (str): Metric name.
+        help (str): One-line description.
+        kind (str): Prometheus type (counter, gauge or histogram).
+        label_names (Tuple[str, ...]): Names of the labels, in order.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (), registry: "Registry" = None):
+        """Initializes the metric and registers it.
+
+        Args:
+            name (str): Metric name.
+            help_text (str): One-line description.
+            label_names (Sequence[str]): Names of the labels, in order.
+            registry (Registry): Registry to join; defaults to REGISTRY.
+        """
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _labels(self, values: Tuple[str, ...]) -> Dict[str, str]:
+        """Pairs label values with their names.
+
+        Args:
+            values (Tuple[str, ...]): Label values, in label_names order.
+
+        Returns:
+            Dict[str, str]: Labels by name.
+        """
+        return dict(zip(self.label_names, values))
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        """Returns the current samples.
+
+        Returns:
+            Iterable[Tuple[str, Dict[str, str], float]]: Sample name, labels
+            and value of every line to render.
+        """
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonically increasing count, one per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (), registry: "Registry" = None):
+        """Initializes a counter; see Metric."""
+        super().__init__(name, help_text, label_names, registry)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        """Adds to the counter of a label combination.
+
+        Args:
+            *label_values (str): Label values, in label_names order.
+            amount (float): Non-negative increment.
+        """
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        """Returns one ``_total`` sample per label combination."""
+        with self._lock:
+            values = list(self._values.items())
+        return [(f"{self.name}_total", self._labels(key), value) for key, value in values]
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        registry: "Registry" = None,
+    ):
+        """Initializes a histogram.
+
+        Args:
+            name (str): Metric name.
+            help_text (str): One-line description.
+            label_names (Sequence[str]): Names of the labels, in order.
+            buckets (Sequence[float]): Upper bounds of the buckets, ascending.
+            registry (Registry): Registry to join; defaults to REGISTRY.
+        """
+        super().__init__(name, help_text, label_names, registry)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Records one observation.
+
+        Args:
+            value (float): Observed value.
+            *label_values (str): Label values, in label_names order.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *label_values: str) -> Iterator[None]:
+        """Observes the duration of the block, in seconds.
+
+        Args:
+            *label_values (str): Label values, in label_names order.
+
+        Yields:
+            None
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        """Returns the cumulative buckets, sum and count of every series."""
+        with self._lock:
+            series = [(key, list(values)) for key, values in self._series.items()]
+        samples = []
+        for key, values in series:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            samples.append((f"{self.name}_sum", labels, values[-1]))
+            samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+class CallbackMetric(Metric):
+    """Metric whose samples are read from a callback at scrape time."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        kind: str,
+        collect: Callable[[], Iterable[Sample]],
+        registry: "Registry" = None,
+    ):
+        """Initializes the metric.
+
+        Args:
+            name (str): Metric name (with ``_total`` for counters).
+            help_text (str): One-line description.
+            kind (str): Prometheus type, ``counter`` or ``gauge``.
+            collect (Callable[[], Iterable[Sample]]): Returns the labels and
+                value of each sample.
+            registry (Registry): Registry to join; defaults to REGISTRY.
+        """
+        self.kind = kind
+        self._collect = collect
+        super().__init__(name, help_text, (), registry)
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        """Returns the samples produced by the callback."""
+        return [(self.name, labels, value) for labels, value in self._collect()]
+
+
+class Registry:
+    """Set of metrics rendered together."""
+
+    def __init__(self):
+        """Initializes an empty registry."""
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> None:
+        """Adds a metric, replacing any metric with the same name.
+
+        Args:
+            metric (Metric): Metric to add.
+        """
+        self._metrics[metric.name] = metric
+
+    def render(self, extra_labels: Optional[Dict[str, str]] = None) -> str:
+        """Renders every metric in the Prometheus text exposition format.
+
+        Args:
+            extra_labels (Optional[Dict[str, str]]): Labels added to every
+                sample, e.g. the worker process that rendered it.
+
+        Returns:
+            str: The exposition, ending with a newline.
+        """
+        lines = []
+        for metric in self._metrics.values():
+            base = metric.name[:-len("_total")] if metric.name.endswith("_total") else metric.name
+            lines.append(f"# HELP {base} {metric.help}")
+            lines.append(f"# TYPE {base} {metric.kind}")
+            for name, labels, value in metric.samples():
+                if extra_labels:
+                    labels = {**labels, **extra_labels}
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REPOSITORY_SECONDS = Histogram(
+    "mp3_repository_operation_seconds",
+    "Time spent reading and writing the song files, by operation.",
+    ("operation",),
+)
+SEARCH_RESULTS = Histogram(
+    "mp3_search_results",
+    "Number of songs returned by searches, by kind of search.",
+    ("kind",),
+    buckets=SIZE_BUCKETS,
+)
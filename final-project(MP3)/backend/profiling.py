@@ -0,0 +1,216 @@
+"""On-demand statistical profiler for the MP3AVLtree API.
+
+This module is part of the MP3AVLtree project. The profiler is armed for
+the next N requests; while any of them is being served, a background thread
+samples the Python stack of every thread at a fixed interval. Sampling all
+threads covers both the event loop (request validation and serialization)
+and the thread pool that runs synchronous endpoints, which a per-thread
+profiler such as cProfile would miss. Stacks of idle threads are skipped.
+When the N-th request finishes, the samples are written as collapsed stacks
+(the input format of flame graph tools) together with a plain-text summary
+of the functions that were sampled most often.
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import collections
+import os
+import sys
+import threading
+import time
+from typing import List, Optional
+
+IDLE_FILES = ("threading.py", "selectors.py", "queue.py")
+PACKAGE_ROOT = os.path.dirname(os.path.abspath(__file__))
+SUMMARY_LINES = 40
+
+
+def _frame_label(code) -> str:
+    """Formats a code object as ``file:function``.
+
+    Args:
+        code: Code object of a frame.
+
+    Returns:
+        str: Base name of the file and the function name.
+    """
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Statistical profiler that covers the next N requests.
+
+    Attributes:
+        output_dir (str): Directory the profiles are written to.
+        last_profile (Optional[dict]): Paths and counts of the last dump.
+    """
+
+    def __init__(self, output_dir: str = "profiles"):
+        """Initializes an idle profiler.
+
+        Args:
+            output_dir (str): Directory the profiles are written to.
+        """
+        self.output_dir = output_dir
+        self.last_profile: Optional[dict] = None
+        self._lock = threading.Lock()
+        self._remaining = 0
+        self._active = 0
+        self._interval = 0.005
+        self._samples = collections.Counter()
+        self._sample_count = 0
+        self._thread: Optional[threading.Thread] = None
+        self._running = threading.Event()
+
+    @property
+    def armed(self) -> bool:
+        """Whether upcoming requests will be profiled.
+
+        Returns:
+            bool: True while profiled requests remain.
+        """
+        return self._remaining > 0
+
+    def arm(self, requests: int, interval: float = 0.005) -> None:
+        """Profiles the next requests.
+
+        Args:
+            requests (int): Number of requests to profile.
+            interval (float): Seconds between two samples.
+
+        Raises:
+            ValueError: If a profile is already being taken, or an argument
+                is not positive.
+        """
+        if requests < 1 or interval <= 0:
+            raise ValueError("The number of requests and the interval must be positive.")
+        with self._lock:
+            if self._remaining or self._active:
+                raise ValueError("A profile is already being taken.")
+            self._remaining = requests
+            self._interval = interval
+            self._samples = collections.Counter()
+            self._sample_count = 0
+
+    def status(self) -> dict:
+        """Reports the profiler state.
+
+        Returns:
+            dict: ``armed``, ``remaining`` requests, the ``samples`` taken so
+            far and the ``last_profile`` written.
+        """
+        return {
+            "armed": self.armed,
+            "remaining": self._remaining,
+            "samples": self._sample_count,
+            "last_profile": self.last_profile,
+        }
+
+    def request_started(self) -> bool:
+        """Claims one of the remaining requests, starting the sampler if needed.
+
+        Returns:
+            bool: True if the request is profiled; request_finished must
+            then be called when it ends.
+        """
+        with self._lock:
+            if not self._remaining:
+                return False
+            self._remaining -= 1
+            self._active += 1
+            if self._thread is None:
+                self._running.set()
+                self._thread = threading.Thread(target=self._sample, name="profiler-sampler", daemon=True)
+                self._thread.start()
+            return True
+
+    def request_finished(self) -> None:
+        """Releases a profiled request; the last one stops the sampler and dumps."""
+        with self._lock:
+            self._active -= 1
+            if self._active or self._remaining:
+                return
+            thread, self._thread = self._thread, None
+            self._running.clear()
+        thread.join()
+        self._dump()
+
+    def _sample(self) -> None:
+        """Samples the stacks of every other thread until stopped."""
+        own = threading.get_ident()
+        while self._running.is_set():
+            for thread_id, frame in sys._current_frames().items():  # pylint: disable=protected-access
+                if thread_id == own:
+                    continue
+                stack = self._stack(frame)
+                if stack is not None:
+                    self._samples[stack] += 1
+            self._sample_count += 1
+            time.sleep(self._interval)
+
+    def _stack(self, frame) -> Optional[str]:
+        """Collapses a thread's stack into ``outer;...;inner`` form.
+
+        Args:
+            frame: Innermost frame of the thread.
+
+        Returns:
+            Optional[str]: The collapsed stack, or None for an idle thread
+            (waiting in threading, selectors or queue code without any
+            backend frame on its stack).
+        """
+        labels: List[str] = []
+        in_project = False
+        idle = os.path.basename(frame.f_code.co_filename) in IDLE_FILES
+        while frame is not None:
+            code = frame.f_code
+            in_project = in_project or code.co_filename.startswith(PACKAGE_ROOT)
+            labels.append(_frame_label(code))
+            frame = frame.f_back
+        if idle and not in_project:
+            return None
+        return ";".join(reversed(labels))
+
+    def _dump(self) -> None:
+        """Writes the collapsed stacks and the summary of the finished profile."""
+        samples = self._samples
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"profile-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+        with open(f"{base}.folded", "w", encoding="utf-8") as file:
+            for stack, count in samples.most_common():
+                file.write(f"{stack} {count}\n")
+
+        own = collections.Counter()
+        total = collections.Counter()
+        for stack, count in samples.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for label in set(frames):
+                total[label] += count
+        busy = sum(samples.values()) or 1
+        with open(f"{base}.txt", "w", encoding="utf-8") as file:
+            file.write(f"{self._sample_count} sampling rounds, {sum(samples.values())} busy thread samples\n\n")
+            file.write(f"{'own %':>7} {'total %':>8}  function\n")
+            for label, count in own.most_common(SUMMARY_LINES):
+                file.write(f"{100 * count / busy:>7.1f} {100 * total[label] / busy:>8.1f}  {label}\n")
+        self.last_profile = {
+            "folded": f"{base}.folded",
+            "summary": f"{base}.txt",
+            "samples": self._sample_count,
+        }
+
+
+PROFILER = SamplingProfiler()
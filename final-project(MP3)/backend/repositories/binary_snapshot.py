@@ -0,0 +1,211 @@
+"""Compact binary snapshot of the song catalog for fast startup.
+
+This module is part of the MP3AVLtree project. A binary snapshot stores the
+SongCatalog columns as fixed-width little-endian integers followed by a
+deduplicated string table, so loading it needs no JSON parsing and no
+per-song validation: the file is memory-mapped and each column is copied
+straight into an array.
+
+Layout (all integers are little-endian):
+
+    header   magic "MP3CAT01", row count, name count, and the size and
+             modification time of the JSON snapshot it was written from
+    offsets  (name count + row count + 1) int64 character offsets into
+             the text
+    columns  id, year, duration, artist, album; one int64 per row each,
+             artist and album being indexes into the distinct names
+    text     the distinct artist and album names, then the title of
+             every row in row order, concatenated, UTF-8 encoded
+
+The JSON snapshot remains the source of truth; a binary snapshot is only
+used while the JSON file still has the size and modification time recorded
+in its header.
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, List, Optional
+
+from backend.repositories.song_catalog import SongCatalog  # pylint: disable=import-error
+
+MAGIC = b"MP3CAT01"
+HEADER = struct.Struct("<8sqqqq")
+COLUMNS = 5
+
+
+def _source_stamp(source_path: str) -> tuple:
+    """Returns the size and modification time identifying a JSON snapshot.
+
+    Args:
+        source_path (str): Path to the JSON snapshot.
+
+    Returns:
+        tuple: (size in bytes, modification time in nanoseconds).
+    """
+    stat = os.stat(source_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _little_endian(values: array) -> bytes:
+    """Encodes an int64 array as little-endian bytes.
+
+    Args:
+        values (array): Array of typecode ``q``.
+
+    Returns:
+        bytes: Encoded values.
+    """
+    if sys.byteorder != "little":
+        values = array("q", values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_snapshot(path: str, catalog: SongCatalog, source_path: str) -> None:
+    """Writes a binary snapshot of the catalog, atomically.
+
+    Args:
+        path (str): Destination file.
+        catalog (SongCatalog): Catalog to write.
+        source_path (str): JSON snapshot holding the same songs.
+    """
+    codes: Dict[str, int] = {}
+    names: List[str] = []
+
+    def code_of(value: str) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    titles: List[str] = []
+    columns = [array("q") for _ in range(COLUMNS)]
+    for row in catalog.rows():
+        columns[0].append(catalog.song_id(row))
+        columns[1].append(catalog.year(row))
+        columns[2].append(catalog.duration(row))
+        columns[3].append(code_of(catalog.artist(row)))
+        columns[4].append(code_of(catalog.album(row)))
+        titles.append(catalog.title(row))
+
+    offsets = array("q", [0])
+    for value in names + titles:
+        offsets.append(offsets[-1] + len(value))
+
+    size, mtime_ns = _source_stamp(source_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(titles), len(names), size, mtime_ns))
+        file.write(_little_endian(offsets))
+        for column in columns:
+            file.write(_little_endian(column))
+        file.write("".join(names).encode("utf-8"))
+        file.write("".join(titles).encode("utf-8"))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+def _read_header(file, stamp: tuple) -> Optional[tuple]:
+    """Reads and validates the header of an open snapshot file.
+
+    Args:
+        file: Snapshot opened in binary mode, positioned at the start.
+        stamp (tuple): Expected (size, mtime) of the JSON snapshot.
+
+    Returns:
+        Optional[tuple]: (row count, name count), or None if the header is
+        malformed or was written from a different JSON snapshot.
+    """
+    header = file.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    magic, rows, name_count, size, mtime_ns = HEADER.unpack(header)
+    if magic != MAGIC or (size, mtime_ns) != stamp:
+        return None
+    return rows, name_count
+
+
+def is_current(path: str, source_path: str) -> bool:
+    """Checks whether a binary snapshot matches the JSON snapshot on disk.
+
+    Args:
+        path (str): Snapshot file.
+        source_path (str): JSON snapshot.
+
+    Returns:
+        bool: True if the snapshot exists and was written from that file.
+    """
+    try:
+        stamp = _source_stamp(source_path)
+        with open(path, "rb") as file:
+            return _read_header(file, stamp) is not None
+    except FileNotFoundError:
+        return False
+
+
+def read_snapshot(path: str, source_path: str) -> Optional[SongCatalog]:
+    """Loads a binary snapshot through a memory map.
+
+    Args:
+        path (str): Snapshot file.
+        source_path (str): JSON snapshot the binary one must match.
+
+    Returns:
+        Optional[SongCatalog]: The catalog, or None if the snapshot is
+        missing, malformed or older than the JSON snapshot.
+    """
+    try:
+        stamp = _source_stamp(source_path)
+        file = open(path, "rb")  # pylint: disable=consider-using-with
+    except FileNotFoundError:
+        return None
+
+    with file:
+        counts = _read_header(file, stamp)
+        if counts is None:
+            return None
+        rows, name_count = counts
+        view = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    with view:
+        position = HEADER.size
+        if len(view) < position + 8 * (name_count + rows + 1 + COLUMNS * rows):
+            return None
+
+        def take(count: int) -> array:
+            nonlocal position
+            values = array("q")
+            values.frombytes(view[position:position + 8 * count])
+            if sys.byteorder != "little":
+                values.byteswap()
+            position += 8 * count
+            return values
+
+        offsets = take(name_count + rows + 1)
+        columns = [take(rows) for _ in range(COLUMNS)]
+        text = view[position:].decode("utf-8")
+
+    names = [text[offsets[i]:offsets[i + 1]] for i in range(name_count)]
+    titles = [text[offsets[i]:offsets[i + 1]] for i in range(name_count, name_count + rows)]
+    ids, years, durations, artists, albums = columns
+    return SongCatalog.from_columns(ids, titles, artists, albums, years, durations, names)
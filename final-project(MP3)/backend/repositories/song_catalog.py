@@ -0,0 +1,379 @@
+"""Compact in-memory storage for the song catalog.
+
+This module is part of the MP3AVLtree project. It provides the SongCatalog
+class, which keeps songs in column form instead of one object per song:
+numeric fields live in typed arrays and artist and album names are
+dictionary-encoded through a StringPool, so a name shared by thousands of
+tracks is stored once. Songs are addressed by a row number that stays stable
+for the lifetime of the song, and are only turned into dictionaries (or
+SongDAO instances) when they leave the service.
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from array import array
+from collections import Counter
+from typing import Dict, Iterator, List, Optional
+
+INT64_MIN = -(2**63)
+INT64_MAX = 2**63 - 1
+INTEGER_FIELDS = ("id", "year", "duration")
+
+
+def _check_integers(values: dict) -> None:
+    """Checks that the integer fields present fit in an int64 column.
+
+    Args:
+        values (dict): Song fields; fields other than INTEGER_FIELDS are
+            not checked.
+
+    Raises:
+        ValueError: If an integer field is not an int or is out of range.
+    """
+    for field in INTEGER_FIELDS:
+        if field not in values:
+            continue
+        value = values[field]
+        if not isinstance(value, int) or not INT64_MIN <= value <= INT64_MAX:
+            raise ValueError(f"{field} must be an integer between {INT64_MIN} and {INT64_MAX}.")
+
+
+class StringPool:
+    """Dictionary encoding for repeated strings, with reference counting."""
+
+    def __init__(self):
+        """Initializes an empty pool."""
+        self._strings: List[Optional[str]] = []
+        self._codes: Dict[str, int] = {}
+        self._refs = array("q")
+        self._free: List[int] = []
+
+    @classmethod
+    def from_codes(cls, strings: List[str], *columns: array) -> "StringPool":
+        """Builds a pool whose codes are the positions in ``strings``.
+
+        Args:
+            strings (List[str]): Distinct strings.
+            *columns (array): Code columns referencing them; each occurrence
+                counts as one reference.
+
+        Returns:
+            StringPool: Pool with reference counts taken from the columns.
+        """
+        pool = cls()
+        pool._strings = list(strings)
+        pool._codes = {value: code for code, value in enumerate(strings)}
+        counts = Counter()
+        for column in columns:
+            counts.update(column)
+        pool._refs = array("q", (counts[code] for code in range(len(strings))))
+        return pool
+
+    def acquire(self, value: str) -> int:
+        """Returns the code of a string, adding it to the pool if needed.
+
+        Args:
+            value (str): String to encode.
+
+        Returns:
+            int: Code of the string.
+        """
+        code = self._codes.get(value)
+        if code is None:
+            if self._free:
+                code = self._free.pop()
+                self._strings[code] = value
+                self._refs[code] = 0
+            else:
+                code = len(self._strings)
+                self._strings.append(value)
+                self._refs.append(0)
+            self._codes[value] = code
+        self._refs[code] += 1
+        return code
+
+    def release(self, code: int) -> None:
+        """Drops one reference to a string, freeing it when unused.
+
+        Args:
+            code (int): Code returned by acquire().
+        """
+        self._refs[code] -= 1
+        if self._refs[code] == 0:
+            del self._codes[self._strings[code]]
+            self._strings[code] = None
+            self._free.append(code)
+
+    def __getitem__(self, code: int) -> str:
+        """Decodes a string.
+
+        Args:
+            code (int): Code returned by acquire().
+
+        Returns:
+            str: The encoded string.
+        """
+        return self._strings[code]
+
+    def __len__(self) -> int:
+        """Returns the number of distinct strings in use.
+
+        Returns:
+            int: Number of distinct strings.
+        """
+        return len(self._codes)
+
+
+class SongCatalog:
+    """Column-oriented song storage addressed by row number.
+
+    Rows of deleted songs are reused by later insertions. Iteration follows
+    insertion order, like the JSON list the catalog is loaded from.
+    """
+
+    def __init__(self):
+        """Initializes an empty catalog."""
+        self._ids = array("q")
+        self._years = array("q")
+        self._durations = array("q")
+        self._artists = array("q")
+        self._albums = array("q")
+        self._titles: List[Optional[str]] = []
+        self._pool = StringPool()
+        self._rows: Dict[int, int] = {}
+        self._free: List[int] = []
+
+    @classmethod
+    def from_columns(
+        cls,
+        ids: array,
+        titles: List[str],
+        artists: array,
+        albums: array,
+        years: array,
+        durations: array,
+        names: List[str],
+    ) -> "SongCatalog":
+        """Builds a catalog directly from column data, one row per song.
+
+        Args:
+            ids (array): Song IDs (typecode ``q``); must be unique.
+            titles (List[str]): Titles.
+            artists (array): Artist names as indexes into ``names``.
+            albums (array): Album names as indexes into ``names``.
+            years (array): Release years (typecode ``q``).
+            durations (array): Durations in seconds (typecode ``q``).
+            names (List[str]): Distinct artist and album names.
+
+        Returns:
+            SongCatalog: Catalog whose row i holds the i-th value of each column.
+        """
+        catalog = cls()
+        catalog._ids = ids
+        catalog._titles = titles
+        catalog._artists = artists
+        catalog._albums = albums
+        catalog._years = years
+        catalog._durations = durations
+        catalog._pool = StringPool.from_codes(names, artists, albums)
+        catalog._rows = dict(zip(ids, range(len(ids))))
+        return catalog
+
+    def __len__(self) -> int:
+        """Returns the number of songs.
+
+        Returns:
+            int: Number of songs.
+        """
+        return len(self._rows)
+
+    def __contains__(self, song_id: int) -> bool:
+        """Checks whether a song ID is present.
+
+        Args:
+            song_id (int): ID to look up.
+
+        Returns:
+            bool: True if the catalog holds a song with that ID.
+        """
+        return song_id in self._rows
+
+    def __iter__(self) -> Iterator[dict]:
+        """Iterates over the songs as dictionaries, in insertion order.
+
+        Yields:
+            dict: Song fields.
+        """
+        for row in self._rows.values():
+            yield self.get(row)
+
+    def rows(self) -> Iterator[int]:
+        """Iterates over the row numbers in use, in insertion order.
+
+        Returns:
+            Iterator[int]: Row numbers.
+        """
+        return iter(list(self._rows.values()))
+
+    def row_of(self, song_id: int) -> Optional[int]:
+        """Returns the row holding a song.
+
+        Args:
+            song_id (int): ID of the song.
+
+        Returns:
+            Optional[int]: Row number, or None if the ID is unknown.
+        """
+        return self._rows.get(song_id)
+
+    def add(self, song: dict) -> int:
+        """Stores a song that already has an ID.
+
+        Every value is checked before any column or the string pool is
+        touched, so a rejected song leaves the catalog unchanged.
+
+        Args:
+            song (dict): Song fields, including ``id``.
+
+        Returns:
+            int: Row assigned to the song.
+
+        Raises:
+            ValueError: If a song with the same ID is already stored, or if
+                an integer field does not fit in an int64 column.
+        """
+        song_id = song["id"]
+        if song_id in self._rows:
+            raise ValueError(f"Song with ID {song_id} already exists.")
+        _check_integers(song)
+        artist = self._pool.acquire(song["artist"])
+        album = self._pool.acquire(song["album"])
+        if self._free:
+            row = self._free.pop()
+            self._ids[row] = song_id
+            self._titles[row] = song["title"]
+            self._artists[row] = artist
+            self._albums[row] = album
+            self._years[row] = song["year"]
+            self._durations[row] = song["duration"]
+        else:
+            row = len(self._ids)
+            self._ids.append(song_id)
+            self._titles.append(song["title"])
+            self._artists.append(artist)
+            self._albums.append(album)
+            self._years.append(song["year"])
+            self._durations.append(song["duration"])
+        self._rows[song_id] = row
+        return row
+
+    def update(self, song_id: int, changes: dict) -> int:
+        """Overwrites some fields of a stored song; its row does not change.
+
+        Args:
+            song_id (int): ID of the song.
+            changes (dict): Fields to overwrite. ``id`` and unknown fields
+                are ignored.
+
+        Returns:
+            int: Row of the song.
+
+        Raises:
+            ValueError: If the song is not found, or if an integer field
+                does not fit in an int64 column; the song is then unchanged.
+        """
+        row = self._rows.get(song_id)
+        if row is None:
+            raise ValueError(f"Song with ID {song_id} not found.")
+        _check_integers({field: value for field, value in changes.items() if field != "id"})
+        if "title" in changes:
+            self._titles[row] = changes["title"]
+        if "artist" in changes:
+            code = self._pool.acquire(changes["artist"])
+            self._pool.release(self._artists[row])
+            self._artists[row] = code
+        if "album" in changes:
+            code = self._pool.acquire(changes["album"])
+            self._pool.release(self._albums[row])
+            self._albums[row] = code
+        if "year" in changes:
+            self._years[row] = changes["year"]
+        if "duration" in changes:
+            self._durations[row] = changes["duration"]
+        return row
+
+    def remove(self, song_id: int) -> int:
+        """Removes a song and frees its row.
+
+        Args:
+            song_id (int): ID of the song.
+
+        Returns:
+            int: Row the song occupied.
+
+        Raises:
+            ValueError: If the song is not found.
+        """
+        row = self._rows.pop(song_id, None)
+        if row is None:
+            raise ValueError(f"Song with ID {song_id} not found.")
+        self._pool.release(self._artists[row])
+        self._pool.release(self._albums[row])
+        self._titles[row] = None
+        self._free.append(row)
+        return row
+
+    def song_id(self, row: int) -> int:
+        """Returns the ID stored in a row."""
+        return self._ids[row]
+
+    def title(self, row: int) -> str:
+        """Returns the title stored in a row."""
+        return self._titles[row]
+
+    def artist(self, row: int) -> str:
+        """Returns the artist stored in a row."""
+        return self._pool[self._artists[row]]
+
+    def album(self, row: int) -> str:
+        """Returns the album stored in a row."""
+        return self._pool[self._albums[row]]
+
+    def year(self, row: int) -> int:
+        """Returns the year stored in a row."""
+        return self._years[row]
+
+    def duration(self, row: int) -> int:
+        """Returns the duration stored in a row."""
+        return self._durations[row]
+
+    def get(self, row: int) -> dict:
+        """Materializes a row as a dictionary.
+
+        Args:
+            row (int): Row number.
+
+        Returns:
+            dict: Song fields, in SongDAO field order.
+        """
+        return {
+            "id": self._ids[row],
+            "title": self._titles[row],
+            "artist": self._pool[self._artists[row]],
+            "album": self._pool[self._albums[row]],
+            "year": self._years[row],
+            "duration": self._durations[row],
+        }
@@ -1,7 +1,8 @@
 """Defines the repository class for managing song data.
 
 This module is part of the MP3AVLtree project and includes the
-SongRepository class for interacting with songs stored in JSON format.
+SongRepository class for interacting with songs stored in JSON format,
+either as a plain snapshot or as a snapshot plus an append-only journal.
 
 Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
 
@@ -19,9 +20,18 @@ You should have received a copy of the GNU General Public License along with
 MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
 """
 
-from typing import Optional
-from pydantic import BaseModel  # pylint: disable=no-name-in-module
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Iterator, Optional
+from pydantic import BaseModel, Field, ValidationError  # pylint: disable=no-name-in-module
 from backend.repositories.json_repo import JsonRepository as BaseRepository  # pylint: disable=import-error
+from backend.repositories.song_catalog import INT64_MAX, INT64_MIN, SongCatalog  # pylint: disable=import-error
+from backend.metrics import REPOSITORY_SECONDS  # pylint: disable=import-error
+from backend.repositories.binary_snapshot import is_current, read_snapshot, write_snapshot  # pylint: disable=import-error
+from backend.tracing import traced  # pylint: disable=import-error
+
+SONGS_PATH = "backend/repositories/data/songs.json"
+COMPACT_THRESHOLD = 1000
 
 
 class SongDAO(BaseModel):
@@ -34,21 +44,96 @@ class SongDAO(BaseModel):
         album (str): Album name.
         year (int): Year the song was released.
         duration (int): Duration of the song in seconds.
+
+    The integer fields are bounded so that they fit the int64 columns of
+    the catalog.
     """
-    id: Optional[int] = None
+    id: Optional[int] = Field(None, ge=INT64_MIN, le=INT64_MAX)
     title: str
     artist: str
     album: str
-    year: int
-    duration: int
+    year: int = Field(ge=0, le=INT64_MAX)
+    duration: int = Field(ge=0, le=INT64_MAX)
 
 
 class SongRepository(BaseRepository):
-    """Repository for managing song data using SongDAO."""
+    """Repository for managing song data using SongDAO.
+
+    The catalog is read from disk once and kept in memory as a columnar
+    SongCatalog, indexed by ID. In journaled mode every mutation is appended
+    to the journal as a small record and replayed on startup; once enough
+    records accumulate, they are folded back into the snapshot (compaction).
+    Without journaling every mutation rewrites the snapshot, as the
+    repository always did.
+
+    Compaction also writes a binary snapshot next to the JSON one. On
+    startup it is memory-mapped instead of parsing the JSON, as long as it
+    still matches the JSON snapshot.
+
+    In shared mode several processes (e.g. uvicorn workers) use the same
+    files. Loading, writing and compaction hold the inter-process file lock,
+    compaction rotates the journal instead of clearing it, and each process
+    remembers how far it has read the journal so that poll() returns only
+    the records other processes appended since.
+
+    Otherwise journal writes are group-committed: records flushed by
+    deferred() are queued, and sync() appends everything queued so far in
+    a single durable write. Concurrent writers that call sync() after
+    releasing their locks therefore share one disk write instead of
+    queueing up behind each other's.
+
+    Attributes:
+        journaled (bool): Whether mutations are appended to the journal.
+        shared (bool): Whether other processes write to the same files.
+        compact_threshold (int): Journal records allowed before compaction.
+        binary_path (Optional[str]): Path to the binary snapshot, or None
+            if binary snapshots are disabled.
+    """
 
-    def __init__(self):
-        """Initializes the repository with the songs JSON file path."""
-        super().__init__("backend/repositories/data/songs.json")
+    def __init__(
+        self,
+        filepath: str = SONGS_PATH,
+        journaled: bool = True,
+        compact_threshold: int = COMPACT_THRESHOLD,
+        binary_snapshot: bool = True,
+        shared: bool = False,
+    ):
+        """Initializes the repository with the songs JSON file path.
+
+        Args:
+            filepath (str): Path to the songs JSON snapshot.
+            journaled (bool): Append mutations to the journal instead of
+                rewriting the snapshot on every change.
+            compact_threshold (int): Number of journal records after which
+                the journal is folded into the snapshot.
+            binary_snapshot (bool): Write and load a binary snapshot for
+                fast startup.
+            shared (bool): Coordinate with other processes using the same
+                files; requires journaling.
+
+        Raises:
+            ValueError: If shared mode is requested without journaling.
+        """
+        super().__init__(filepath)
+        if shared and not journaled:
+            raise ValueError("A shared repository must be journaled.")
+        self.journaled = journaled
+        self.shared = shared
+        self.keep_journal_open = not shared
+        self._journal_id: Optional[tuple] = None
+        self._journal_offset = 0
+        self.compact_threshold = compact_threshold
+        self._songs: Optional[SongCatalog] = None
+        self._rejected: list[dict] = []
+        self._last_id = 0
+        self._journal_size = 0
+        self._deferred: Optional[list[dict]] = None
+        self._commit_cond = threading.Condition()
+        self._committing = False
+        self._queued: list[dict] = []
+        self._queued_batches = 0
+        self._committed_batches = 0
+        self.binary_path: Optional[str] = f"{filepath}.bin" if binary_snapshot else None
 
     def _extract_data(self, data: list[dict]) -> list[dict]:
         """(Optional override) Extracts song data from raw JSON list.
@@ -61,14 +146,393 @@ class SongRepository(BaseRepository):
         """
         return data
 
+    def _apply(self, record: dict) -> None:
+        """Applies a journal record to the in-memory catalog.
+
+        Replaying a record twice has the same effect as replaying it once, so
+        a crash between compaction and journal truncation is harmless.
+        Records of other kinds, such as the ``begin`` marker of a rotated
+        journal, are ignored.
+
+        Args:
+            record (dict): Journal record with an ``op`` field.
+        """
+        songs = self._songs
+        op = record["op"]
+        if op == "add":
+            song = record["song"]
+            if song["id"] in songs:
+                songs.update(song["id"], song)
+            else:
+                songs.add(song)
+            self._last_id = max(self._last_id, song["id"])
+        elif op == "update":
+            if record["id"] in songs:
+                songs.update(record["id"], record["data"])
+        elif op == "delete":
+            if record["id"] in songs:
+                songs.remove(record["id"])
+
+    def _load_json_snapshot(self) -> None:
+        """Builds the in-memory catalog from the JSON snapshot.
+
+        Every entry is validated as a SongDAO once, which also coerces field
+        types (e.g. a year stored as ``"2020"``), so the typed catalog
+        columns never see a malformed value. Entries that are not valid
+        songs are set aside instead of stopping the load: they are not
+        served, but are written back unchanged whenever the snapshot is
+        rewritten, and their IDs are not reused. Songs that share an ID
+        with an earlier entry of the snapshot get a new ID, otherwise they
+        could not be addressed individually.
+        """
+        data = []
+        self._rejected = []
+        for song in self._extract_data(self.load_data()):
+            try:
+                data.append(SongDAO.model_validate(song).model_dump())
+            except ValidationError:
+                self._rejected.append(song)
+        reserved = [
+            song["id"] for song in self._rejected
+            if isinstance(song, dict) and isinstance(song.get("id"), int) and 0 < song["id"] <= INT64_MAX
+        ]
+        self._last_id = max([song["id"] or 0 for song in data] + reserved, default=0)
+        self._songs = SongCatalog()
+        for song in data:
+            if song["id"] is None or song["id"] in self._songs:
+                self._last_id += 1
+                song["id"] = self._last_id
+            self._songs.add(song)
+
+    def _snapshot_data(self) -> list[dict]:
+        """Returns the entries to write to the JSON snapshot.
+
+        Returns:
+            list[dict]: The catalog's songs, followed by the entries set
+            aside when the snapshot was loaded.
+        """
+        return list(self._state()) + self._rejected
+
+    def _locked(self, shared: bool = False) -> ContextManager[None]:
+        """Returns the inter-process lock in shared mode, a no-op otherwise.
+
+        Args:
+            shared (bool): Take the lock for reading only.
+
+        Returns:
+            ContextManager[None]: Context manager holding the lock.
+        """
+        return self.file_lock(shared) if self.shared else nullcontext()
+
+    def _journal_identity(self, path: str) -> Optional[tuple]:
+        """Identifies a journal file by inode and generation.
+
+        Args:
+            path (str): Journal file.
+
+        Returns:
+            Optional[tuple]: Device, inode and generation; None if missing.
+        """
+        stat = self.journal_stat(path)
+        return (*stat[0], self.journal_generation(path)) if stat is not None else None
+
+    def _mark_journal(self) -> None:
+        """Records that this process has read the journal up to its end."""
+        stat = self.journal_stat()
+        self._journal_id = self._journal_identity(self.journal_path)
+        self._journal_offset = stat[1] if stat is not None else 0
+
+    def _state(self) -> SongCatalog:
+        """Returns the in-memory catalog, loading it from disk on first use.
+
+        The binary snapshot is preferred when it matches the JSON snapshot;
+        the journal is replayed on top of whichever one was loaded.
+
+        Returns:
+            SongCatalog: Songs indexed by ID, in insertion order.
+        """
+        if self._songs is None:
+            if self.shared and self.journal_stat() is None:
+                self._create_journal()
+            with self._locked(shared=True):
+                self._load_state()
+        return self._songs
+
+    def _create_journal(self) -> None:
+        """Starts the journal of a shared repository if there is none yet.
+
+        Positions are tracked by file identity, so the journal must exist
+        before it is read. The check is repeated under the exclusive lock:
+        processes starting together would otherwise each create one, and
+        the later would move the earlier aside.
+        """
+        with self._locked():
+            if self.journal_stat() is None:
+                self.rotate_journal()
+
+    def _load_state(self) -> None:
+        """Loads the snapshot and replays the journal; see _state."""
+        catalog = None
+        if self.binary_path:
+            with REPOSITORY_SECONDS.time("read_snapshot"):
+                catalog = read_snapshot(self.binary_path, self.filepath)
+        if catalog is not None:
+            self._songs = catalog
+            self._rejected = []
+            self._last_id = max(catalog.song_id(row) for row in catalog.rows()) if len(catalog) else 0
+        else:
+            self._load_json_snapshot()
+        records = self.load_journal()
+        for record in records:
+            self._apply(record)
+        self._journal_size = len(records)
+        self._mark_journal()
+
+    @traced()
+    def reload(self) -> SongCatalog:
+        """Discards the in-memory catalog and loads it again from disk.
+
+        Returns:
+            SongCatalog: The freshly loaded catalog.
+        """
+        self._songs = None
+        return self._state()
+
+    def changed(self) -> bool:
+        """Cheaply checks whether another process changed the journal.
+
+        Costs one stat call and takes no lock.
+
+        Returns:
+            bool: True in shared mode if the journal was appended to or
+            rotated since this process last read it.
+        """
+        if not self.shared or self._songs is None or self._journal_id is None:
+            return False
+        stat = self.journal_stat()
+        return stat is None or stat != (self._journal_id[:2], self._journal_offset)
+
+    @traced()
+    def poll(self) -> Optional[list[dict]]:
+        """Reads the records other processes appended since the last call.
+
+        The records are returned, not applied: the caller applies each one
+        with apply_record, keeping its own indexes in step. If the journal
+        was rotated once, the unread tail of the old journal comes first.
+
+        Returns:
+            Optional[list[dict]]: Records in order (empty if nothing
+            changed), or None if the journal was rotated more than once
+            since the last read and the catalog must be reloaded.
+        """
+        if not self.shared or self._songs is None:
+            return []
+        with self._locked(shared=True):
+            identity = self._journal_identity(self.journal_path)
+            if identity is None:
+                return None
+            records = []
+            if identity != self._journal_id:
+                if self._journal_identity(self.old_journal_path) != self._journal_id:
+                    return None
+                records, _ = self.read_journal(self.old_journal_path, self._journal_offset)
+                self._journal_id, self._journal_offset, self._journal_size = identity, 0, 0
+            new_records, self._journal_offset = self.read_journal(self.journal_path, self._journal_offset)
+            records.extend(new_records)
+            self._journal_size += len(new_records)
+            return [record for record in records if record["op"] != "begin"]
+
+    def apply_record(self, record: dict) -> None:
+        """Applies a record returned by poll to the in-memory catalog.
+
+        Args:
+            record (dict): Journal record written by another process.
+        """
+        self._apply(record)
+
+    def _persist(self, records: list[dict]) -> None:
+        """Persists mutation records that were already applied in memory.
+
+        Inside deferred() the records are collected for its flush;
+        otherwise they are durable when this returns.
+
+        Args:
+            records (list[dict]): Journal records describing the mutations.
+        """
+        if self._deferred is not None:
+            self._deferred.extend(records)
+            return
+        self._flush(records)
+        self.sync()
+
+    def _flush(self, records: list[dict]) -> None:
+        """Writes or queues mutation records, compacting when due.
+
+        A private, journaled repository only queues the records for sync();
+        callers must not mutate the catalog concurrently with this call.
+
+        Args:
+            records (list[dict]): Journal records describing the mutations.
+        """
+        if not self.journaled:
+            self.save_data(self._snapshot_data())
+            return
+        if not self.shared:
+            with self._commit_cond:
+                self._queued.extend(records)
+                self._queued_batches += 1
+            self._journal_size += len(records)
+            if self._journal_size >= self.compact_threshold:
+                self.compact()
+            return
+        with self._locked():
+            self.append_journal(records)
+            self._journal_size += len(records)
+            if self._journal_size >= self.compact_threshold:
+                self.compact()
+            else:
+                self._mark_journal()
+
+    def sync(self) -> None:
+        """Makes every record queued so far durable (group commit).
+
+        The first caller appends all queued records, including those of
+        writers that queued after it, in one write; callers arriving
+        meanwhile wait for that write and are all released together,
+        usually finding their records already written. Cheap when nothing
+        is queued.
+        """
+        target = self._queued_batches
+        if self._committed_batches >= target:
+            return
+        with self._commit_cond:
+            while self._committing and self._committed_batches < target:
+                self._commit_cond.wait()
+            if self._committed_batches >= target:
+                return
+            self._committing = True
+            records, self._queued = self._queued, []
+            batches = self._queued_batches
+        try:
+            self.append_journal(records)
+        except OSError:
+            with self._commit_cond:
+                self._queued[:0] = records
+            raise
+        else:
+            self._committed_batches = batches
+        finally:
+            with self._commit_cond:
+                self._committing = False
+                self._commit_cond.notify_all()
+
+    @contextmanager
+    def _exclusive_commit(self) -> Iterator[None]:
+        """Waits for the group commit in progress and holds off the next one.
+
+        Yields:
+            None
+        """
+        with self._commit_cond:
+            while self._committing:
+                self._commit_cond.wait()
+            self._committing = True
+        try:
+            yield
+        finally:
+            with self._commit_cond:
+                self._committing = False
+                self._commit_cond.notify_all()
+
+    @contextmanager
+    def deferred(self) -> Iterator[None]:
+        """Delays persistence of the mutations made inside the block.
+
+        The in-memory catalog changes immediately; the collected records are
+        flushed once when the block exits, which lets callers release their
+        locks before touching the disk. Nested blocks flush with the
+        outermost one. For a private, journaled repository the flush only
+        queues the records: call sync() after releasing the locks to make
+        them durable.
+
+        In shared mode the outermost block holds the inter-process lock
+        until its records are written, so callers should catch up with
+        poll() first thing inside it.
+
+        Yields:
+            None
+        """
+        if self._deferred is not None:
+            yield
+            return
+        with self._locked():
+            self._deferred = []
+            try:
+                yield
+            finally:
+                records, self._deferred = self._deferred, None
+                if records:
+                    self._flush(records)
+
+    @traced()
+    def compact(self) -> None:
+        """Folds the journal into the snapshot and empties the journal.
+
+        The binary snapshot is rewritten from the same state before the
+        journal is cleared. In shared mode the journal is rotated instead,
+        and the in-memory catalog must already include every record.
+        Records still queued for sync() are part of the snapshot and are
+        dropped from the queue. No binary snapshot is written while the
+        JSON snapshot holds entries that were set aside, since it could not
+        represent them.
+        """
+        with self._exclusive_commit(), self._locked():
+            self.save_data(self._snapshot_data())
+            if self.binary_path and not self._rejected:
+                with REPOSITORY_SECONDS.time("write_snapshot"):
+                    write_snapshot(self.binary_path, self._state(), self.filepath)
+            if self.shared:
+                self.rotate_journal()
+                self._mark_journal()
+            else:
+                self.clear_journal()
+            self._journal_size = 0
+            with self._commit_cond:
+                self._queued = []
+                self._committed_batches = self._queued_batches
+
+    def checkpoint(self) -> None:
+        """Compacts if the journal has records, or refreshes a stale binary snapshot.
+
+        Meant to run on shutdown so the next start can use the binary
+        snapshot. With an empty journal the JSON snapshot already matches
+        the catalog, so only the binary snapshot is written and the JSON
+        file is left untouched.
+        """
+        if self._songs is None:
+            return
+        if self._journal_size:
+            self.compact()
+        elif self.binary_path is not None and not self._rejected and not is_current(self.binary_path, self.filepath):
+            with self._locked(), REPOSITORY_SECONDS.time("write_snapshot"):
+                write_snapshot(self.binary_path, self._state(), self.filepath)
+
+    @property
+    def catalog(self) -> SongCatalog:
+        """The in-memory catalog, shared with the service layer for indexing.
+
+        Returns:
+            SongCatalog: Columnar song storage.
+        """
+        return self._state()
+
     def get_all_songs(self) -> list[SongDAO]:
         """Retrieves all songs from the repository.
 
         Returns:
             list[SongDAO]: List of all songs as DAO objects.
         """
-        data = self.load_data()
-        return [SongDAO(**song) for song in data]
+        return [SongDAO(**song) for song in self._state()]
 
     def get_song_by_id(self, song_id: int) -> Optional[SongDAO]:
         """Retrieves a song by its ID.
@@ -79,11 +543,9 @@ class SongRepository(BaseRepository):
         Returns:
             Optional[SongDAO]: The matching song or None.
         """
-        data = self.load_data()
-        for song in data:
-            if song.get("id") == song_id:
-                return SongDAO(**song)
-        return None
+        songs = self._state()
+        row = songs.row_of(song_id)
+        return SongDAO(**songs.get(row)) if row is not None else None
 
     def get_song_by_title(self, title: str) -> Optional[SongDAO]:
         """Retrieves a song by its title (case-insensitive).
@@ -94,12 +556,13 @@ class SongRepository(BaseRepository):
         Returns:
             Optional[SongDAO]: The matching song or None.
         """
-        data = self.load_data()
-        for song in data:
-            if song.get("title", "").lower() == title.lower():
-                return SongDAO(**song)
+        songs = self._state()
+        for row in songs.rows():
+            if songs.title(row).lower() == title.lower():
+                return SongDAO(**songs.get(row))
         return None
 
+    @traced()
     def add_song(self, song: dict) -> None:
         """Adds a new song to the repository.
 
@@ -110,20 +573,24 @@ class SongRepository(BaseRepository):
             TypeError: If the provided song is not a dictionary.
             ValueError: If the song already includes an ID.
         """
-        data = self.load_data()
+        songs = self._state()
         if not isinstance(song, dict):
             raise TypeError("Song must be a dictionary.")
         if "id" in song:
             raise ValueError("Song must not include an ID. It is auto-assigned.")
 
-        last_id = max((s["id"] for s in data), default=0)
-        song["id"] = last_id + 1
-        data.append(song)
-        self.save_data(data)
+        self._last_id += 1
+        song["id"] = self._last_id
+        row = songs.add(song)
+        self._persist([{"op": "add", "song": songs.get(row)}])
 
+    @traced()
     def update_song(self, song_id: int, new_data: dict) -> None:
         """Updates an existing song.
 
+        The ID of a song is immutable; an ``id`` field in ``new_data`` is
+        ignored.
+
         Args:
             song_id (int): ID of the song to update.
             new_data (dict): Fields to update.
@@ -131,14 +598,13 @@ class SongRepository(BaseRepository):
         Raises:
             ValueError: If the song is not found.
         """
-        data = self.load_data()
-        for i, song in enumerate(data):
-            if song["id"] == song_id:
-                data[i].update(new_data)
-                self.save_data(data)
-                return SongDAO(**data[i])
-        raise ValueError(f"Song with ID {song_id} not found.")
-    
+        songs = self._state()
+        changes = {field: value for field, value in new_data.items() if field != "id"}
+        row = songs.update(song_id, changes)
+        self._persist([{"op": "update", "id": song_id, "data": changes}])
+        return SongDAO(**songs.get(row))
+
+    @traced()
     def delete_song(self, song_id: int) -> None:
         """Deletes a song from the repository.
 
@@ -148,9 +614,5 @@ class SongRepository(BaseRepository):
         Raises:
             ValueError: If the song does not exist.
         """
-        data = self.load_data()
-        initial_len = len(data)
-        data = [song for song in data if song["id"] != song_id]
-        if len(data) == initial_len:
-            raise ValueError(f"Song with ID {song_id} not found.")
-        self.save_data(data)
+        self._state().remove(song_id)
+        self._persist([{"op": "delete", "id": song_id}])
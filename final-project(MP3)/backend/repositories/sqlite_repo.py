@@ -0,0 +1,446 @@
+"""Defines a SQLite-backed repository for managing song data.
+
+This module is part of the MP3AVLtree project and includes the
+SqliteSongRepository class, a drop-in alternative to the JSON SongRepository
+for large catalogs. Songs live in a SQLite database in WAL mode: each
+mutation updates one row through the B-tree indexes, so persisting it costs
+O(log n) on disk instead of a journal replay or a full rewrite, and loading
+streams rows from a cursor instead of parsing one JSON document. The first
+time a database is opened it is filled from the JSON catalog (snapshot and
+journal), once.
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Iterator, List, Optional
+from backend.metrics import REPOSITORY_SECONDS  # pylint: disable=import-error
+from backend.repositories.song_catalog import SongCatalog  # pylint: disable=import-error
+from backend.repositories.song_repo import SONGS_PATH, SongDAO, SongRepository  # pylint: disable=import-error
+from backend.tracing import traced  # pylint: disable=import-error
+
+SQLITE_PATH = "backend/repositories/data/songs.db"
+LOG_RETENTION = 1000
+COLUMNS = ("id", "title", "artist", "album", "year", "duration")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS songs (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    artist TEXT NOT NULL,
+    album TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    duration INTEGER NOT NULL,
+    title_key TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS songs_title_key ON songs (title_key);
+CREATE TABLE IF NOT EXISTS song_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Statements are constant strings with placeholders, so sqlite3 prepares each
+# one once and reuses it from the connection's statement cache.
+SELECT_SONGS = "SELECT id, title, artist, album, year, duration FROM songs ORDER BY id"
+SELECT_BY_KEY_RANGE = (
+    "SELECT id, title, artist, album, year, duration FROM songs "
+    "WHERE title_key >= ? AND title_key < ? ORDER BY title_key LIMIT 1"
+)
+UPSERT_SONG = (
+    "INSERT OR REPLACE INTO songs (id, title, artist, album, year, duration, title_key) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+UPDATE_SONG = (
+    "UPDATE songs SET title = ?, artist = ?, album = ?, year = ?, duration = ?, title_key = ? WHERE id = ?"
+)
+DELETE_SONG = "DELETE FROM songs WHERE id = ?"
+INSERT_LOG = "INSERT INTO song_log (record) VALUES (?)"
+TRIM_LOG = "DELETE FROM song_log WHERE seq <= ?"
+
+
+def title_key(song: dict) -> str:
+    """Builds the normalized key of a song, as the service's AVL tree does.
+
+    Args:
+        song (dict): Song fields.
+
+    Returns:
+        str: ``"title - artist - album"`` in lowercase.
+    """
+    return f"{song['title'].lower()} - {song['artist'].lower()} - {song['album'].lower()}"
+
+
+def _scalar(connection: sqlite3.Connection, sql: str) -> object:
+    """Runs a single-value query to completion.
+
+    Fetching every row finishes the statement, so it does not stay active
+    and block a later checkpoint on the same connection.
+
+    Args:
+        connection (sqlite3.Connection): Open connection.
+        sql (str): Query returning one row with one column.
+
+    Returns:
+        object: The value.
+    """
+    return connection.execute(sql).fetchall()[0][0]
+
+
+def _row(song: dict) -> tuple:
+    """Returns the column values of a song, in COLUMNS order plus its key.
+
+    Args:
+        song (dict): Song fields, including ``id``.
+
+    Returns:
+        tuple: Values for UPSERT_SONG.
+    """
+    return (song["id"], song["title"], song["artist"], song["album"], song["year"], song["duration"],
+            title_key(song))
+
+
+class SqliteSongRepository(SongRepository):
+    """Repository for managing song data in a SQLite database.
+
+    It keeps the in-memory SongCatalog and the public interface of
+    SongRepository, so the service can use either one; only where the
+    mutations go differs. Mutations made inside deferred() share one
+    ``BEGIN IMMEDIATE`` transaction, which also serializes writers across
+    processes.
+
+    In shared mode each mutation also appends its record to a ``song_log``
+    table in the same transaction, and poll() returns the records other
+    processes wrote since the last call, like the journal of the JSON
+    repository. The log keeps the last LOG_RETENTION records; a process
+    that falls further behind reloads the catalog.
+
+    Attributes:
+        db_path (str): Path to the SQLite database.
+        shared (bool): Whether other processes write to the same database.
+    """
+
+    def __init__(self, db_path: str = SQLITE_PATH, json_path: str = SONGS_PATH, shared: bool = False):
+        """Initializes the repository.
+
+        Args:
+            db_path (str): Path to the SQLite database; it is created if
+                missing.
+            json_path (str): JSON catalog imported when the database is
+                created.
+            shared (bool): Coordinate with other processes using the same
+                database.
+        """
+        super().__init__(json_path, binary_snapshot=False)
+        self.db_path = db_path
+        self.shared = shared
+        self._connection: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.RLock()
+        self._log_seq = 0
+        self._data_version: Optional[int] = None
+        self._compact_pending = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Returns the database connection, opening it on first use.
+
+        The connection is in autocommit mode, so transactions are explicit,
+        and uses WAL so readers in other processes never block the writer.
+
+        Returns:
+            sqlite3.Connection: The open connection.
+        """
+        if self._connection is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = FULL")
+            connection.execute("PRAGMA busy_timeout = 10000")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    @contextmanager
+    def _transaction(self, write: bool = False) -> Iterator[sqlite3.Connection]:
+        """Runs the block in a transaction, unless one is already open.
+
+        Args:
+            write (bool): Take the database write lock up front
+                (``BEGIN IMMEDIATE``) instead of on the first write.
+
+        Yields:
+            sqlite3.Connection: The connection.
+        """
+        with self._db_lock:
+            connection = self._connect()
+            if connection.in_transaction:
+                yield connection
+                return
+            connection.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            with REPOSITORY_SECONDS.time("sqlite_commit"):
+                connection.execute("COMMIT")
+            if self._compact_pending:
+                self._compact_pending = False
+                connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def _locked(self, shared: bool = False) -> ContextManager[None]:
+        """Returns a no-op: SQLite does its own locking.
+
+        Args:
+            shared (bool): Unused.
+
+        Returns:
+            ContextManager[None]: A null context manager.
+        """
+        return nullcontext()
+
+    def _migrate(self, connection: sqlite3.Connection) -> None:
+        """Fills a new database from the JSON catalog, once.
+
+        The JSON repository replays its journal and renumbers duplicate IDs
+        while loading, so the imported songs are exactly what it would have
+        served. The JSON files are left untouched.
+
+        Args:
+            connection (sqlite3.Connection): Connection inside a write
+                transaction.
+        """
+        if _scalar(connection, "SELECT COUNT(*) FROM meta WHERE key = 'migrated_from'"):
+            return
+        songs = SongRepository(self.filepath, binary_snapshot=False).catalog
+        connection.executemany(UPSERT_SONG, (_row(song) for song in songs))
+        connection.execute(
+            "INSERT INTO meta (key, value) VALUES ('migrated_from', ?)",
+            (json.dumps({"path": self.filepath, "songs": len(songs)}),),
+        )
+
+    def _create_journal(self) -> None:
+        """Does nothing: changes are logged in the database, not a journal file."""
+
+    def _load_state(self) -> None:
+        """Migrates on first use and streams the songs into the catalog."""
+        with REPOSITORY_SECONDS.time("sqlite_load"), self._transaction(write=True) as connection:
+            self._migrate(connection)
+            catalog = SongCatalog()
+            for values in connection.execute(SELECT_SONGS):
+                catalog.add(dict(zip(COLUMNS, values)))
+            self._songs = catalog
+            self._last_id = _scalar(connection, "SELECT COALESCE(MAX(id), 0) FROM songs")
+            self._log_seq = _scalar(connection, "SELECT COALESCE(MAX(seq), 0) FROM song_log")
+            self._data_version = _scalar(connection, "PRAGMA data_version")
+
+    @traced()
+    def load_data(self) -> List[dict]:
+        """Loads every song stored in the database.
+
+        Returns:
+            List[dict]: Songs in ID order.
+        """
+        with self._transaction() as connection:
+            return [dict(zip(COLUMNS, values)) for values in connection.execute(SELECT_SONGS)]
+
+    @traced()
+    def save_data(self, data: List[dict]) -> None:
+        """Replaces every song stored in the database.
+
+        In shared mode a ``reset`` record makes other processes reload.
+
+        Args:
+            data (List[dict]): Songs to store, each with an ``id``.
+        """
+        with self._transaction(write=True) as connection:
+            connection.execute("DELETE FROM songs")
+            connection.executemany(UPSERT_SONG, (_row(song) for song in data))
+            if self.shared:
+                self._log(connection, [{"op": "reset"}])
+
+    def _log(self, connection: sqlite3.Connection, records: List[dict]) -> None:
+        """Appends records to the shared log and trims its oldest entries.
+
+        Args:
+            connection (sqlite3.Connection): Connection inside a write
+                transaction.
+            records (List[dict]): Records to append.
+        """
+        connection.executemany(INSERT_LOG, ((json.dumps(record, ensure_ascii=False),) for record in records))
+        last = _scalar(connection, "SELECT MAX(seq) FROM song_log")
+        connection.execute(TRIM_LOG, (last - LOG_RETENTION,))
+        self._log_seq = last
+
+    def _write(self, connection: sqlite3.Connection, records: List[dict]) -> None:
+        """Writes mutation records that were already applied in memory.
+
+        Updates write the whole current row, so the title key stays right;
+        a song deleted later in the same batch is skipped, as its delete
+        record follows.
+
+        Args:
+            connection (sqlite3.Connection): Connection inside a write
+                transaction.
+            records (List[dict]): Journal-style records, in order.
+        """
+        songs = self._songs
+        for record in records:
+            op = record["op"]
+            if op == "add":
+                connection.execute(UPSERT_SONG, _row(record["song"]))
+            elif op == "update":
+                row = songs.row_of(record["id"])
+                if row is not None:
+                    song = songs.get(row)
+                    connection.execute(UPDATE_SONG, _row(song)[1:] + (song["id"],))
+            elif op == "delete":
+                connection.execute(DELETE_SONG, (record["id"],))
+        if self.shared:
+            self._log(connection, records)
+
+    def _persist(self, records: List[dict]) -> None:
+        """Persists mutation records, in the open deferred() transaction if any.
+
+        Args:
+            records (List[dict]): Journal-style records describing the
+                mutations.
+        """
+        with self.deferred():
+            self._deferred.extend(records)
+
+    @contextmanager
+    def deferred(self) -> Iterator[None]:
+        """Collects the mutations made inside the block into one transaction.
+
+        The outermost block opens a ``BEGIN IMMEDIATE`` transaction, which
+        holds the database write lock, and commits the collected records
+        when it exits. Callers in shared mode should poll() first thing
+        inside it.
+
+        Yields:
+            None
+        """
+        if self._deferred is not None:
+            yield
+            return
+        with self._transaction(write=True) as connection:
+            self._deferred = []
+            try:
+                yield
+            finally:
+                records, self._deferred = self._deferred, None
+                if records:
+                    self._write(connection, records)
+
+    def changed(self) -> bool:
+        """Cheaply checks whether another process committed to the database.
+
+        While this process is writing it reports no change: the writer
+        catches up with poll() inside its transaction anyway, and readers
+        should not queue behind it.
+
+        Returns:
+            bool: True in shared mode if SQLite's data version moved since
+            this process last read the database.
+        """
+        if not self.shared or self._songs is None or not self._db_lock.acquire(blocking=False):
+            return False
+        try:
+            return _scalar(self._connect(), "PRAGMA data_version") != self._data_version
+        finally:
+            self._db_lock.release()
+
+    @traced()
+    def poll(self) -> Optional[list[dict]]:
+        """Reads the records other processes logged since the last call.
+
+        Returns:
+            Optional[list[dict]]: Records in order (empty if nothing
+            changed), or None if the catalog must be reloaded because the
+            log no longer reaches back far enough or the songs were replaced.
+        """
+        if not self.shared or self._songs is None:
+            return []
+        with self._transaction() as connection:
+            self._data_version = _scalar(connection, "PRAGMA data_version")
+            first = _scalar(connection, "SELECT MIN(seq) FROM song_log")
+            rows = connection.execute(
+                "SELECT seq, record FROM song_log WHERE seq > ? ORDER BY seq", (self._log_seq,)
+            ).fetchall()
+        if first is not None and first > self._log_seq + 1:
+            return None
+        if rows:
+            self._log_seq = rows[-1][0]
+        records = [json.loads(record) for _, record in rows]
+        if any(record["op"] == "reset" for record in records):
+            return None
+        return records
+
+    @traced()
+    def compact(self) -> None:
+        """Folds the write-ahead log into the database file.
+
+        SQLite cannot checkpoint from inside a transaction, so within
+        deferred() the checkpoint runs right after the commit.
+        """
+        with self._db_lock:
+            connection = self._connect()
+            if connection.in_transaction:
+                self._compact_pending = True
+            else:
+                connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def checkpoint(self) -> None:
+        """Refreshes query planner statistics and checkpoints the write-ahead log.
+
+        Meant to run on shutdown.
+        """
+        if self._connection is None:
+            return
+        with self._db_lock:
+            self._connection.execute("PRAGMA optimize")
+        self.compact()
+
+    def get_song_by_title(self, title: str) -> Optional[SongDAO]:
+        """Retrieves a song by its title (case-insensitive), through the title key index.
+
+        Args:
+            title (str): Title of the song to search.
+
+        Returns:
+            Optional[SongDAO]: The first matching song in key order, or None.
+        """
+        prefix = f"{title.lower()} - "
+        with self._transaction() as connection:
+            rows = connection.execute(SELECT_BY_KEY_RANGE, (prefix, prefix + "\U0010ffff")).fetchall()
+        return SongDAO(**dict(zip(COLUMNS, rows[0]))) if rows else None
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        with self._db_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,236 @@
+"""AVL tree augmented with subtree aggregates of song durations and years.
+
+This module is part of the MP3AVLtree project. It provides AggregateAVLTree,
+an AVLTree whose nodes also keep the total duration and the minimum and
+maximum year of their subtree. The aggregates are refreshed wherever the
+tree already refreshes heights and sizes (rotations, rebalancing and bulk
+building), so statistics over any key range are computed from O(log n)
+nodes without reading a single song.
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typing import Any, Callable, List, Optional, Tuple
+from backend.services.avl_tree import AVLNode, AVLTree  # pylint: disable=import-error
+
+
+class AggregateNode(AVLNode):
+    """AVL node carrying its song's measures and its subtree's aggregates.
+
+    Attributes:
+        duration (int): Duration of the node's song.
+        year (int): Year of the node's song.
+        total_duration (int): Sum of the durations in the subtree.
+        min_year (int): Earliest year in the subtree.
+        max_year (int): Latest year in the subtree.
+    """
+
+    __slots__ = ("duration", "year", "total_duration", "min_year", "max_year")
+
+    def __init__(self, key: Any, value: Any, duration: int, year: int):
+        """Initializes a leaf node.
+
+        Args:
+            key (Any): Key of the node.
+            value (Any): Value associated with the node.
+            duration (int): Duration of the node's song.
+            year (int): Year of the node's song.
+        """
+        super().__init__(key, value)
+        self.duration = duration
+        self.year = year
+        self.total_duration = duration
+        self.min_year = year
+        self.max_year = year
+
+
+class AggregateAVLTree(AVLTree):
+    """AVLTree that maintains duration and year aggregates per subtree."""
+
+    def __init__(self, measure: Callable[[Any], Tuple[int, int]], ngram_index: bool = False, ngram_size: int = 3):
+        """Initializes an empty tree.
+
+        Args:
+            measure (Callable[[Any], Tuple[int, int]]): Returns the duration
+                and year of the song a value refers to. It is called once per
+                insertion; update a song by deleting and reinserting it.
+            ngram_index (bool): See AVLTree.
+            ngram_size (int): See AVLTree.
+        """
+        super().__init__(ngram_index=ngram_index, ngram_size=ngram_size, measure=measure)
+
+    def _new_node(self, key: Any, value: Any) -> AggregateNode:
+        """Creates a node holding the measures of its song.
+
+        Args:
+            key (Any): Key of the node.
+            value (Any): Value associated with the node.
+
+        Returns:
+            AggregateNode: The new node.
+        """
+        return AggregateNode(key, value, *self._measure(value))
+
+    def _take_entry(self, node: AggregateNode, source: AggregateNode) -> None:
+        """Moves the entry and the song measures of another node into a node.
+
+        Args:
+            node (AggregateNode): Node that keeps its position in the tree.
+            source (AggregateNode): Node whose entry it takes over.
+        """
+        super()._take_entry(node, source)
+        node.duration = source.duration
+        node.year = source.year
+
+    def _pull(self, node: AggregateNode) -> None:
+        """Recomputes a node's aggregates from its children.
+
+        Args:
+            node (AggregateNode): Node whose children are up to date.
+        """
+        total = node.duration
+        low = high = node.year
+        for child in (node.left, node.right):
+            if child is not None:
+                total += child.total_duration
+                if child.min_year < low:
+                    low = child.min_year
+                if child.max_year > high:
+                    high = child.max_year
+        node.total_duration = total
+        node.min_year = low
+        node.max_year = high
+
+    def _rotate_right(self, y: AggregateNode) -> AggregateNode:
+        """Performs a right rotation and refreshes the two moved nodes.
+
+        Args:
+            y (AggregateNode): Root of the unbalanced subtree.
+
+        Returns:
+            AggregateNode: New root after rotation.
+        """
+        x = super()._rotate_right(y)
+        self._pull(y)
+        self._pull(x)
+        return x
+
+    def _rotate_left(self, x: AggregateNode) -> AggregateNode:
+        """Performs a left rotation and refreshes the two moved nodes.
+
+        Args:
+            x (AggregateNode): Root of the unbalanced subtree.
+
+        Returns:
+            AggregateNode: New root after rotation.
+        """
+        y = super()._rotate_left(x)
+        self._pull(x)
+        self._pull(y)
+        return y
+
+    def _rebalance(self, node: AggregateNode) -> AggregateNode:
+        """Rebalances a node and refreshes its aggregates.
+
+        Args:
+            node (AggregateNode): Node whose children are already balanced.
+
+        Returns:
+            AggregateNode: Root of the subtree after any rotation.
+        """
+        subtree = super()._rebalance(node)
+        if subtree is node:
+            self._pull(node)
+        return subtree
+
+    def _build_balanced(self, items: List[Tuple[Any, Any]], start: int, end: int) -> Optional[AggregateNode]:
+        """Builds a balanced subtree and computes its aggregates bottom-up.
+
+        Args:
+            items (List[Tuple[Any, Any]]): Key-value pairs sorted by key.
+            start (int): First index of the slice (inclusive).
+            end (int): Last index of the slice (exclusive).
+
+        Returns:
+            Optional[AggregateNode]: Root of the built subtree.
+        """
+        node = super()._build_balanced(items, start, end)
+        if node is not None:
+            self._pull(node)
+        return node
+
+    def aggregate(self, lo: Any = None, hi: Any = None) -> dict:
+        """Computes statistics over the keys with lo <= key < hi, in O(log n).
+
+        The search descends to the highest node inside the range, then
+        follows the two range boundaries below it; every subtree hanging
+        inside a boundary lies wholly in the range and contributes its
+        stored aggregates.
+
+        Args:
+            lo (Any): Inclusive lower bound, or None for no lower bound.
+            hi (Any): Exclusive upper bound, or None for no upper bound.
+
+        Returns:
+            dict: ``count``, ``total_duration``, ``average_duration``,
+            ``min_year`` and ``max_year``; the last three are None for an
+            empty range.
+        """
+        nodes = []
+        subtrees = []
+        node = self.root
+        while node is not None:
+            if lo is not None and node.key < lo:
+                node = node.right
+            elif hi is not None and node.key >= hi:
+                node = node.left
+            else:
+                break
+        if node is not None:
+            nodes.append(node)
+            child = node.left
+            while child is not None:
+                if lo is None or child.key >= lo:
+                    nodes.append(child)
+                    subtrees.append(child.right)
+                    child = child.left
+                else:
+                    child = child.right
+            child = node.right
+            while child is not None:
+                if hi is None or child.key < hi:
+                    nodes.append(child)
+                    subtrees.append(child.left)
+                    child = child.right
+                else:
+                    child = child.left
+
+        count = len(nodes)
+        total = sum(item.duration for item in nodes)
+        years = [item.year for item in nodes]
+        for subtree in subtrees:
+            if subtree is not None:
+                count += subtree.size
+                total += subtree.total_duration
+                years.append(subtree.min_year)
+                years.append(subtree.max_year)
+        return {
+            "count": count,
+            "total_duration": total,
+            "average_duration": total / count if count else None,
+            "min_year": min(years) if years else None,
+            "max_year": max(years) if years else None,
+        }
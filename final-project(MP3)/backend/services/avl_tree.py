@@ -1,8 +1,17 @@
 """AVL Tree implementation for storing and retrieving key-value pairs efficiently.
 
-This module is part of the MP3AVLtree project. It provides an AVLTree class
-that supports insertion, deletion, full traversal, exact search, and partial
-search by substring on string-based keys (e.g., song titles).
+This module is part of the MP3AVLtree project. It provides an AVLTree class,
+the default OrderedMap engine, that supports insertion, deletion, full
+traversal, exact search, and partial search by substring on string-based keys
+(e.g., song titles). Partial search can optionally be backed by an n-gram
+inverted index. Ordered range and prefix scans descend to the lower bound and
+stop at the upper one.
+
+Every operation is iterative: insertions and deletions record the path from
+the root and rebalance it bottom-up with heights updated inline, and nodes use
+__slots__ to avoid a per-node attribute dictionary. Each tree counts the
+rotations it performs and the nodes its lookups visit, with plain integer
+additions, so the counters can stay on in production.
 
 Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
 
@@ -20,7 +29,9 @@ You should have received a copy of the GNU General Public License along with
 MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
 """
 
-from typing import Any, Optional
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+from backend.services.ordered_map import OrderedMap  # pylint: disable=import-error
+from backend.tracing import traced  # pylint: disable=import-error
 
 
 class AVLNode:
@@ -30,10 +41,13 @@ class AVLNode:
         key (Any): Key used for comparison.
         value (dict): Associated value stored in the node.
         height (int): Height of the node.
+        size (int): Number of nodes in the subtree rooted at this node.
         left (Optional[AVLNode]): Left child.
         right (Optional[AVLNode]): Right child.
     """
 
+    __slots__ = ("key", "value", "height", "size", "left", "right")
+
     def __init__(self, key: Any, value: dict):
         """Initializes an AVLNode.
 
@@ -44,17 +58,61 @@ class AVLNode:
         self.key = key
         self.value = value
         self.height = 1
+        self.size = 1
         self.left: Optional['AVLNode'] = None
         self.right: Optional['AVLNode'] = None
 
 
-class AVLTree:
-    """AVL Tree implementation supporting insertion, deletion, search, and traversal."""
+class AVLTree(OrderedMap):
+    """AVL Tree implementation supporting insertion, deletion, search, and traversal.
+
+    Operation counters and the n-gram index are described in OrderedMap.
+
+    Attributes:
+        root (Optional[AVLNode]): Root node of the tree.
+    """
+
+    def __init__(
+        self,
+        ngram_index: bool = False,
+        ngram_size: int = 3,
+        measure: Optional[Callable[[Any], Tuple[int, int]]] = None,
+    ):
+        """Initializes an empty AVL Tree.
 
-    def __init__(self):
-        """Initializes an empty AVL Tree."""
+        Args:
+            ngram_index (bool): Maintain an n-gram inverted index over the
+                keys to speed up partial search.
+            ngram_size (int): Length of the indexed n-grams.
+            measure (Optional[Callable[[Any], Tuple[int, int]]]): See
+                OrderedMap.
+        """
+        super().__init__(ngram_index=ngram_index, ngram_size=ngram_size, measure=measure)
         self.root: Optional[AVLNode] = None
 
+    def _new_node(self, key: Any, value: dict) -> AVLNode:
+        """Creates a node; subclasses override it to use augmented nodes.
+
+        Args:
+            key (Any): Key of the node.
+            value (dict): Value associated with the node.
+
+        Returns:
+            AVLNode: The new node.
+        """
+        return AVLNode(key, value)
+
+    def _take_entry(self, node: AVLNode, source: AVLNode) -> None:
+        """Moves the entry of another node into a node, as delete() does
+        with the in-order successor.
+
+        Args:
+            node (AVLNode): Node that keeps its position in the tree.
+            source (AVLNode): Node whose key and value it takes over.
+        """
+        node.key = source.key
+        node.value = source.value
+
     def _get_height(self, node: Optional[AVLNode]) -> int:
         """Returns the height of the given node.
 
@@ -66,16 +124,16 @@ class AVLTree:
         """
         return node.height if node else 0
 
-    def _get_balance(self, node: Optional[AVLNode]) -> int:
-        """Calculates the balance factor of a node.
+    def _get_size(self, node: Optional[AVLNode]) -> int:
+        """Returns the number of nodes in the subtree rooted at the given node.
 
         Args:
             node (Optional[AVLNode]): Node to evaluate.
 
         Returns:
-            int: Balance factor (left height - right height).
+            int: Subtree size; 0 if None.
         """
-        return self._get_height(node.left) - self._get_height(node.right) if node else 0
+        return node.size if node else 0
 
     def _rotate_right(self, y: AVLNode) -> AVLNode:
         """Performs a right rotation on the given node.
@@ -86,15 +144,18 @@ class AVLTree:
         Returns:
             AVLNode: New root after rotation.
         """
+        self.rotations += 1
         x = y.left
         T2 = x.right
-
         x.right = y
         y.left = T2
 
-        y.height = max(self._get_height(y.left), self._get_height(y.right)) + 1
-        x.height = max(self._get_height(x.left), self._get_height(x.right)) + 1
-
+        yl, yr = y.left, y.right
+        y.height = max(yl.height if yl else 0, yr.height if yr else 0) + 1
+        y.size = (yl.size if yl else 0) + (yr.size if yr else 0) + 1
+        xl = x.left
+        x.height = max(xl.height if xl else 0, y.height) + 1
+        x.size = (xl.size if xl else 0) + y.size + 1
         return x
 
     def _rotate_left(self, x: AVLNode) -> AVLNode:
@@ -106,202 +167,313 @@ class AVLTree:
         Returns:
             AVLNode: New root after rotation.
         """
+        self.rotations += 1
         y = x.right
         T2 = y.left
-
         y.left = x
         x.right = T2
 
-        x.height = max(self._get_height(x.left), self._get_height(x.right)) + 1
-        y.height = max(self._get_height(y.left), self._get_height(y.right)) + 1
-
+        xl, xr = x.left, x.right
+        x.height = max(xl.height if xl else 0, xr.height if xr else 0) + 1
+        x.size = (xl.size if xl else 0) + (xr.size if xr else 0) + 1
+        yr = y.right
+        y.height = max(x.height, yr.height if yr else 0) + 1
+        y.size = x.size + (yr.size if yr else 0) + 1
         return y
 
-    def _insert(self, node: Optional[AVLNode], key: Any, value: dict) -> AVLNode:
-        """Recursively inserts a key-value pair into the subtree.
+    def _rebalance(self, node: AVLNode) -> AVLNode:
+        """Refreshes a node's height and size and restores its AVL balance.
 
         Args:
-            node (Optional[AVLNode]): Current node.
-            key (Any): Key to insert.
-            value (dict): Value associated with the key.
+            node (AVLNode): Node whose children are already balanced.
 
         Returns:
-            AVLNode: Root node of the updated subtree.
-
-        Raises:
-            ValueError: If a duplicate key is inserted.
+            AVLNode: Root of the subtree after any rotation.
         """
-        if not node:
-            return AVLNode(key, value)
-
-        if key < node.key:
-            node.left = self._insert(node.left, key, value)
-        elif key > node.key:
-            node.right = self._insert(node.right, key, value)
-        else:
-            raise ValueError("Duplicate keys are not allowed in AVL Tree.")
-
-        node.height = 1 + max(self._get_height(node.left), self._get_height(node.right))
-        balance = self._get_balance(node)
-
-        if balance > 1 and key < node.left.key:
-            return self._rotate_right(node)
-        if balance < -1 and key > node.right.key:
-            return self._rotate_left(node)
-        if balance > 1 and key > node.left.key:
-            node.left = self._rotate_left(node.left)
+        left, right = node.left, node.right
+        left_height = left.height if left else 0
+        right_height = right.height if right else 0
+        balance = left_height - right_height
+
+        if balance > 1:
+            if (left.left.height if left.left else 0) < (left.right.height if left.right else 0):
+                node.left = self._rotate_left(left)
             return self._rotate_right(node)
-        if balance < -1 and key < node.right.key:
-            node.right = self._rotate_right(node.right)
+        if balance < -1:
+            if (right.right.height if right.right else 0) < (right.left.height if right.left else 0):
+                node.right = self._rotate_right(right)
             return self._rotate_left(node)
 
+        node.height = (left_height if left_height > right_height else right_height) + 1
+        node.size = (left.size if left else 0) + (right.size if right else 0) + 1
         return node
 
+    def _rebalance_path(self, path: List[AVLNode]) -> None:
+        """Rebalances the nodes of a root-to-leaf path, from the bottom up.
+
+        Args:
+            path (List[AVLNode]): Nodes visited from the root downwards.
+        """
+        for index in range(len(path) - 1, -1, -1):
+            node = path[index]
+            subtree = self._rebalance(node)
+            if subtree is not node:
+                if index == 0:
+                    self.root = subtree
+                elif path[index - 1].left is node:
+                    path[index - 1].left = subtree
+                else:
+                    path[index - 1].right = subtree
+
+    @traced()
     def insert(self, key: Any, value: dict) -> None:
         """Inserts a key-value pair into the AVL Tree.
 
         Args:
             key (Any): Key to insert.
             value (dict): Value associated with the key.
-        """
-        self.root = self._insert(self.root, key, value)
-
-    def _min_value_node(self, node: AVLNode) -> AVLNode:
-        """Finds the node with the minimum key in the subtree.
-
-        Args:
-            node (AVLNode): Root of the subtree.
 
-        Returns:
-            AVLNode: Node with the minimum key.
+        Raises:
+            ValueError: If a duplicate key is inserted.
         """
-        current = node
-        while current.left:
-            current = current.left
-        return current
+        path = []
+        node = self.root
+        while node:
+            path.append(node)
+            if key < node.key:
+                node = node.left
+            elif key > node.key:
+                node = node.right
+            else:
+                raise ValueError("Duplicate keys are not allowed in AVL Tree.")
+        self.nodes_visited += len(path)
+
+        new_node = self._new_node(key, value)
+        if not path:
+            self.root = new_node
+        elif key < path[-1].key:
+            path[-1].left = new_node
+        else:
+            path[-1].right = new_node
+        self._rebalance_path(path)
+
+        if self.ngram_index is not None:
+            self.ngram_index.add(key)
 
-    def _delete(self, node: Optional[AVLNode], key: Any) -> Optional[AVLNode]:
-        """Recursively deletes a node with the given key.
+    def _build_balanced(self, items: List[Tuple[Any, dict]], start: int, end: int) -> Optional[AVLNode]:
+        """Builds a perfectly balanced subtree from a sorted slice of items.
 
         Args:
-            node (Optional[AVLNode]): Current node.
-            key (Any): Key to delete.
+            items (List[Tuple[Any, dict]]): Key-value pairs sorted by key.
+            start (int): First index of the slice (inclusive).
+            end (int): Last index of the slice (exclusive).
 
         Returns:
-            Optional[AVLNode]: Root of the updated subtree.
+            Optional[AVLNode]: Root of the built subtree.
         """
-        if not node:
+        if start >= end:
             return None
+        middle = (start + end) // 2
+        node = self._new_node(*items[middle])
+        node.left = self._build_balanced(items, start, middle)
+        node.right = self._build_balanced(items, middle + 1, end)
+        node.height = 1 + max(self._get_height(node.left), self._get_height(node.right))
+        node.size = end - start
+        return node
 
-        if key < node.key:
-            node.left = self._delete(node.left, key)
-        elif key > node.key:
-            node.right = self._delete(node.right, key)
-        else:
-            if not node.left:
-                return node.right
-            elif not node.right:
-                return node.left
-
-            temp = self._min_value_node(node.right)
-            node.key = temp.key
-            node.value = temp.value
-            node.right = self._delete(node.right, temp.key)
+    @traced()
+    def bulk_load(self, items: Iterable[Tuple[Any, dict]]) -> None:
+        """Replaces the contents of the tree with the given key-value pairs.
 
-        node.height = 1 + max(self._get_height(node.left), self._get_height(node.right))
-        balance = self._get_balance(node)
+        The pairs are sorted once and the tree is built bottom-up with every
+        height set directly, so no rotations are needed. Building costs
+        O(n) on already sorted input and O(n log n) for the sort otherwise.
 
-        if balance > 1 and self._get_balance(node.left) >= 0:
-            return self._rotate_right(node)
-        if balance > 1 and self._get_balance(node.left) < 0:
-            node.left = self._rotate_left(node.left)
-            return self._rotate_right(node)
-        if balance < -1 and self._get_balance(node.right) <= 0:
-            return self._rotate_left(node)
-        if balance < -1 and self._get_balance(node.right) > 0:
-            node.right = self._rotate_right(node.right)
-            return self._rotate_left(node)
+        Args:
+            items (Iterable[Tuple[Any, dict]]): Key-value pairs in any order.
 
-        return node
+        Raises:
+            ValueError: If two pairs share the same key.
+        """
+        items = self._sorted_items(items)
+        self.root = self._build_balanced(items, 0, len(items))
 
+    @traced()
     def delete(self, key: Any) -> None:
         """Deletes a node with the specified key.
 
+        A node with two children takes over the key and value of its in-order
+        successor, which is then unlinked instead.
+
         Args:
             key (Any): Key of the node to delete.
         """
-        self.root = self._delete(self.root, key)
+        path = []
+        node = self.root
+        while node and node.key != key:
+            path.append(node)
+            node = node.left if key < node.key else node.right
+        if node is None:
+            self.nodes_visited += len(path)
+            return
+
+        target = node
+        if node.left and node.right:
+            path.append(node)
+            target = node.right
+            while target.left:
+                path.append(target)
+                target = target.left
+            self._take_entry(node, target)
+        self.nodes_visited += len(path) + 1
+
+        child = target.left if target.left else target.right
+        if not path:
+            self.root = child
+        elif path[-1].left is target:
+            path[-1].left = child
+        else:
+            path[-1].right = child
+        self._rebalance_path(path)
 
-    def _search(self, node: Optional[AVLNode], key: Any) -> Optional[dict]:
-        """Recursively searches for a key in the tree.
+        if self.ngram_index is not None:
+            self.ngram_index.remove(key)
+
+    def search(self, key: Any) -> Optional[dict]:
+        """Searches for a key in the AVL Tree.
 
         Args:
-            node (Optional[AVLNode]): Current node.
             key (Any): Key to search for.
 
         Returns:
-            Optional[dict]: Associated value if found, else None.
+            Optional[dict]: Value associated with the key, or None if not found.
         """
-        if not node:
-            return None
-        if key == node.key:
-            return node.value
-        if key < node.key:
-            return self._search(node.left, key)
-        return self._search(node.right, key)
+        visited = 0
+        node = self.root
+        while node:
+            visited += 1
+            node_key = node.key
+            if key == node_key:
+                self.nodes_visited += visited
+                return node.value
+            node = node.left if key < node_key else node.right
+        self.nodes_visited += visited
+        return None
+
+    @traced()
+    def get_all(self) -> list:
+        """Returns all values in the AVL Tree in sorted order.
 
-    def search(self, key: Any) -> Optional[dict]:
-        """Searches for a key in the AVL Tree.
+        Returns:
+            list: List of all node values in in-order traversal.
+        """
+        result = []
+        stack = []
+        node = self.root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            result.append(node.value)
+            node = node.right
+        return result
 
-        Args:
-            key (Any): Key to search for.
+    def _height(self) -> int:
+        """Returns the height of the tree.
 
         Returns:
-            Optional[dict]: Value associated with the key, or None if not found.
+            int: Number of nodes on the longest root-to-leaf path.
+        """
+        return self._get_height(self.root)
+
+    def __len__(self) -> int:
+        """Returns the number of nodes in the tree.
+
+        Returns:
+            int: Number of stored keys.
         """
-        return self._search(self.root, key)
+        return self._get_size(self.root)
 
-    def _inorder(self, node: Optional[AVLNode], result: list) -> None:
-        """Performs in-order traversal to collect node values.
+    def select(self, index: int) -> Optional[Tuple[Any, dict]]:
+        """Returns the node with the given position in key order, in O(log n).
 
         Args:
-            node (Optional[AVLNode]): Current node.
-            result (list): List to store traversal result.
+            index (int): Zero-based position in key order.
+
+        Returns:
+            Optional[Tuple[Any, dict]]: Key and value at that position, or
+            None if the index is out of range.
         """
-        if node:
-            self._inorder(node.left, result)
-            result.append(node.value)
-            self._inorder(node.right, result)
+        node = self.root
+        if index < 0 or index >= self._get_size(node):
+            return None
+        while node:
+            self.nodes_visited += 1
+            left_size = node.left.size if node.left else 0
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node.key, node.value
+            else:
+                index -= left_size + 1
+                node = node.right
+        return None
+
+    def rank(self, key: Any) -> int:
+        """Counts the keys strictly smaller than the given key, in O(log n).
 
-    def get_all(self) -> list:
-        """Returns all values in the AVL Tree in sorted order.
+        Args:
+            key (Any): Key to rank; it does not need to be in the tree.
 
         Returns:
-            list: List of all node values in in-order traversal.
+            int: Position the key has, or would have, in key order.
         """
-        result = []
-        self._inorder(self.root, result)
+        result = 0
+        visited = 0
+        node = self.root
+        while node:
+            visited += 1
+            if key <= node.key:
+                node = node.left
+            else:
+                result += (node.left.size if node.left else 0) + 1
+                node = node.right
+        self.nodes_visited += visited
         return result
 
-    def search_partial(self, substring: str) -> list:
-        """Finds all nodes whose key contains the given substring (case-insensitive).
+    def iter_range(self, lo: Any = None, hi: Any = None) -> Iterator[Tuple[Any, dict]]:
+        """Iterates in key order over the nodes with lo <= key < hi.
+
+        Subtrees entirely below lo are never visited and the iteration stops
+        at the first key not below hi, so fetching k items costs
+        O(log n + k).
 
         Args:
-            substring (str): Substring to search for in the keys.
+            lo (Any): Inclusive lower bound, or None for no lower bound.
+            hi (Any): Exclusive upper bound, or None for no upper bound.
 
-        Returns:
-            list: List of values whose keys contain the substring.
+        Yields:
+            Tuple[Any, dict]: Key and value of each node in range.
         """
-        results = []
-        substring = substring.lower()
-
-        def _in_order_search(node: Optional[AVLNode]) -> None:
-            if not node:
-                return
-            _in_order_search(node.left)
-            if substring in node.key:
-                results.append(node.value)
-            _in_order_search(node.right)
-
-        _in_order_search(self.root)
-        return results
+        stack = []
+        visited = 0
+        node = self.root
+        try:
+            while stack or node:
+                while node:
+                    visited += 1
+                    if lo is not None and node.key < lo:
+                        node = node.right
+                    else:
+                        stack.append(node)
+                        node = node.left
+                if not stack:
+                    return
+                node = stack.pop()
+                if hi is not None and node.key >= hi:
+                    return
+                yield node.key, node.value
+                node = node.right
+        finally:
+            self.nodes_visited += visited
@@ -0,0 +1,505 @@
+"""In-memory B+ tree engine for the ordered indexes.
+
+This module is part of the MP3AVLtree project. It provides BTree, an
+OrderedMap whose nodes hold up to ``order`` keys in Python lists. A lookup
+in a million-key tree crosses four nodes instead of the twenty or so of a
+binary tree, and each node is searched with bisect, so most of the work
+runs in C over contiguous arrays rather than chasing node pointers. Values
+live in the leaves, which are linked left to right for range scans, and
+internal nodes record the size of each child subtree for select and rank.
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple, Union
+from backend.services.ordered_map import OrderedMap  # pylint: disable=import-error
+from backend.tracing import traced  # pylint: disable=import-error
+
+DEFAULT_ORDER = 64
+
+
+class BTreeLeaf:
+    """Leaf of a BTree.
+
+    Attributes:
+        keys (List[Any]): Sorted keys.
+        values (List[Any]): Values, aligned with keys.
+        next (Optional[BTreeLeaf]): Leaf holding the following keys.
+    """
+
+    __slots__ = ("keys", "values", "next")
+    is_leaf = True
+
+    def __init__(self, keys: List[Any], values: List[Any]):
+        """Initializes a leaf.
+
+        Args:
+            keys (List[Any]): Sorted keys.
+            values (List[Any]): Values, aligned with keys.
+        """
+        self.keys = keys
+        self.values = values
+        self.next: Optional[BTreeLeaf] = None
+
+
+class BTreeInternal:
+    """Internal node of a BTree.
+
+    Child ``i + 1`` holds the keys greater than or equal to ``keys[i]``, and
+    child ``i`` the keys below it.
+
+    Attributes:
+        keys (List[Any]): Separator keys, one fewer than children.
+        children (List[Union[BTreeInternal, BTreeLeaf]]): Child nodes.
+        counts (List[int]): Number of keys under each child.
+    """
+
+    __slots__ = ("keys", "children", "counts")
+    is_leaf = False
+
+    def __init__(self, keys: List[Any], children: List["BTreeNode"], counts: List[int]):
+        """Initializes an internal node.
+
+        Args:
+            keys (List[Any]): Separator keys.
+            children (List[BTreeNode]): Child nodes.
+            counts (List[int]): Number of keys under each child.
+        """
+        self.keys = keys
+        self.children = children
+        self.counts = counts
+
+
+BTreeNode = Union[BTreeInternal, BTreeLeaf]
+
+
+def _node_size(node: BTreeNode) -> int:
+    """Returns the number of keys under a node.
+
+    Args:
+        node (BTreeNode): Leaf or internal node.
+
+    Returns:
+        int: Keys stored in the subtree.
+    """
+    return len(node.keys) if node.is_leaf else sum(node.counts)
+
+
+def _even_chunks(total: int, capacity: int) -> List[int]:
+    """Splits a number of entries into the fewest nearly equal chunks.
+
+    Args:
+        total (int): Number of entries, at least 1.
+        capacity (int): Maximum entries per chunk.
+
+    Returns:
+        List[int]: Chunk sizes, differing by at most one.
+    """
+    chunks = -(-total // capacity)
+    base, extra = divmod(total, chunks)
+    return [base + 1] * extra + [base] * (chunks - extra)
+
+
+class BTree(OrderedMap):
+    """B+ tree implementation of OrderedMap.
+
+    Leaves hold between order // 2 and order keys and internal nodes between
+    (order + 1) // 2 and order children, except for the root. Overfull
+    nodes are split in two; underfull ones borrow from a sibling or are
+    merged with it. Splits, merges and borrows are counted as rotations.
+
+    Attributes:
+        order (int): Maximum number of keys per leaf and children per
+            internal node.
+        root (BTreeNode): Root node; an empty leaf when the tree is empty.
+    """
+
+    def __init__(
+        self,
+        ngram_index: bool = False,
+        ngram_size: int = 3,
+        measure: Optional[Callable[[Any], Tuple[int, int]]] = None,
+        order: int = DEFAULT_ORDER,
+    ):
+        """Initializes an empty tree.
+
+        Args:
+            ngram_index (bool): See OrderedMap.
+            ngram_size (int): See OrderedMap.
+            measure (Optional[Callable[[Any], Tuple[int, int]]]): See
+                OrderedMap.
+            order (int): Node capacity, at least 3.
+
+        Raises:
+            ValueError: If order is below 3.
+        """
+        if order < 3:
+            raise ValueError("The order of a B-tree must be at least 3.")
+        super().__init__(ngram_index=ngram_index, ngram_size=ngram_size, measure=measure)
+        self.order = order
+        self.root: BTreeNode = BTreeLeaf([], [])
+        self._size = 0
+
+    def _descend(self, key: Any) -> Tuple[BTreeLeaf, List[Tuple[BTreeInternal, int]]]:
+        """Walks from the root to the leaf where a key belongs.
+
+        Args:
+            key (Any): Key to locate.
+
+        Returns:
+            Tuple[BTreeLeaf, List[Tuple[BTreeInternal, int]]]: The leaf, and
+            each internal node on the way with the index of the child taken.
+        """
+        path = []
+        node = self.root
+        while not node.is_leaf:
+            index = bisect_right(node.keys, key)
+            path.append((node, index))
+            node = node.children[index]
+        self.nodes_visited += len(path) + 1
+        return node, path
+
+    @traced()
+    def insert(self, key: Any, value: Any) -> None:
+        """Inserts a key-value pair, splitting nodes that overflow.
+
+        Args:
+            key (Any): Key to insert.
+            value (Any): Value associated with the key.
+
+        Raises:
+            ValueError: If a duplicate key is inserted.
+        """
+        leaf, path = self._descend(key)
+        index = bisect_left(leaf.keys, key)
+        if index < len(leaf.keys) and leaf.keys[index] == key:
+            raise ValueError("Duplicate keys are not allowed in B-Tree.")
+        leaf.keys.insert(index, key)
+        leaf.values.insert(index, value)
+        for parent, child in path:
+            parent.counts[child] += 1
+        self._size += 1
+        if len(leaf.keys) > self.order:
+            self._split(leaf, path)
+
+        if self.ngram_index is not None:
+            self.ngram_index.add(key)
+
+    def _split(self, node: BTreeNode, path: List[Tuple[BTreeInternal, int]]) -> None:
+        """Splits an overfull node and, in turn, any ancestor that overflows.
+
+        Args:
+            node (BTreeNode): Node holding order + 1 keys or children.
+            path (List[Tuple[BTreeInternal, int]]): Ancestors of node, as
+                returned by _descend.
+        """
+        while True:
+            self.rotations += 1
+            if node.is_leaf:
+                middle = len(node.keys) // 2
+                sibling = BTreeLeaf(node.keys[middle:], node.values[middle:])
+                del node.keys[middle:], node.values[middle:]
+                sibling.next = node.next
+                node.next = sibling
+                separator = sibling.keys[0]
+            else:
+                middle = len(node.keys) // 2
+                separator = node.keys[middle]
+                sibling = BTreeInternal(
+                    node.keys[middle + 1:], node.children[middle + 1:], node.counts[middle + 1:]
+                )
+                del node.keys[middle:], node.children[middle + 1:], node.counts[middle + 1:]
+
+            if not path:
+                self.root = BTreeInternal(
+                    [separator], [node, sibling], [_node_size(node), _node_size(sibling)]
+                )
+                return
+            parent, child = path.pop()
+            parent.keys.insert(child, separator)
+            parent.children.insert(child + 1, sibling)
+            parent.counts[child] = _node_size(node)
+            parent.counts.insert(child + 1, _node_size(sibling))
+            if len(parent.children) <= self.order:
+                return
+            node = parent
+
+    @traced()
+    def bulk_load(self, items: Iterable[Tuple[Any, Any]]) -> None:
+        """Replaces the contents of the tree with the given key-value pairs.
+
+        Leaves are packed as full as the order allows, with the entries
+        spread evenly so that every node meets its minimum, and the internal
+        levels are built over them bottom-up.
+
+        Args:
+            items (Iterable[Tuple[Any, Any]]): Key-value pairs in any order.
+
+        Raises:
+            ValueError: If two pairs share the same key.
+        """
+        items = self._sorted_items(items)
+        self._size = len(items)
+        if not items:
+            self.root = BTreeLeaf([], [])
+            return
+
+        level: List[BTreeNode] = []
+        first_keys = []
+        sizes = []
+        start = 0
+        previous = None
+        for chunk in _even_chunks(len(items), self.order):
+            entries = items[start:start + chunk]
+            leaf = BTreeLeaf([key for key, _ in entries], [value for _, value in entries])
+            if previous is not None:
+                previous.next = leaf
+            previous = leaf
+            level.append(leaf)
+            first_keys.append(leaf.keys[0])
+            sizes.append(chunk)
+            start += chunk
+
+        while len(level) > 1:
+            parents: List[BTreeNode] = []
+            parent_keys = []
+            parent_sizes = []
+            start = 0
+            for chunk in _even_chunks(len(level), self.order):
+                end = start + chunk
+                parents.append(BTreeInternal(first_keys[start + 1:end], level[start:end], sizes[start:end]))
+                parent_keys.append(first_keys[start])
+                parent_sizes.append(sum(sizes[start:end]))
+                start = end
+            level, first_keys, sizes = parents, parent_keys, parent_sizes
+        self.root = level[0]
+
+    @traced()
+    def delete(self, key: Any) -> None:
+        """Deletes the entry with the specified key, if present.
+
+        Separators equal to the deleted key are left in place; they still
+        route every remaining key correctly.
+
+        Args:
+            key (Any): Key of the entry to delete.
+        """
+        leaf, path = self._descend(key)
+        index = bisect_left(leaf.keys, key)
+        if index == len(leaf.keys) or leaf.keys[index] != key:
+            return
+        del leaf.keys[index], leaf.values[index]
+        for parent, child in path:
+            parent.counts[child] -= 1
+        self._size -= 1
+        self._fill(leaf, path)
+
+        if self.ngram_index is not None:
+            self.ngram_index.remove(key)
+
+    def _fill(self, node: BTreeNode, path: List[Tuple[BTreeInternal, int]]) -> None:
+        """Fixes underfull nodes from a leaf upwards, then trims the root.
+
+        Args:
+            node (BTreeNode): Node that just lost a key or a child.
+            path (List[Tuple[BTreeInternal, int]]): Ancestors of node, as
+                returned by _descend.
+        """
+        min_keys = self.order // 2
+        min_children = (self.order + 1) // 2
+        while path:
+            if (len(node.keys) >= min_keys) if node.is_leaf else (len(node.children) >= min_children):
+                break
+            parent, child = path.pop()
+            self.rotations += 1
+            left = parent.children[child - 1] if child > 0 else None
+            right = parent.children[child + 1] if child + 1 < len(parent.children) else None
+            if node.is_leaf:
+                if left is not None and len(left.keys) > min_keys:
+                    node.keys.insert(0, left.keys.pop())
+                    node.values.insert(0, left.values.pop())
+                    parent.keys[child - 1] = node.keys[0]
+                    parent.counts[child - 1] -= 1
+                    parent.counts[child] += 1
+                    break
+                if right is not None and len(right.keys) > min_keys:
+                    node.keys.append(right.keys.pop(0))
+                    node.values.append(right.values.pop(0))
+                    parent.keys[child] = right.keys[0]
+                    parent.counts[child + 1] -= 1
+                    parent.counts[child] += 1
+                    break
+            else:
+                if left is not None and len(left.children) > min_children:
+                    moved = left.counts.pop()
+                    node.keys.insert(0, parent.keys[child - 1])
+                    parent.keys[child - 1] = left.keys.pop()
+                    node.children.insert(0, left.children.pop())
+                    node.counts.insert(0, moved)
+                    parent.counts[child - 1] -= moved
+                    parent.counts[child] += moved
+                    break
+                if right is not None and len(right.children) > min_children:
+                    moved = right.counts.pop(0)
+                    node.keys.append(parent.keys[child])
+                    parent.keys[child] = right.keys.pop(0)
+                    node.children.append(right.children.pop(0))
+                    node.counts.append(moved)
+                    parent.counts[child + 1] -= moved
+                    parent.counts[child] += moved
+                    break
+
+            merged = child - 1 if left is not None else child
+            first, second = parent.children[merged], parent.children[merged + 1]
+            if first.is_leaf:
+                first.keys.extend(second.keys)
+                first.values.extend(second.values)
+                first.next = second.next
+            else:
+                first.keys.append(parent.keys[merged])
+                first.keys.extend(second.keys)
+                first.children.extend(second.children)
+                first.counts.extend(second.counts)
+            del parent.keys[merged], parent.children[merged + 1]
+            parent.counts[merged] += parent.counts.pop(merged + 1)
+            node = parent
+
+        root = self.root
+        if not root.is_leaf and len(root.children) == 1:
+            self.root = root.children[0]
+
+    def search(self, key: Any) -> Optional[Any]:
+        """Searches for a key in the tree.
+
+        Args:
+            key (Any): Key to search for.
+
+        Returns:
+            Optional[Any]: Value associated with the key, or None if not found.
+        """
+        node = self.root
+        visited = 1
+        while not node.is_leaf:
+            node = node.children[bisect_right(node.keys, key)]
+            visited += 1
+        self.nodes_visited += visited
+        keys = node.keys
+        index = bisect_left(keys, key)
+        if index < len(keys) and keys[index] == key:
+            return node.values[index]
+        return None
+
+    def _height(self) -> int:
+        """Returns the number of levels of the tree.
+
+        Returns:
+            int: Levels from the root to the leaves, 0 when empty.
+        """
+        if not self._size:
+            return 0
+        levels = 1
+        node = self.root
+        while not node.is_leaf:
+            node = node.children[0]
+            levels += 1
+        return levels
+
+    def __len__(self) -> int:
+        """Returns the number of entries in the tree.
+
+        Returns:
+            int: Number of stored keys.
+        """
+        return self._size
+
+    def select(self, index: int) -> Optional[Tuple[Any, Any]]:
+        """Returns the entry with the given position in key order, in O(log n).
+
+        Args:
+            index (int): Zero-based position in key order.
+
+        Returns:
+            Optional[Tuple[Any, Any]]: Key and value at that position, or
+            None if the index is out of range.
+        """
+        if index < 0 or index >= self._size:
+            return None
+        node = self.root
+        visited = 1
+        while not node.is_leaf:
+            child = 0
+            for count in node.counts:
+                if index < count:
+                    break
+                index -= count
+                child += 1
+            node = node.children[child]
+            visited += 1
+        self.nodes_visited += visited
+        return node.keys[index], node.values[index]
+
+    def rank(self, key: Any) -> int:
+        """Counts the keys strictly smaller than the given key, in O(log n).
+
+        Args:
+            key (Any): Key to rank; it does not need to be in the tree.
+
+        Returns:
+            int: Position the key has, or would have, in key order.
+        """
+        result = 0
+        node = self.root
+        visited = 1
+        while not node.is_leaf:
+            child = bisect_right(node.keys, key)
+            result += sum(node.counts[:child])
+            node = node.children[child]
+            visited += 1
+        self.nodes_visited += visited
+        return result + bisect_left(node.keys, key)
+
+    def iter_range(self, lo: Any = None, hi: Any = None) -> Iterator[Tuple[Any, Any]]:
+        """Iterates in key order over the entries with lo <= key < hi.
+
+        The first leaf is found by one descent and the scan then follows
+        the leaf links, so fetching k items costs O(log n + k).
+
+        Args:
+            lo (Any): Inclusive lower bound, or None for no lower bound.
+            hi (Any): Exclusive upper bound, or None for no upper bound.
+
+        Yields:
+            Tuple[Any, Any]: Key and value of each entry in range.
+        """
+        node = self.root
+        visited = 1
+        while not node.is_leaf:
+            node = node.children[0 if lo is None else bisect_right(node.keys, lo)]
+            visited += 1
+        index = 0 if lo is None else bisect_left(node.keys, lo)
+        try:
+            while node is not None:
+                keys = node.keys
+                end = len(keys) if hi is None else bisect_left(keys, hi, index)
+                yield from zip(keys[index:end], node.values[index:end])
+                if end < len(keys):
+                    return
+                node = node.next
+                index = 0
+                visited += 1
+        finally:
+            self.nodes_visited += visited
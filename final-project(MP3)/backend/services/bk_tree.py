@@ -0,0 +1,205 @@
+"""BK-tree for typo-tolerant lookups by edit distance.
+
+This module is part of the MP3AVLtree project. It provides the BKTree class,
+which indexes strings by Levenshtein distance. Each child edge is labeled
+with the distance between the child and its parent, and the triangle
+inequality lets a query within distance k skip every child whose label is
+more than k away from the query's distance to the parent, so only a small
+part of the tree is compared for small k.
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+def levenshtein(a: str, b: str, max_distance: Optional[int] = None) -> int:
+    """Computes the edit distance between two strings.
+
+    Uses Myers' bit-parallel algorithm (in Hyyrö's formulation): each
+    column of the dynamic-programming table is kept as two bit vectors of
+    +1 and -1 vertical differences, so a character of ``a`` costs a
+    handful of integer operations instead of a loop over ``b``. The score
+    changes by at most one per column, so with ``max_distance`` the
+    computation stops as soon as the remaining characters can no longer
+    bring it back within that bound.
+
+    Args:
+        a (str): First string.
+        b (str): Second string.
+        max_distance (Optional[int]): Largest distance of interest; None
+            computes the exact distance however large.
+
+    Returns:
+        int: Minimum number of single-character insertions, deletions and
+        substitutions turning one string into the other, or
+        ``max_distance + 1`` if that number exceeds ``max_distance``.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is None:
+        max_distance = len(a)
+    elif len(a) - len(b) > max_distance:
+        return max_distance + 1
+    if not b:
+        return len(a)
+    masks: Dict[str, int] = {}
+    for i, char in enumerate(b):
+        masks[char] = masks.get(char, 0) | 1 << i
+    full = (1 << len(b)) - 1
+    last = 1 << (len(b) - 1)
+    plus, minus, score = full, 0, len(b)
+    remaining = len(a)
+    for char in a:
+        match = masks.get(char, 0)
+        vertical = match | minus
+        horizontal = (((match & plus) + plus) ^ plus) | match
+        horizontal_plus = minus | ~(horizontal | plus)
+        horizontal_minus = plus & horizontal
+        if horizontal_plus & last:
+            score += 1
+        elif horizontal_minus & last:
+            score -= 1
+        remaining -= 1
+        if score - remaining > max_distance:
+            return max_distance + 1
+        horizontal_plus = horizontal_plus << 1 | 1
+        horizontal_minus <<= 1
+        plus = (horizontal_minus | ~(vertical | horizontal_plus)) & full
+        minus = horizontal_plus & vertical
+    return score
+
+
+class BKNode:
+    """Node of a BK-tree.
+
+    Attributes:
+        word (str): Indexed string.
+        items (Set[Any]): Items stored under the string; empty once they are
+            all removed, as nodes are never unlinked.
+        children (Dict[int, BKNode]): Children by distance to this word.
+    """
+
+    __slots__ = ("word", "items", "children")
+
+    def __init__(self, word: str):
+        """Initializes a leaf node.
+
+        Args:
+            word (str): Indexed string.
+        """
+        self.word = word
+        self.items: Set[Any] = set()
+        self.children: Dict[int, 'BKNode'] = {}
+
+
+class BKTree:
+    """Index from strings to items, searchable by edit distance.
+
+    Several items may share a string. Removing an item leaves its node in
+    place as a routing node. Once such empty nodes outnumber the live ones
+    the tree reports itself stale, and the owner should build a fresh one
+    from the live items; removal never rebuilds, so it stays cheap for
+    callers that hold locks.
+    """
+
+    def __init__(self):
+        """Initializes an empty tree."""
+        self.root: Optional[BKNode] = None
+        self._nodes = 0
+        self._empty = 0
+
+    def add(self, word: str, item: Any) -> None:
+        """Stores an item under a string.
+
+        Args:
+            word (str): String to index.
+            item (Any): Item to return for matches of the string.
+        """
+        if self.root is None:
+            self.root = BKNode(word)
+            self._nodes = 1
+            self.root.items.add(item)
+            return
+        node = self.root
+        while True:
+            distance = levenshtein(word, node.word)
+            if distance == 0:
+                if not node.items:
+                    self._empty -= 1
+                node.items.add(item)
+                return
+            child = node.children.get(distance)
+            if child is None:
+                child = node.children[distance] = BKNode(word)
+                self._nodes += 1
+                child.items.add(item)
+                return
+            node = child
+
+    def remove(self, word: str, item: Any) -> None:
+        """Removes an item stored under a string, if present.
+
+        Args:
+            word (str): String the item was indexed under.
+            item (Any): Item to remove.
+        """
+        node = self.root
+        while node is not None:
+            distance = levenshtein(word, node.word)
+            if distance == 0:
+                if item in node.items:
+                    node.items.discard(item)
+                    if not node.items:
+                        self._empty += 1
+                return
+            node = node.children.get(distance)
+
+    @property
+    def stale(self) -> bool:
+        """Whether empty routing nodes outnumber the live ones.
+
+        Returns:
+            bool: True if the tree should be rebuilt from its live items.
+        """
+        return self._empty * 2 > self._nodes
+
+    def search(self, word: str, max_distance: int) -> List[Tuple[int, Any]]:
+        """Finds the items whose string is within an edit distance of a word.
+
+        The distance to a node only matters up to ``max_distance`` past its
+        farthest child edge: beyond that neither the node nor any of its
+        children can match. It is computed with that bound, so comparisons
+        with leaves (most of the tree) stop early.
+
+        Args:
+            word (str): Query string.
+            max_distance (int): Largest edit distance accepted.
+
+        Returns:
+            List[Tuple[int, Any]]: Distance and item of every match, unordered.
+        """
+        matches = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = levenshtein(word, node.word, max_distance + max(node.children, default=0))
+            if distance <= max_distance:
+                matches.extend((distance, item) for item in node.items)
+            for edge, child in node.children.items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        return matches
@@ -0,0 +1,73 @@
+"""Factory of the ordered-map engines behind the song indexes.
+
+This module is part of the MP3AVLtree project. SongService and
+SecondaryIndex depend only on the OrderedMap interface and obtain their maps
+from create_index, so the engine can be chosen per deployment to suit the
+workload: the AVL tree keeps the shortest paths and O(log n) aggregates,
+the red-black tree rebalances less on writes, the B-tree keeps keys in wide
+nodes with few pointer hops, and the skip list never restructures. The
+benchmarks.index_engines_bench module measures them side by side, and
+benchmarks.index_engines_check checks them against a reference model.
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+from backend.services.aggregate_tree import AggregateAVLTree  # pylint: disable=import-error
+from backend.services.avl_tree import AVLTree  # pylint: disable=import-error
+from backend.services.b_tree import BTree  # pylint: disable=import-error
+from backend.services.ordered_map import OrderedMap  # pylint: disable=import-error
+from backend.services.red_black_tree import RedBlackTree  # pylint: disable=import-error
+from backend.services.skip_list import SkipList  # pylint: disable=import-error
+
+ENGINES: Dict[str, Type[OrderedMap]] = {
+    "avl": AVLTree,
+    "red_black": RedBlackTree,
+    "btree": BTree,
+    "skip_list": SkipList,
+}
+DEFAULT_ENGINE = "avl"
+
+
+def create_index(
+    engine: str = DEFAULT_ENGINE,
+    measure: Optional[Callable[[Any], Tuple[int, int]]] = None,
+    ngram_index: bool = False,
+) -> OrderedMap:
+    """Creates an empty ordered map of the given engine.
+
+    With a measure, the AVL engine keeps subtree aggregates
+    (AggregateAVLTree) and answers aggregate() in O(log n); the other
+    engines measure every entry in range.
+
+    Args:
+        engine (str): One of the ENGINES names.
+        measure (Optional[Callable[[Any], Tuple[int, int]]]): Returns the
+            duration and year of the song a value refers to; enables
+            aggregate().
+        ngram_index (bool): Maintain an n-gram index for partial search.
+
+    Returns:
+        OrderedMap: The new, empty map.
+
+    Raises:
+        ValueError: If the engine is unknown.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown index engine '{engine}'; expected one of {', '.join(ENGINES)}.")
+    if engine == "avl" and measure is not None:
+        return AggregateAVLTree(measure, ngram_index=ngram_index)
+    return ENGINES[engine](ngram_index=ngram_index, measure=measure)
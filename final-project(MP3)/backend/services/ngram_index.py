@@ -0,0 +1,98 @@
+"""N-gram inverted index for substring search over string keys.
+
+This module is part of the MP3AVLtree project. It provides an NGramIndex
+class that maps every n-gram (by default, trigram) of a key to the set of
+keys containing it, so that substring queries only need to inspect the keys
+present in every posting list of the query's n-grams.
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typing import Dict, Optional, Set
+
+
+class NGramIndex:
+    """Inverted index from n-grams to the keys that contain them.
+
+    Attributes:
+        n (int): Length of the indexed n-grams.
+    """
+
+    def __init__(self, n: int = 3):
+        """Initializes an empty index.
+
+        Args:
+            n (int): Length of the indexed n-grams.
+        """
+        self.n = n
+        self._postings: Dict[str, Set[str]] = {}
+
+    def _grams(self, text: str) -> Set[str]:
+        """Returns the distinct n-grams of a string.
+
+        Args:
+            text (str): String to split.
+
+        Returns:
+            Set[str]: Every substring of length n.
+        """
+        return {text[i:i + self.n] for i in range(len(text) - self.n + 1)}
+
+    def add(self, key: str) -> None:
+        """Indexes a key under each of its n-grams.
+
+        Args:
+            key (str): Key to index.
+        """
+        for gram in self._grams(key):
+            self._postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key: str) -> None:
+        """Removes a key from every posting list it belongs to.
+
+        Args:
+            key (str): Key to remove.
+        """
+        for gram in self._grams(key):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(key)
+                if not posting:
+                    del self._postings[gram]
+
+    def candidates(self, substring: str) -> Optional[Set[str]]:
+        """Returns the keys that contain every n-gram of the substring.
+
+        The result is a superset of the keys containing the substring, so
+        callers still have to verify each candidate.
+
+        Args:
+            substring (str): Substring to look for.
+
+        Returns:
+            Optional[Set[str]]: Candidate keys, or None if the substring is
+            shorter than n and the index cannot narrow the search.
+        """
+        grams = self._grams(substring)
+        if not grams:
+            return None
+        postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            if not result:
+                break
+            result &= posting
+        return result
@@ -0,0 +1,313 @@
+"""Ordered key-value map interface shared by the index engines.
+
+This module is part of the MP3AVLtree project. It provides OrderedMap, the
+interface SongService and SecondaryIndex depend on instead of a concrete
+tree. An engine implements the primitive operations (insert, delete, exact
+search, bulk loading, ordered range iteration and the order statistics
+select and rank); the base class derives the rest from them: paging,
+prefix and partial search (optionally backed by an n-gram index), and
+range aggregates. Engines differ in constant factors, memory and how they
+react to a mix of reads and writes, not in what they can answer.
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+from backend.services.ngram_index import NGramIndex  # pylint: disable=import-error
+from backend.tracing import traced  # pylint: disable=import-error
+
+
+class OrderedMap:
+    """Ordered map from comparable keys to values, with order statistics.
+
+    Attributes:
+        ngram_index (Optional[NGramIndex]): Inverted index used by
+            search_partial, if enabled.
+        rotations (int): Rebalancing steps performed since the map was
+            created (rotations, or node splits, merges and borrows).
+        nodes_visited (int): Nodes examined by lookups and updates since the
+            map was created. Readers running concurrently may lose an
+            occasional update, which is acceptable for a monitoring counter.
+    """
+
+    def __init__(
+        self,
+        ngram_index: bool = False,
+        ngram_size: int = 3,
+        measure: Optional[Callable[[Any], Tuple[int, int]]] = None,
+    ):
+        """Initializes an empty map.
+
+        Args:
+            ngram_index (bool): Maintain an n-gram inverted index over the
+                keys to speed up partial search.
+            ngram_size (int): Length of the indexed n-grams.
+            measure (Optional[Callable[[Any], Tuple[int, int]]]): Returns the
+                duration and year of the song a value refers to; required by
+                aggregate().
+        """
+        self.ngram_index: Optional[NGramIndex] = NGramIndex(ngram_size) if ngram_index else None
+        self._measure = measure
+        self.rotations = 0
+        self.nodes_visited = 0
+
+    def insert(self, key: Any, value: Any) -> None:
+        """Inserts a key-value pair.
+
+        Args:
+            key (Any): Key to insert.
+            value (Any): Value associated with the key.
+
+        Raises:
+            ValueError: If the key is already present.
+        """
+        raise NotImplementedError
+
+    def delete(self, key: Any) -> None:
+        """Deletes a key; missing keys are ignored.
+
+        Args:
+            key (Any): Key to delete.
+        """
+        raise NotImplementedError
+
+    def search(self, key: Any) -> Optional[Any]:
+        """Looks up the value of a key.
+
+        Args:
+            key (Any): Key to search for.
+
+        Returns:
+            Optional[Any]: Value associated with the key, or None.
+        """
+        raise NotImplementedError
+
+    def bulk_load(self, items: Iterable[Tuple[Any, Any]]) -> None:
+        """Replaces the contents of the map with the given key-value pairs.
+
+        Args:
+            items (Iterable[Tuple[Any, Any]]): Key-value pairs in any order.
+
+        Raises:
+            ValueError: If two pairs share the same key.
+        """
+        raise NotImplementedError
+
+    def iter_range(self, lo: Any = None, hi: Any = None) -> Iterator[Tuple[Any, Any]]:
+        """Iterates in key order over the entries with lo <= key < hi.
+
+        Args:
+            lo (Any): Inclusive lower bound, or None for no lower bound.
+            hi (Any): Exclusive upper bound, or None for no upper bound.
+
+        Yields:
+            Tuple[Any, Any]: Key and value of each entry in range.
+        """
+        raise NotImplementedError
+
+    def select(self, index: int) -> Optional[Tuple[Any, Any]]:
+        """Returns the entry with the given position in key order.
+
+        Args:
+            index (int): Zero-based position in key order.
+
+        Returns:
+            Optional[Tuple[Any, Any]]: Key and value at that position, or
+            None if the index is out of range.
+        """
+        raise NotImplementedError
+
+    def rank(self, key: Any) -> int:
+        """Counts the keys strictly smaller than the given key.
+
+        Args:
+            key (Any): Key to rank; it does not need to be present.
+
+        Returns:
+            int: Position the key has, or would have, in key order.
+        """
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        """Returns the number of entries.
+
+        Returns:
+            int: Number of stored keys.
+        """
+        raise NotImplementedError
+
+    def _height(self) -> int:
+        """Returns the engine's measure of its depth, reported by stats().
+
+        Returns:
+            int: Height, number of levels, or black height.
+        """
+        raise NotImplementedError
+
+    def _sorted_items(self, items: Iterable[Tuple[Any, Any]]) -> List[Tuple[Any, Any]]:
+        """Sorts key-value pairs for bulk loading and rebuilds the n-gram index.
+
+        Args:
+            items (Iterable[Tuple[Any, Any]]): Key-value pairs in any order.
+
+        Returns:
+            List[Tuple[Any, Any]]: The pairs sorted by key.
+
+        Raises:
+            ValueError: If two pairs share the same key.
+        """
+        items = sorted(items, key=lambda item: item[0])
+        for previous, current in zip(items, items[1:]):
+            if previous[0] == current[0]:
+                raise ValueError("Duplicate keys are not allowed in an ordered map.")
+        if self.ngram_index is not None:
+            self.ngram_index = NGramIndex(self.ngram_index.n)
+            for key, _ in items:
+                self.ngram_index.add(key)
+        return items
+
+    def stats(self) -> dict:
+        """Reports the shape of the map and its operation counters.
+
+        Returns:
+            dict: ``size``, ``height``, ``rotations`` and ``nodes_visited``.
+        """
+        return {
+            "size": len(self),
+            "height": self._height(),
+            "rotations": self.rotations,
+            "nodes_visited": self.nodes_visited,
+        }
+
+    @traced()
+    def get_all(self) -> list:
+        """Returns all values in key order.
+
+        Returns:
+            list: Every value.
+        """
+        return [value for _, value in self.iter_range()]
+
+    @traced()
+    def get_page(self, offset: int, limit: int) -> list:
+        """Returns a slice of the values in key order without walking the prefix.
+
+        The first entry is located with select() and the page is then read
+        with a bounded range scan, for O(log n + limit) total.
+
+        Args:
+            offset (int): Number of values to skip.
+            limit (int): Maximum number of values to return.
+
+        Returns:
+            list: Values at positions offset to offset + limit - 1.
+        """
+        first = self.select(offset)
+        if first is None:
+            return []
+        return [value for _, value in islice(self.iter_range(lo=first[0]), limit)]
+
+    @traced()
+    def search_prefix(self, prefix: str, limit: Optional[int] = None) -> list:
+        """Finds the values whose key starts with the given prefix, in key order.
+
+        Args:
+            prefix (str): Prefix to match (case-insensitive).
+            limit (Optional[int]): Maximum number of values to return.
+
+        Returns:
+            list: Values whose keys start with the prefix.
+        """
+        prefix = prefix.lower()
+        results = []
+        for key, value in islice(self.iter_range(lo=prefix), limit):
+            if not key.startswith(prefix):
+                break
+            results.append(value)
+        return results
+
+    def iter_partial(self, substring: str) -> Iterator[Tuple[Any, Any]]:
+        """Iterates in key order over the entries whose key contains a substring.
+
+        When the n-gram index is enabled and the substring is at least one
+        n-gram long, only the keys sharing all of its n-grams are checked.
+
+        Args:
+            substring (str): Substring to search for in the keys (case-insensitive).
+
+        Yields:
+            Tuple[Any, Any]: Key and value of each matching entry.
+        """
+        substring = substring.lower()
+        candidates = self.ngram_index.candidates(substring) if self.ngram_index is not None else None
+        if candidates is not None:
+            for key in sorted(candidates):
+                if substring in key:
+                    yield key, self.search(key)
+            return
+
+        for key, value in self.iter_range():
+            if substring in key:
+                yield key, value
+
+    @traced()
+    def search_partial(self, substring: str) -> list:
+        """Finds all entries whose key contains the given substring (case-insensitive).
+
+        Args:
+            substring (str): Substring to search for in the keys.
+
+        Returns:
+            list: List of values whose keys contain the substring.
+        """
+        return [value for _, value in self.iter_partial(substring)]
+
+    def aggregate(self, lo: Any = None, hi: Any = None) -> dict:
+        """Computes statistics over the keys with lo <= key < hi.
+
+        This generic version measures every entry in range, in O(log n + k);
+        engines that keep subtree aggregates answer in O(log n).
+
+        Args:
+            lo (Any): Inclusive lower bound, or None for no lower bound.
+            hi (Any): Exclusive upper bound, or None for no upper bound.
+
+        Returns:
+            dict: ``count``, ``total_duration``, ``average_duration``,
+            ``min_year`` and ``max_year``; the last three are None for an
+            empty range.
+
+        Raises:
+            ValueError: If the map was created without a measure.
+        """
+        if self._measure is None:
+            raise ValueError("This map was created without a measure and cannot aggregate.")
+        count = total = 0
+        low = high = None
+        for _, value in self.iter_range(lo, hi):
+            duration, year = self._measure(value)
+            count += 1
+            total += duration
+            low = year if low is None or year < low else low
+            high = year if high is None or year > high else high
+        return {
+            "count": count,
+            "total_duration": total,
+            "average_duration": total / count if count else None,
+            "min_year": low,
+            "max_year": high,
+        }
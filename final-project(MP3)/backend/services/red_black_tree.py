@@ -0,0 +1,527 @@
+"""Red-black tree engine for the ordered indexes.
+
+This module is part of the MP3AVLtree project. It provides RedBlackTree, an
+OrderedMap kept balanced by node colours instead of heights, following the
+algorithms in the course notes (notes/Period-2/rojonegro.pdf). Red-black
+trees are less strictly balanced than AVL trees, so lookups may visit a few
+more nodes, but an insertion needs at most two rotations and a deletion at
+most three, which favours write-heavy workloads. Nodes keep parent pointers
+and subtree sizes, the latter for select and rank.
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+from backend.services.ordered_map import OrderedMap  # pylint: disable=import-error
+from backend.tracing import traced  # pylint: disable=import-error
+
+
+class RBNode:
+    """Node for RedBlackTree.
+
+    Attributes:
+        key (Any): Key used for comparison.
+        value (Any): Associated value stored in the node.
+        left (RBNode): Left child, or the tree's NIL sentinel.
+        right (RBNode): Right child, or the tree's NIL sentinel.
+        parent (RBNode): Parent node, or the NIL sentinel for the root.
+        red (bool): True for red nodes, False for black ones.
+        size (int): Number of nodes in the subtree rooted at this node.
+    """
+
+    __slots__ = ("key", "value", "left", "right", "parent", "red", "size")
+
+    def __init__(self, key: Any, value: Any, nil: "RBNode", red: bool = True):
+        """Initializes a node with no children.
+
+        Args:
+            key (Any): Key of the node.
+            value (Any): Value associated with the node.
+            nil (RBNode): NIL sentinel the links point to.
+            red (bool): Initial colour.
+        """
+        self.key = key
+        self.value = value
+        self.left = nil
+        self.right = nil
+        self.parent = nil
+        self.red = red
+        self.size = 1
+
+
+class RedBlackTree(OrderedMap):
+    """Red-black tree implementation of OrderedMap.
+
+    Missing children and the root's parent are a shared black NIL sentinel
+    of size 0, which removes the None checks from the fix-up loops.
+
+    Attributes:
+        nil (RBNode): NIL sentinel.
+        root (RBNode): Root node, or nil when the tree is empty.
+    """
+
+    def __init__(
+        self,
+        ngram_index: bool = False,
+        ngram_size: int = 3,
+        measure: Optional[Callable[[Any], Tuple[int, int]]] = None,
+    ):
+        """Initializes an empty tree; see OrderedMap."""
+        super().__init__(ngram_index=ngram_index, ngram_size=ngram_size, measure=measure)
+        nil = RBNode.__new__(RBNode)
+        nil.key = nil.value = None
+        nil.left = nil.right = nil.parent = nil
+        nil.red = False
+        nil.size = 0
+        self.nil = nil
+        self.root = nil
+
+    def _rotate_left(self, x: RBNode) -> None:
+        """Rotates x down to the left, making its right child its parent.
+
+        Args:
+            x (RBNode): Node to rotate; its right child must not be nil.
+        """
+        y = x.right
+        x.right = y.left
+        if y.left is not self.nil:
+            y.left.parent = x
+        y.parent = x.parent
+        if x.parent is self.nil:
+            self.root = y
+        elif x is x.parent.left:
+            x.parent.left = y
+        else:
+            x.parent.right = y
+        y.left = x
+        x.parent = y
+        y.size = x.size
+        x.size = x.left.size + x.right.size + 1
+        self.rotations += 1
+
+    def _rotate_right(self, y: RBNode) -> None:
+        """Rotates y down to the right, making its left child its parent.
+
+        Args:
+            y (RBNode): Node to rotate; its left child must not be nil.
+        """
+        x = y.left
+        y.left = x.right
+        if x.right is not self.nil:
+            x.right.parent = y
+        x.parent = y.parent
+        if y.parent is self.nil:
+            self.root = x
+        elif y is y.parent.right:
+            y.parent.right = x
+        else:
+            y.parent.left = x
+        x.right = y
+        y.parent = x
+        x.size = y.size
+        y.size = y.left.size + y.right.size + 1
+        self.rotations += 1
+
+    def _find(self, key: Any) -> RBNode:
+        """Locates the node holding a key.
+
+        Args:
+            key (Any): Key to look for.
+
+        Returns:
+            RBNode: The node, or nil if the key is not in the tree.
+        """
+        nil = self.nil
+        visited = 0
+        node = self.root
+        while node is not nil:
+            visited += 1
+            node_key = node.key
+            if key == node_key:
+                break
+            node = node.left if key < node_key else node.right
+        self.nodes_visited += visited
+        return node
+
+    @traced()
+    def insert(self, key: Any, value: Any) -> None:
+        """Inserts a key-value pair and restores the red-black properties.
+
+        Args:
+            key (Any): Key to insert.
+            value (Any): Value associated with the key.
+
+        Raises:
+            ValueError: If a duplicate key is inserted.
+        """
+        nil = self.nil
+        parent = nil
+        node = self.root
+        visited = 0
+        while node is not nil:
+            visited += 1
+            parent = node
+            if key < node.key:
+                node = node.left
+            elif key > node.key:
+                node = node.right
+            else:
+                self.nodes_visited += visited
+                raise ValueError("Duplicate keys are not allowed in Red-Black Tree.")
+        self.nodes_visited += visited
+
+        node = RBNode(key, value, nil)
+        node.parent = parent
+        if parent is nil:
+            self.root = node
+        elif key < parent.key:
+            parent.left = node
+        else:
+            parent.right = node
+        ancestor = parent
+        while ancestor is not nil:
+            ancestor.size += 1
+            ancestor = ancestor.parent
+        self._insert_fixup(node)
+
+        if self.ngram_index is not None:
+            self.ngram_index.add(key)
+
+    def _insert_fixup(self, node: RBNode) -> None:
+        """Removes a red-red violation left by an insertion.
+
+        Args:
+            node (RBNode): The inserted, red node.
+        """
+        while node.parent.red:
+            parent = node.parent
+            grandparent = parent.parent
+            if parent is grandparent.left:
+                uncle = grandparent.right
+                if uncle.red:
+                    parent.red = uncle.red = False
+                    grandparent.red = True
+                    node = grandparent
+                    continue
+                if node is parent.right:
+                    node = parent
+                    self._rotate_left(node)
+                    parent = node.parent
+                parent.red = False
+                grandparent.red = True
+                self._rotate_right(grandparent)
+            else:
+                uncle = grandparent.left
+                if uncle.red:
+                    parent.red = uncle.red = False
+                    grandparent.red = True
+                    node = grandparent
+                    continue
+                if node is parent.left:
+                    node = parent
+                    self._rotate_right(node)
+                    parent = node.parent
+                parent.red = False
+                grandparent.red = True
+                self._rotate_left(grandparent)
+        self.root.red = False
+
+    def _build_balanced(self, items: List[Tuple[Any, Any]], start: int, end: int, depth: int, red_depth: int) -> RBNode:
+        """Builds a balanced subtree from a sorted slice of items.
+
+        Every root-to-leaf path has the same number of black nodes as long
+        as only the nodes on the deepest level, red_depth, are red.
+
+        Args:
+            items (List[Tuple[Any, Any]]): Key-value pairs sorted by key.
+            start (int): First index of the slice (inclusive).
+            end (int): Last index of the slice (exclusive).
+            depth (int): Depth of the subtree's root.
+            red_depth (int): Depth of the deepest level.
+
+        Returns:
+            RBNode: Root of the built subtree, or nil for an empty slice.
+        """
+        if start >= end:
+            return self.nil
+        middle = (start + end) // 2
+        node = RBNode(*items[middle], self.nil, red=depth == red_depth)
+        node.left = self._build_balanced(items, start, middle, depth + 1, red_depth)
+        node.right = self._build_balanced(items, middle + 1, end, depth + 1, red_depth)
+        node.left.parent = node.right.parent = node
+        node.size = end - start
+        return node
+
+    @traced()
+    def bulk_load(self, items: Iterable[Tuple[Any, Any]]) -> None:
+        """Replaces the contents of the tree with the given key-value pairs.
+
+        The tree is built bottom-up from the sorted pairs with the deepest
+        level coloured red, so no fix-ups or rotations are needed.
+
+        Args:
+            items (Iterable[Tuple[Any, Any]]): Key-value pairs in any order.
+
+        Raises:
+            ValueError: If two pairs share the same key.
+        """
+        items = self._sorted_items(items)
+        red_depth = len(items).bit_length() - 1
+        self.root = self._build_balanced(items, 0, len(items), 0, red_depth)
+        self.root.parent = self.nil
+        self.root.red = False
+        self.nil.parent = self.nil
+
+    def _transplant(self, old: RBNode, new: RBNode) -> None:
+        """Replaces the subtree rooted at old with the one rooted at new.
+
+        Args:
+            old (RBNode): Subtree to replace.
+            new (RBNode): Replacement, possibly nil.
+        """
+        if old.parent is self.nil:
+            self.root = new
+        elif old is old.parent.left:
+            old.parent.left = new
+        else:
+            old.parent.right = new
+        new.parent = old.parent
+
+    @traced()
+    def delete(self, key: Any) -> None:
+        """Deletes the node with the specified key, if present.
+
+        A node with two children is replaced by its in-order successor.
+
+        Args:
+            key (Any): Key of the node to delete.
+        """
+        nil = self.nil
+        node = self._find(key)
+        if node is nil:
+            return
+
+        removed = node
+        if node.left is not nil and node.right is not nil:
+            removed = node.right
+            while removed.left is not nil:
+                removed = removed.left
+        ancestor = removed.parent
+        while ancestor is not nil:
+            ancestor.size -= 1
+            ancestor = ancestor.parent
+
+        removed_red = removed.red
+        if node.left is nil:
+            child = node.right
+            self._transplant(node, child)
+        elif node.right is nil:
+            child = node.left
+            self._transplant(node, child)
+        else:
+            child = removed.right
+            if removed.parent is node:
+                child.parent = removed
+            else:
+                self._transplant(removed, removed.right)
+                removed.right = node.right
+                removed.right.parent = removed
+            self._transplant(node, removed)
+            removed.left = node.left
+            removed.left.parent = removed
+            removed.red = node.red
+            removed.size = node.size
+        if not removed_red:
+            self._delete_fixup(child)
+
+        if self.ngram_index is not None:
+            self.ngram_index.remove(key)
+
+    def _delete_fixup(self, node: RBNode) -> None:
+        """Restores the black height after a black node was removed.
+
+        Args:
+            node (RBNode): Node that took the removed node's place, which
+                carries an extra black.
+        """
+        while node is not self.root and not node.red:
+            parent = node.parent
+            if node is parent.left:
+                sibling = parent.right
+                if sibling.red:
+                    sibling.red = False
+                    parent.red = True
+                    self._rotate_left(parent)
+                    sibling = parent.right
+                if not sibling.left.red and not sibling.right.red:
+                    sibling.red = True
+                    node = parent
+                    continue
+                if not sibling.right.red:
+                    sibling.left.red = False
+                    sibling.red = True
+                    self._rotate_right(sibling)
+                    sibling = parent.right
+                sibling.red = parent.red
+                parent.red = False
+                sibling.right.red = False
+                self._rotate_left(parent)
+            else:
+                sibling = parent.left
+                if sibling.red:
+                    sibling.red = False
+                    parent.red = True
+                    self._rotate_right(parent)
+                    sibling = parent.left
+                if not sibling.left.red and not sibling.right.red:
+                    sibling.red = True
+                    node = parent
+                    continue
+                if not sibling.left.red:
+                    sibling.right.red = False
+                    sibling.red = True
+                    self._rotate_left(sibling)
+                    sibling = parent.left
+                sibling.red = parent.red
+                parent.red = False
+                sibling.left.red = False
+                self._rotate_right(parent)
+            node = self.root
+        node.red = False
+
+    def search(self, key: Any) -> Optional[Any]:
+        """Searches for a key in the tree.
+
+        Args:
+            key (Any): Key to search for.
+
+        Returns:
+            Optional[Any]: Value associated with the key, or None if not found.
+        """
+        node = self._find(key)
+        return None if node is self.nil else node.value
+
+    def _height(self) -> int:
+        """Returns the black height of the tree, read along the leftmost path.
+
+        Returns:
+            int: Number of black nodes on any root-to-leaf path.
+        """
+        height = 0
+        node = self.root
+        while node is not self.nil:
+            height += not node.red
+            node = node.left
+        return height
+
+    def __len__(self) -> int:
+        """Returns the number of nodes in the tree.
+
+        Returns:
+            int: Number of stored keys.
+        """
+        return self.root.size
+
+    def select(self, index: int) -> Optional[Tuple[Any, Any]]:
+        """Returns the node with the given position in key order, in O(log n).
+
+        Args:
+            index (int): Zero-based position in key order.
+
+        Returns:
+            Optional[Tuple[Any, Any]]: Key and value at that position, or
+            None if the index is out of range.
+        """
+        node = self.root
+        if index < 0 or index >= node.size:
+            return None
+        while True:
+            self.nodes_visited += 1
+            left_size = node.left.size
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node.key, node.value
+            else:
+                index -= left_size + 1
+                node = node.right
+
+    def rank(self, key: Any) -> int:
+        """Counts the keys strictly smaller than the given key, in O(log n).
+
+        Args:
+            key (Any): Key to rank; it does not need to be in the tree.
+
+        Returns:
+            int: Position the key has, or would have, in key order.
+        """
+        nil = self.nil
+        result = 0
+        visited = 0
+        node = self.root
+        while node is not nil:
+            visited += 1
+            if key <= node.key:
+                node = node.left
+            else:
+                result += node.left.size + 1
+                node = node.right
+        self.nodes_visited += visited
+        return result
+
+    def iter_range(self, lo: Any = None, hi: Any = None) -> Iterator[Tuple[Any, Any]]:
+        """Iterates in key order over the nodes with lo <= key < hi.
+
+        The first node in range is found by one descent and the following
+        ones by walking parent pointers, so fetching k items costs
+        O(log n + k).
+
+        Args:
+            lo (Any): Inclusive lower bound, or None for no lower bound.
+            hi (Any): Exclusive upper bound, or None for no upper bound.
+
+        Yields:
+            Tuple[Any, Any]: Key and value of each node in range.
+        """
+        nil = self.nil
+        visited = 0
+        start = nil
+        node = self.root
+        while node is not nil:
+            visited += 1
+            if lo is not None and node.key < lo:
+                node = node.right
+            else:
+                start = node
+                node = node.left
+        node = start
+        try:
+            while node is not nil:
+                if hi is not None and node.key >= hi:
+                    return
+                yield node.key, node.value
+                if node.right is not nil:
+                    node = node.right
+                    while node.left is not nil:
+                        visited += 1
+                        node = node.left
+                else:
+                    while node.parent is not nil and node is node.parent.right:
+                        node = node.parent
+                    node = node.parent
+                visited += 1
+        finally:
+            self.nodes_visited += visited
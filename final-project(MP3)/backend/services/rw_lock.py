@@ -0,0 +1,120 @@
+"""Sequence lock used to share the in-memory song indexes between threads.
+
+This module is part of the MP3AVLtree project. FastAPI runs the synchronous
+route handlers in a thread pool, so searches and mutations of the indexes
+can run at the same time. SeqLock serializes the writers but never makes a
+reader wait for one: a reader runs optimistically and checks afterwards,
+through a sequence number that writers bump before and after every change,
+whether a write overlapped it, in which case the read is simply run again.
+Writers, in turn, never wait for readers, so neither side can starve the
+other the way they did with a readers-writer lock, where a queued writer
+held up every new search and a steady stream of searches held up writes.
+Readers still compete with writers for the interpreter lock, which a writer
+gives up on every blocking call; the write path therefore batches its disk
+writes (see SongRepository.sync).
+
+Reads must not change shared state, since an attempt may be thrown away,
+and must tolerate seeing a half-finished write: any exception raised by an
+attempt that overlapped a write is discarded along with its result.
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, TypeVar
+
+MAX_OPTIMISTIC_ATTEMPTS = 4
+
+T = TypeVar("T")
+
+
+class SeqLock:
+    """Sequence lock with optimistic, lock-free readers.
+
+    Attributes:
+        retries (int): Read attempts discarded because a write overlapped.
+        fallbacks (int): Reads that ran out of attempts and were run while
+            holding off writers.
+    """
+
+    def __init__(self, max_attempts: int = MAX_OPTIMISTIC_ATTEMPTS):
+        """Initializes an unlocked lock.
+
+        Args:
+            max_attempts (int): Optimistic attempts a read makes before it
+                holds off writers to finish. Only reads that take longer
+                than the gap between writes ever get there.
+        """
+        self._mutex = threading.Lock()
+        self._sequence = 0
+        self.max_attempts = max_attempts
+        self.retries = 0
+        self.fallbacks = 0
+
+    def read(self, operation: Callable[[], T]) -> T:
+        """Runs a read-only operation on a state no write overlapped.
+
+        An attempt that starts while a write is applying its changes first
+        yields the processor until that write is done; it never waits for
+        writers that are merely queued or persisting.
+
+        Args:
+            operation (Callable[[], T]): Reads the shared state; may run
+                several times.
+
+        Returns:
+            T: Result of the first attempt no write overlapped.
+
+        Raises:
+            Exception: Whatever the operation raises without a write
+                overlapping it.
+        """
+        for _ in range(self.max_attempts):
+            start = self._sequence
+            while start & 1:
+                time.sleep(0)
+                start = self._sequence
+            try:
+                result = operation()
+            except Exception:  # pylint: disable=broad-except
+                if self._sequence == start:
+                    raise
+            else:
+                if self._sequence == start:
+                    return result
+            self.retries += 1
+        with self._mutex:
+            self.fallbacks += 1
+            return operation()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """Applies changes to the shared state, excluding other writers.
+
+        Keep the block short and in memory: readers that start meanwhile
+        wait for it to end.
+
+        Yields:
+            None
+        """
+        with self._mutex:
+            self._sequence += 1
+            try:
+                yield
+            finally:
+                self._sequence += 1
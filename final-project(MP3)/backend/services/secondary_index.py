@@ -0,0 +1,194 @@
+"""Secondary ordered indexes over song attributes.
+
+This module is part of the MP3AVLtree project. It provides the
+SecondaryIndex class, an ordered map (an AVL tree by default) keyed by
+(attribute value, primary key) that maps to catalog rows. Appending the
+primary key makes every index key unique even when thousands of songs share
+an artist or a year, and keeps the songs of one value in title order.
+Because every engine keeps subtree sizes, the number of songs in a value
+range is known in O(log n) before any of them is visited, which lets the
+query planner pick the most selective index.
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+from backend.services.index_engines import DEFAULT_ENGINE, create_index  # pylint: disable=import-error
+
+
+class SecondaryIndex:
+    """Ordered index from an attribute value to catalog rows.
+
+    Attributes:
+        field (str): Name of the indexed attribute.
+    """
+
+    def __init__(
+        self,
+        field: str,
+        value_of: Callable[[int], Any],
+        measure: Optional[Callable[[int], Tuple[int, int]]] = None,
+        engine: str = DEFAULT_ENGINE,
+    ):
+        """Initializes an empty index.
+
+        Args:
+            field (str): Name of the indexed attribute.
+            value_of (Callable[[int], Any]): Returns the normalized attribute
+                value of a catalog row.
+            measure (Optional[Callable[[int], Tuple[int, int]]]): Returns the
+                duration and year of a catalog row. When given, the index
+                supports aggregate(), from subtree aggregates on the AVL
+                engine.
+            engine (str): Ordered-map engine; see index_engines.create_index.
+        """
+        self.field = field
+        self._value_of = value_of
+        self._tree = create_index(engine, measure)
+
+    def value(self, row: int) -> Any:
+        """Returns the normalized attribute value of a catalog row.
+
+        Args:
+            row (int): Catalog row.
+
+        Returns:
+            Any: Value used as the first part of the index key.
+        """
+        return self._value_of(row)
+
+    def stats(self) -> dict:
+        """Reports the shape and operation counters of the index tree.
+
+        Returns:
+            dict: See OrderedMap.stats().
+        """
+        return self._tree.stats()
+
+    def add(self, row: int, primary_key: str) -> None:
+        """Indexes a catalog row.
+
+        Args:
+            row (int): Catalog row.
+            primary_key (str): Key of the row in the primary AVL tree.
+        """
+        self._tree.insert((self._value_of(row), primary_key), row)
+
+    def remove(self, row: int, primary_key: str) -> None:
+        """Removes a catalog row; must run before the row changes.
+
+        Args:
+            row (int): Catalog row.
+            primary_key (str): Key of the row in the primary AVL tree.
+        """
+        self._tree.delete((self._value_of(row), primary_key))
+
+    def bulk_load(self, rows: Iterable[Tuple[int, str]]) -> None:
+        """Replaces the contents of the index.
+
+        Rows given in primary key order only need a stable sort on the
+        attribute value, which compares plain values instead of tuples.
+
+        Args:
+            rows (Iterable[Tuple[int, str]]): Catalog rows with their primary
+                keys, preferably in primary key order.
+        """
+        keyed = [((self._value_of(row), key), row) for row, key in rows]
+        keyed.sort(key=lambda item: item[0][0])
+        self._tree.bulk_load(keyed)
+
+    def bounds(self, lo: Any, hi: Any) -> Tuple[Optional[tuple], Optional[tuple]]:
+        """Turns an inclusive value range into tree key bounds.
+
+        Args:
+            lo (Any): Smallest value, or None for no lower bound.
+            hi (Any): Largest value, or None for no upper bound.
+
+        Returns:
+            Tuple[Optional[tuple], Optional[tuple]]: Inclusive lower and
+            exclusive upper key bounds for OrderedMap.iter_range.
+        """
+        lower = (lo,) if lo is not None else None
+        if hi is None:
+            upper = None
+        elif isinstance(hi, str):
+            upper = (hi + "\0",)
+        else:
+            upper = (hi + 1,)
+        return lower, upper
+
+    def count(self, lo: Any, hi: Any) -> int:
+        """Counts the rows whose value is in [lo, hi], in O(log n).
+
+        Args:
+            lo (Any): Smallest value, or None.
+            hi (Any): Largest value, or None.
+
+        Returns:
+            int: Number of matching rows.
+        """
+        lower, upper = self.bounds(lo, hi)
+        end = self._tree.rank(upper) if upper is not None else len(self._tree)
+        start = self._tree.rank(lower) if lower is not None else 0
+        return max(end - start, 0)
+
+    def rows(self, lo: Any, hi: Any) -> Iterator[int]:
+        """Iterates over the rows whose value is in [lo, hi], in index order.
+
+        Args:
+            lo (Any): Smallest value, or None.
+            hi (Any): Largest value, or None.
+
+        Yields:
+            int: Catalog rows.
+        """
+        lower, upper = self.bounds(lo, hi)
+        for _, row in self._tree.iter_range(lower, upper):
+            yield row
+
+    def aggregate(self, value: Any, key_lo: Optional[str] = None, key_hi: Optional[str] = None) -> dict:
+        """Computes statistics over the rows with a given value.
+
+        Requires an index created with a measure. Takes O(log n) with the
+        AVL engine, which keeps subtree aggregates, and O(log n + k) for k
+        matching rows with the other engines.
+
+        Args:
+            value (Any): Attribute value.
+            key_lo (Optional[str]): Inclusive lower bound on the primary key.
+            key_hi (Optional[str]): Exclusive upper bound on the primary key.
+
+        Returns:
+            dict: See AggregateAVLTree.aggregate.
+        """
+        lower = (value, key_lo) if key_lo is not None else (value,)
+        upper = (value, key_hi) if key_hi is not None else self.bounds(None, value)[1]
+        return self._tree.aggregate(lower, upper)
+
+    def page(self, lo: Any, offset: int, limit: int) -> List[int]:
+        """Returns rows by position within the range starting at lo.
+
+        Args:
+            lo (Any): Smallest value, or None.
+            offset (int): Position of the first row, relative to lo.
+            limit (int): Maximum number of rows.
+
+        Returns:
+            List[int]: Catalog rows in index order.
+        """
+        lower, _ = self.bounds(lo, None)
+        start = self._tree.rank(lower) if lower is not None else 0
+        return self._tree.get_page(start + offset, limit)
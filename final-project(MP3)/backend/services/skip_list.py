@@ -0,0 +1,317 @@
+"""Skip list engine for the ordered indexes.
+
+This module is part of the MP3AVLtree project. It provides SkipList, an
+OrderedMap built from a sorted linked list with randomly promoted express
+lanes (Pugh's skip list). Inserting or deleting a key only relinks its own
+tower, with no rotations or node splits, and the expected cost of every
+operation is O(log n). Each forward link also records how many keys it
+skips, which makes the list indexable for select and rank.
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import random
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+from backend.services.ordered_map import OrderedMap  # pylint: disable=import-error
+from backend.tracing import traced  # pylint: disable=import-error
+
+MAX_LEVEL = 16
+PROMOTION_PROBABILITY = 0.25
+
+
+class SkipNode:
+    """Node for SkipList.
+
+    Attributes:
+        key (Any): Key used for comparison.
+        value (Any): Associated value stored in the node.
+        next (List[Optional[SkipNode]]): Following node on each level.
+        width (List[int]): Number of keys each link in next advances; only
+            meaningful for links that are not None.
+    """
+
+    __slots__ = ("key", "value", "next", "width")
+
+    def __init__(self, key: Any, value: Any, level: int):
+        """Initializes a node with a tower of the given height.
+
+        Args:
+            key (Any): Key of the node.
+            value (Any): Value associated with the node.
+            level (int): Number of levels the node takes part in.
+        """
+        self.key = key
+        self.value = value
+        self.next: List[Optional[SkipNode]] = [None] * level
+        self.width = [1] * level
+
+
+class SkipList(OrderedMap):
+    """Indexable skip list implementation of OrderedMap.
+
+    Attributes:
+        head (SkipNode): Sentinel before the first key, with a tower of
+            MAX_LEVEL levels.
+        level (int): Number of levels in use.
+    """
+
+    def __init__(
+        self,
+        ngram_index: bool = False,
+        ngram_size: int = 3,
+        measure: Optional[Callable[[Any], Tuple[int, int]]] = None,
+        seed: Optional[int] = None,
+    ):
+        """Initializes an empty list.
+
+        Args:
+            ngram_index (bool): See OrderedMap.
+            ngram_size (int): See OrderedMap.
+            measure (Optional[Callable[[Any], Tuple[int, int]]]): See
+                OrderedMap.
+            seed (Optional[int]): Seed of the tower heights, for
+                reproducible layouts.
+        """
+        super().__init__(ngram_index=ngram_index, ngram_size=ngram_size, measure=measure)
+        self.head = SkipNode(None, None, MAX_LEVEL)
+        self.level = 1
+        self._size = 0
+        self._random = random.Random(seed)
+
+    def _random_level(self) -> int:
+        """Draws the height of a new tower.
+
+        Returns:
+            int: Between 1 and MAX_LEVEL, geometrically distributed.
+        """
+        level = 1
+        draw = self._random.random
+        while level < MAX_LEVEL and draw() < PROMOTION_PROBABILITY:
+            level += 1
+        return level
+
+    def _predecessors(self, key: Any) -> Tuple[List[SkipNode], List[int]]:
+        """Finds, on each level, the last node whose key is below a key.
+
+        Args:
+            key (Any): Key to locate.
+
+        Returns:
+            Tuple[List[SkipNode], List[int]]: The node on each level in use,
+            and its position in key order (the head is 0, the first key 1).
+        """
+        update = [self.head] * MAX_LEVEL
+        positions = [0] * MAX_LEVEL
+        node = self.head
+        position = 0
+        visited = 0
+        for level in range(self.level - 1, -1, -1):
+            following = node.next[level]
+            while following is not None and following.key < key:
+                position += node.width[level]
+                node = following
+                following = node.next[level]
+                visited += 1
+            update[level] = node
+            positions[level] = position
+        self.nodes_visited += visited + 1
+        return update, positions
+
+    @traced()
+    def insert(self, key: Any, value: Any) -> None:
+        """Inserts a key-value pair with a tower of random height.
+
+        Args:
+            key (Any): Key to insert.
+            value (Any): Value associated with the key.
+
+        Raises:
+            ValueError: If a duplicate key is inserted.
+        """
+        update, positions = self._predecessors(key)
+        following = update[0].next[0]
+        if following is not None and following.key == key:
+            raise ValueError("Duplicate keys are not allowed in Skip List.")
+
+        height = self._random_level()
+        self.level = max(self.level, height)
+        node = SkipNode(key, value, height)
+        position = positions[0] + 1
+        for level in range(height):
+            previous = update[level]
+            node.next[level] = previous.next[level]
+            previous.next[level] = node
+            node.width[level] = previous.width[level] - (position - positions[level]) + 1
+            previous.width[level] = position - positions[level]
+        for level in range(height, self.level):
+            update[level].width[level] += 1
+        self._size += 1
+
+        if self.ngram_index is not None:
+            self.ngram_index.add(key)
+
+    @traced()
+    def bulk_load(self, items: Iterable[Tuple[Any, Any]]) -> None:
+        """Replaces the contents of the list with the given key-value pairs.
+
+        The sorted pairs are appended left to right, so every tower is
+        linked in O(1) without searching.
+
+        Args:
+            items (Iterable[Tuple[Any, Any]]): Key-value pairs in any order.
+
+        Raises:
+            ValueError: If two pairs share the same key.
+        """
+        items = self._sorted_items(items)
+        self.head = SkipNode(None, None, MAX_LEVEL)
+        self.level = 1
+        self._size = len(items)
+        last = [self.head] * MAX_LEVEL
+        positions = [0] * MAX_LEVEL
+        for position, (key, value) in enumerate(items, 1):
+            height = self._random_level()
+            node = SkipNode(key, value, height)
+            for level in range(height):
+                last[level].next[level] = node
+                last[level].width[level] = position - positions[level]
+                last[level] = node
+                positions[level] = position
+            self.level = max(self.level, height)
+
+    @traced()
+    def delete(self, key: Any) -> None:
+        """Deletes the entry with the specified key, if present.
+
+        Args:
+            key (Any): Key of the entry to delete.
+        """
+        update, _ = self._predecessors(key)
+        node = update[0].next[0]
+        if node is None or node.key != key:
+            return
+
+        for level in range(self.level):
+            previous = update[level]
+            if previous.next[level] is node:
+                previous.next[level] = node.next[level]
+                previous.width[level] += node.width[level] - 1
+            else:
+                previous.width[level] -= 1
+        while self.level > 1 and self.head.next[self.level - 1] is None:
+            self.level -= 1
+        self._size -= 1
+
+        if self.ngram_index is not None:
+            self.ngram_index.remove(key)
+
+    def search(self, key: Any) -> Optional[Any]:
+        """Searches for a key in the list.
+
+        Args:
+            key (Any): Key to search for.
+
+        Returns:
+            Optional[Any]: Value associated with the key, or None if not found.
+        """
+        node = self.head
+        visited = 1
+        for level in range(self.level - 1, -1, -1):
+            following = node.next[level]
+            while following is not None and following.key < key:
+                node = following
+                following = node.next[level]
+                visited += 1
+        self.nodes_visited += visited
+        node = node.next[0]
+        if node is not None and node.key == key:
+            return node.value
+        return None
+
+    def _height(self) -> int:
+        """Returns the number of levels in use.
+
+        Returns:
+            int: Height of the tallest tower, 1 for an empty list.
+        """
+        return self.level
+
+    def __len__(self) -> int:
+        """Returns the number of entries in the list.
+
+        Returns:
+            int: Number of stored keys.
+        """
+        return self._size
+
+    def select(self, index: int) -> Optional[Tuple[Any, Any]]:
+        """Returns the entry with the given position in key order, in O(log n).
+
+        Args:
+            index (int): Zero-based position in key order.
+
+        Returns:
+            Optional[Tuple[Any, Any]]: Key and value at that position, or
+            None if the index is out of range.
+        """
+        if index < 0 or index >= self._size:
+            return None
+        target = index + 1
+        node = self.head
+        position = 0
+        visited = 1
+        for level in range(self.level - 1, -1, -1):
+            while node.next[level] is not None and position + node.width[level] <= target:
+                position += node.width[level]
+                node = node.next[level]
+                visited += 1
+        self.nodes_visited += visited
+        return node.key, node.value
+
+    def rank(self, key: Any) -> int:
+        """Counts the keys strictly smaller than the given key, in O(log n).
+
+        Args:
+            key (Any): Key to rank; it does not need to be in the list.
+
+        Returns:
+            int: Position the key has, or would have, in key order.
+        """
+        _, positions = self._predecessors(key)
+        return positions[0]
+
+    def iter_range(self, lo: Any = None, hi: Any = None) -> Iterator[Tuple[Any, Any]]:
+        """Iterates in key order over the entries with lo <= key < hi.
+
+        Args:
+            lo (Any): Inclusive lower bound, or None for no lower bound.
+            hi (Any): Exclusive upper bound, or None for no upper bound.
+
+        Yields:
+            Tuple[Any, Any]: Key and value of each entry in range.
+        """
+        node = self.head if lo is None else self._predecessors(lo)[0][0]
+        node = node.next[0]
+        visited = 0
+        try:
+            while node is not None:
+                if hi is not None and node.key >= hi:
+                    return
+                visited += 1
+                yield node.key, node.value
+                node = node.next[0]
+        finally:
+            self.nodes_visited += visited
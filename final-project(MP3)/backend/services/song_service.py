@@ -20,19 +20,188 @@ You should have received a copy of the GNU General Public License along with
 MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
 """
 
-from typing import Optional, List
-from backend.services.avl_tree import AVLTree  # pylint: disable=import-error
+import gc
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, List, Tuple
+from backend.metrics import SEARCH_RESULTS  # pylint: disable=import-error
+from backend.services.bk_tree import BKTree  # pylint: disable=import-error
+from backend.services.index_engines import DEFAULT_ENGINE, create_index  # pylint: disable=import-error
+from backend.services.secondary_index import SecondaryIndex  # pylint: disable=import-error
+from backend.services.rw_lock import SeqLock  # pylint: disable=import-error
 from backend.repositories.song_repo import SongRepository, SongDAO  # pylint: disable=import-error
+from backend.tracing import traced  # pylint: disable=import-error
+
+QUERY_FIELDS = ("artist", "album", "year", "duration")
+SORT_FIELDS = ("title",) + QUERY_FIELDS
+
+
+class SongNotFoundError(ValueError):
+    """Raised when no song has the requested ID."""
+
+
+class SongConflictError(ValueError):
+    """Raised when a song would share its title, artist, and album with another song."""
 
 
 class SongService:
-    """Service layer for managing song operations using AVL Tree and JSON repository."""
+    """Service layer for managing song operations using AVL Tree and JSON repository.
+
+    Songs are stored once, in the repository's columnar SongCatalog; the AVL
+    tree maps each song key to its catalog row. SongDAO objects are only
+    built for the songs a call returns. Secondary indexes on artist, album,
+    year and duration serve filtered and sorted queries. A BK-tree over the
+    titles serves fuzzy search. The AVL tree is the default engine behind
+    the title tree and the secondary indexes; any other OrderedMap engine
+    can be selected instead (see index_engines). With the AVL engine the
+    title tree and the artist index keep subtree aggregates for catalog
+    statistics; the other engines compute them by measuring every song in
+    range.
+
+    The service is shared by the threads that serve requests. Reads take no
+    lock: they run optimistically under a SeqLock and are repeated if a
+    write changed the indexes meanwhile, so a search never waits for a
+    queued writer. Writers are serialized by a mutex and enter the SeqLock
+    only while they change the in-memory indexes; persistence happens
+    afterwards.
+
+    Every write bumps a catalog version, which identifies the catalog state
+    in ETags and keys the cached JSON payload of the full song list.
+
+    With a shared repository, several processes serve the same catalog.
+    Each write first replays the records other processes journaled, under
+    the repository's inter-process lock, and refresh() lets readers catch up
+    the same way when the journal changed.
+
+    Loading can be deferred and run in a background thread (start_loading);
+    callers must then check is_ready or wait_until_ready before using the
+    service, and can report progress through status.
+
+    The title BK-tree for fuzzy search is slow to build, so it is never
+    built while holding a lock: a builder copies the titles, builds the
+    tree on its own, then replays the changes writers logged meanwhile and
+    swaps it in. It is built in a background thread on the first fuzzy
+    search, which does not wait for it, and a tree left stale by deletions
+    or dropped by a bulk reload is rebuilt the same way.
+    """
+
+    def __init__(
+        self,
+        repo: Optional[SongRepository] = None,
+        autoload: bool = True,
+        engine: str = DEFAULT_ENGINE,
+    ):
+        """Initializes the song service, loading songs into the AVL tree.
+
+        Args:
+            repo (Optional[SongRepository]): Repository to use; defaults to
+                the bundled songs file.
+            autoload (bool): Load the catalog right away. When False, call
+                load() or start_loading() before using the service.
+            engine (str): Ordered-map engine of the title tree and the
+                secondary indexes; one of index_engines.ENGINES.
+
+        Raises:
+            ValueError: If the engine is unknown.
+        """
+        self._repo = repo if repo is not None else SongRepository()
+        self._catalog = None
+        self.engine = engine
+        self._tree = create_index(engine, self._measure, ngram_index=True)
+        self._indexes = {
+            "artist": SecondaryIndex(
+                "artist", lambda row: self._catalog.artist(row).lower(), self._measure, engine
+            ),
+            "album": SecondaryIndex("album", lambda row: self._catalog.album(row).lower(), engine=engine),
+            "year": SecondaryIndex("year", lambda row: self._catalog.year(row), engine=engine),
+            "duration": SecondaryIndex("duration", lambda row: self._catalog.duration(row), engine=engine),
+        }
+        self._fuzzy: Optional[BKTree] = None
+        self._fuzzy_log: Optional[List[Tuple[bool, str, str]]] = None
+        self._fuzzy_lock = threading.Lock()
+        self._lock = SeqLock()
+        self._write_mutex = threading.Lock()
+        self._epoch = uuid.uuid4().hex[:12]
+        self._version = 0
+        self._all_json: Optional[Tuple[int, bytes]] = None
+        self._ready = threading.Event()
+        self._status = {"state": "pending", "phase": None, "songs": 0, "error": None}
+        self._load_started: Optional[float] = None
+        self._load_finished: Optional[float] = None
+        if autoload:
+            self.load()
+
+    def load(self) -> None:
+        """Loads the catalog from the repository and builds the indexes.
+
+        Raises:
+            Exception: Whatever the repository raises; the status then
+                reports the failure.
+        """
+        self._load_started = time.monotonic()
+        self._status.update(state="loading", phase="reading catalog")
+        try:
+            catalog = self._repo.catalog
+            self._status.update(phase="building index", songs=len(catalog))
+            self._catalog = catalog
+            self._load_songs_to_tree()
+        except Exception as exc:
+            self._status.update(state="failed", phase=None, error=str(exc))
+            raise
+        finally:
+            self._load_finished = time.monotonic()
+        self._status.update(state="ready", phase=None)
+        self._ready.set()
+
+    def start_loading(self) -> threading.Thread:
+        """Loads the catalog in a background daemon thread.
+
+        Returns:
+            threading.Thread: The started loader thread.
+        """
+        thread = threading.Thread(target=self.load, name="catalog-loader", daemon=True)
+        thread.start()
+        return thread
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether the catalog is loaded and the service can be used.
+
+        Returns:
+            bool: True once loading has finished successfully.
+        """
+        return self._ready.is_set()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the catalog is loaded or the timeout expires.
 
-    def __init__(self):
-        """Initializes the song service, loading songs into the AVL tree."""
-        self._repo = SongRepository()
-        self._tree = AVLTree()
-        self._load_songs_to_tree()
+        Args:
+            timeout (Optional[float]): Seconds to wait; None waits forever.
+
+        Returns:
+            bool: True if the service is ready.
+        """
+        return self._ready.wait(timeout)
+
+    @property
+    def status(self) -> dict:
+        """Reports the loading state of the catalog.
+
+        Returns:
+            dict: ``state`` (pending, loading, ready or failed), the current
+            ``phase``, the number of ``songs`` read, the ``error`` if loading
+            failed, and the ``elapsed_seconds`` spent loading.
+        """
+        status = dict(self._status)
+        if self._load_started is None:
+            status["elapsed_seconds"] = 0.0
+        else:
+            end = self._load_finished if self._load_finished is not None else time.monotonic()
+            status["elapsed_seconds"] = round(end - self._load_started, 3)
+        return status
 
     def _generate_key(self, song: SongDAO) -> str:
         """Generates a unique AVL key for a song using title, artist, and album.
@@ -45,13 +214,267 @@ class SongService:
         """
         return f"{song.title.lower()} - {song.artist.lower()} - {song.album.lower()}"
 
+    def _row_key(self, row: int) -> str:
+        """Generates the AVL key of the song stored in a catalog row.
+
+        Args:
+            row (int): Catalog row.
+
+        Returns:
+            str: Concatenated and normalized key.
+        """
+        catalog = self._catalog
+        return f"{catalog.title(row).lower()} - {catalog.artist(row).lower()} - {catalog.album(row).lower()}"
+
+    def _measure(self, row: int) -> Tuple[int, int]:
+        """Returns the values aggregated by the statistics trees.
+
+        Args:
+            row (int): Catalog row.
+
+        Returns:
+            Tuple[int, int]: Duration and year of the song.
+        """
+        return self._catalog.duration(row), self._catalog.year(row)
+
+    def _to_dao(self, song: dict) -> SongDAO:
+        """Materializes song fields read from the catalog as a SongDAO.
+
+        Rows were validated when they were loaded from the JSON snapshot or
+        written through the service, so validation is skipped.
+
+        Args:
+            song (dict): Song fields, as returned by SongCatalog.get.
+
+        Returns:
+            SongDAO: The song.
+        """
+        return SongDAO.model_construct(**song)
+
+    def _read_row(self, row: Optional[int]) -> Optional[dict]:
+        """Copies the fields of a catalog row, if there is one; call inside a read.
+
+        Args:
+            row (Optional[int]): Catalog row, or None.
+
+        Returns:
+            Optional[dict]: Song fields, or None without a row.
+        """
+        return self._catalog.get(row) if row is not None else None
+
+    def _read_rows(self, rows: List[int]) -> List[dict]:
+        """Copies the fields of several catalog rows; call inside a read.
+
+        Copying plain fields is cheap, so a read stays short (and unlikely to
+        overlap a write) and the SongDAOs are built after it.
+
+        Args:
+            rows (List[int]): Catalog rows.
+
+        Returns:
+            List[dict]: Song fields, in the same order.
+        """
+        return [self._catalog.get(row) for row in rows]
+
+    def _index_song(self, row: int) -> None:
+        """Adds the song stored in a catalog row to the AVL tree and the
+        secondary indexes.
+
+        Args:
+            row (int): Catalog row.
+        """
+        key = self._row_key(row)
+        self._tree.insert(key, row)
+        for index in self._indexes.values():
+            index.add(row, key)
+        if self._fuzzy is not None:
+            self._fuzzy.add(self._catalog.title(row).lower(), key)
+        if self._fuzzy_log is not None:
+            self._fuzzy_log.append((True, self._catalog.title(row).lower(), key))
+
+    def _unindex_song(self, row: int) -> None:
+        """Removes the song stored in a catalog row from the AVL tree and the
+        secondary indexes.
+
+        Must run before the row is modified or freed.
+
+        Args:
+            row (int): Catalog row.
+        """
+        key = self._row_key(row)
+        self._tree.delete(key)
+        for index in self._indexes.values():
+            index.remove(row, key)
+        if self._fuzzy is not None:
+            self._fuzzy.remove(self._catalog.title(row).lower(), key)
+            if self._fuzzy.stale and self._fuzzy_log is None:
+                self._fuzzy_log = []
+                self._start_fuzzy_build(self._fuzzy)
+        if self._fuzzy_log is not None:
+            self._fuzzy_log.append((False, self._catalog.title(row).lower(), key))
+
     def _load_songs_to_tree(self) -> None:
-        """Loads all songs from the repository into the AVL tree."""
-        songs = self._repo.get_all_songs()
-        for song in songs:
-            key = self._generate_key(song)
-            self._tree.insert(key, song)
+        """Loads all songs from the repository into the AVL tree and the
+        secondary indexes.
+
+        The trees are bulk-built from the sorted keys instead of inserting
+        the songs one by one. The build allocates millions of acyclic
+        objects, so the cyclic garbage collector is paused meanwhile instead
+        of repeatedly scanning the growing heap. The fuzzy title index is
+        dropped; if there was one, a new one is built in the background.
+        """
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            keyed = sorted(((row, self._row_key(row)) for row in self._catalog.rows()), key=lambda item: item[1])
+            self._tree.bulk_load((key, row) for row, key in keyed)
+            for index in self._indexes.values():
+                index.bulk_load(keyed)
+            rebuild = self._fuzzy is not None
+            self._fuzzy = None
+            self._fuzzy_log = None
+        finally:
+            if gc_enabled:
+                gc.enable()
+        if rebuild:
+            self._start_fuzzy_build()
+
+    @traced()
+    def checkpoint(self) -> None:
+        """Flushes pending journal records into the snapshots.
+
+        Called on shutdown so that the next start can load the binary
+        snapshot without replaying a journal.
+        """
+        if not self.is_ready:
+            return
+        with self._writing():
+            self._repo.checkpoint()
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Serializes a write with the other writers of this and other processes.
+
+        Holds the write mutex and a deferred repository block (which, for a
+        shared repository, holds the inter-process lock), after replaying
+        the changes other processes made. The journal records are made
+        durable after both are released, so concurrent writers share one
+        disk write (see SongRepository.sync).
+
+        Yields:
+            None
+        """
+        try:
+            with self._write_mutex, self._repo.deferred():
+                self._catch_up()
+                yield
+        finally:
+            self._repo.sync()
+
+    @traced()
+    def refresh(self) -> None:
+        """Applies the changes other processes made to a shared repository.
 
+        Cheap when nothing changed: a single stat of the journal.
+        """
+        if not self.is_ready or not self._repo.changed():
+            return
+        with self._write_mutex:
+            self._catch_up()
+
+    @traced()
+    def _catch_up(self) -> None:
+        """Replays other processes' journal records into the catalog and indexes.
+
+        Each record's song is unindexed before the record is applied and
+        indexed again afterwards, so only the touched songs are re-keyed. If
+        the records are no longer available, everything is reloaded.
+        Must run under the write mutex.
+        """
+        records = self._repo.poll()
+        if records is None:
+            with self._lock.write():
+                self._catalog = self._repo.reload()
+                self._load_songs_to_tree()
+                self._version += 1
+            return
+        if not records:
+            return
+        catalog = self._catalog
+        with self._lock.write():
+            for record in records:
+                song_id = record["song"]["id"] if record["op"] == "add" else record["id"]
+                row = catalog.row_of(song_id)
+                if row is not None:
+                    self._unindex_song(row)
+                self._repo.apply_record(record)
+                row = catalog.row_of(song_id)
+                if row is not None:
+                    self._index_song(row)
+            self._version += 1
+
+    def _etag(self, version: int) -> str:
+        """Builds the ETag of a catalog version.
+
+        The random epoch distinguishes service instances, whose version
+        counters all start at zero.
+
+        Args:
+            version (int): Catalog version.
+
+        Returns:
+            str: Quoted entity tag.
+        """
+        return f'"{self._epoch}-{version}"'
+
+    @property
+    def etag(self) -> str:
+        """ETag of the current catalog version.
+
+        Returns:
+            str: Quoted entity tag.
+        """
+        return self._etag(self._version)
+
+    @traced()
+    def get_all_json(self) -> Tuple[str, bytes]:
+        """Returns all songs sorted by title, serialized as a JSON array.
+
+        The payload is cached per catalog version, so repeated calls between
+        writes cost a lookup instead of a traversal and serialization. The
+        cache is only ever used for the version it was built from.
+
+        Returns:
+            Tuple[str, bytes]: ETag of the serialized version and the payload.
+        """
+        def read():
+            version = self._version
+            cached = self._all_json
+            if cached is not None and cached[0] == version:
+                return version, cached[1], None
+            return version, None, self._read_rows(self._tree.get_all())
+
+        version, payload, songs = self._lock.read(read)
+        if payload is not None:
+            return self._etag(version), payload
+        payload = json.dumps(songs, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self._all_json = (version, payload)
+        return self._etag(version), payload
+
+    @traced()
+    def get_song_by_id(self, song_id: int) -> Optional[SongDAO]:
+        """Retrieves a song by its ID in O(1) through the catalog's ID index.
+
+        Args:
+            song_id (int): ID of the song.
+
+        Returns:
+            Optional[SongDAO]: The song, or None if not found.
+        """
+        song = self._lock.read(lambda: self._read_row(self._catalog.row_of(song_id)))
+        return self._to_dao(song) if song is not None else None
+
+    @traced()
     def search_exact(self, title: str, artist: str, album: str) -> Optional[SongDAO]:
         """Searches for an exact match by title, artist, and album (case-insensitive).
 
@@ -64,8 +487,11 @@ class SongService:
             Optional[SongDAO]: The matched song, or None if not found.
         """
         key = f"{title.lower()} - {artist.lower()} - {album.lower()}"
-        return self._tree.search(key)
+        song = self._lock.read(lambda: self._read_row(self._tree.search(key)))
+        SEARCH_RESULTS.observe(song is not None, "exact")
+        return self._to_dao(song) if song is not None else None
 
+    @traced()
     def search_by_title_partial(self, title: str) -> List[SongDAO]:
         """Searches the AVL tree for songs with the given title substring.
 
@@ -75,17 +501,362 @@ class SongService:
         Returns:
             List[SongDAO]: Songs that partially match the title.
         """
-        matches = self._tree.search_partial(title.lower())
-        return matches
+        songs = self._lock.read(lambda: self._read_rows(self._tree.search_partial(title.lower())))
+        SEARCH_RESULTS.observe(len(songs), "partial")
+        return [self._to_dao(song) for song in songs]
+
+    @traced()
+    def _build_fuzzy(self, stale: Optional[BKTree] = None) -> None:
+        """Builds a new title BK-tree and swaps it in; call outside a read.
+
+        Only copying the titles and swapping in the finished tree hold off
+        writers, briefly; readers are never held off. The build itself
+        (O(n log n) distance computations, seconds for a large catalog)
+        runs without a lock, while writers keep serving the old tree, if
+        any, and log their changes for the new one. Concurrent callers
+        wait for the build in progress instead of starting another.
 
+        Args:
+            stale (Optional[BKTree]): Tree to replace; nothing is built if
+                another tree has already replaced it. None builds a tree
+                if there is none yet.
+        """
+        with self._fuzzy_lock:
+            while self._fuzzy is stale:
+                with self._write_mutex:
+                    entries = [(self._catalog.title(row).lower(), key) for key, row in self._tree.iter_range()]
+                    log = self._fuzzy_log = []
+                fuzzy = BKTree()
+                for title, key in entries:
+                    fuzzy.add(title, key)
+                with self._write_mutex:
+                    if self._fuzzy_log is log:  # otherwise the indexes were rebuilt meanwhile: start over
+                        for added, title, key in log:
+                            if added:
+                                fuzzy.add(title, key)
+                            else:
+                                fuzzy.remove(title, key)
+                        self._fuzzy, self._fuzzy_log = fuzzy, None
+
+    def _start_fuzzy_build(self, stale: Optional[BKTree] = None) -> None:
+        """Runs _build_fuzzy in a background daemon thread.
+
+        Args:
+            stale (Optional[BKTree]): Tree to replace, as for _build_fuzzy.
+        """
+        threading.Thread(target=self._build_fuzzy, args=(stale,), name="fuzzy-index", daemon=True).start()
+
+    @traced()
+    def search_fuzzy(
+        self, title: str, limit: int = 10, max_distance: Optional[int] = None
+    ) -> Optional[List[SongDAO]]:
+        """Searches for songs whose title is within a few typos of the query.
+
+        The BK-tree over the titles is built on demand, never on the request
+        path: the first fuzzy search (or the first one after a bulk reload,
+        if no rebuild is already under way) starts the build in the
+        background and returns None. Writers keep the tree up to date once
+        it exists.
+
+        Args:
+            title (str): Title to match (case-insensitive).
+            limit (int): Maximum number of songs to return.
+            max_distance (Optional[int]): Largest edit distance accepted;
+                defaults to one typo per four characters, between 1 and 3.
+
+        Returns:
+            Optional[List[SongDAO]]: Matching songs, closest first, then in
+            title order; None while the title index is being built.
+        """
+        query = title.lower()
+        if max_distance is None:
+            max_distance = min(max(len(query) // 4, 1), 3)
+        fuzzy = self._fuzzy
+        if fuzzy is None:
+            if not self._fuzzy_lock.locked():
+                self._start_fuzzy_build()
+            return None
+
+        def read():
+            matches = sorted(fuzzy.search(query, max_distance))[:limit]
+            rows = (self._tree.search(key) for _, key in matches)
+            return self._read_rows([row for row in rows if row is not None])
+
+        songs = self._lock.read(read)
+        SEARCH_RESULTS.observe(len(songs), "fuzzy")
+        return [self._to_dao(song) for song in songs]
+
+    @traced()
+    def autocomplete(self, prefix: str, limit: int) -> List[SongDAO]:
+        """Returns the first songs in title order whose title starts with a prefix.
+
+        Args:
+            prefix (str): Title prefix (case-insensitive).
+            limit (int): Maximum number of songs to return.
+
+        Returns:
+            List[SongDAO]: Up to ``limit`` matching songs.
+        """
+        songs = self._lock.read(lambda: self._read_rows(self._tree.search_prefix(prefix, limit)))
+        SEARCH_RESULTS.observe(len(songs), "prefix")
+        return [self._to_dao(song) for song in songs]
+
+    def tree_stats(self) -> Dict[str, dict]:
+        """Reports the shape and operation counters of every index tree.
+
+        Returns:
+            Dict[str, dict]: OrderedMap.stats() of the title tree (``title``)
+            and of each secondary index, by indexed field.
+        """
+        def read():
+            stats = {"title": self._tree.stats()}
+            for field, index in self._indexes.items():
+                stats[field] = index.stats()
+            return stats
+
+        return self._lock.read(read)
+
+    @traced()
     def get_all_sorted_by_title(self) -> List[SongDAO]:
         """Retrieves all songs sorted by title (including duplicates).
 
         Returns:
             List[SongDAO]: All songs in in-order AVL traversal.
         """
-        return self._tree.get_all()
+        songs = self._lock.read(lambda: self._read_rows(self._tree.get_all()))
+        return [self._to_dao(song) for song in songs]
+
+    def _stream(self, next_batch: Callable[[Any], Tuple[List[dict], Any]]) -> Iterator[dict]:
+        """Yields songs batch by batch, each batch read as one consistent read.
+
+        Args:
+            next_batch (Callable[[Any], Tuple[List[dict], Any]]): Called as a
+                read of the SeqLock with the current cursor (None at first);
+                returns the next songs and the following cursor, or None as
+                cursor once there is nothing left.
+
+        Yields:
+            dict: Song fields.
+        """
+        cursor = None
+        while True:
+            songs, cursor = self._lock.read(lambda: next_batch(cursor))  # pylint: disable=cell-var-from-loop
+            yield from songs
+            if cursor is None:
+                return
+
+    def iter_all_sorted_by_title(self, batch_size: int = 500, offset: int = 0,
+                                 limit: Optional[int] = None) -> Iterator[dict]:
+        """Lazily yields all songs sorted by title, or one page of them.
+
+        Memory is bounded by ``batch_size`` and writers can proceed between
+        batches. The first batch starts at position ``offset``; each later
+        batch resumes after the last key already yielded, so a song written
+        meanwhile shows up if it sorts after that key.
+
+        Args:
+            batch_size (int): Number of songs read per batch.
+            offset (int): Number of songs to skip.
+            limit (Optional[int]): Maximum number of songs to yield; all
+                remaining songs if None.
+
+        Returns:
+            Iterator[dict]: Song fields, in title order.
+        """
+        def next_batch(cursor):
+            last_key, remaining = cursor if cursor is not None else (None, limit)
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            if cursor is None:
+                rows = self._tree.get_page(offset, size)
+            else:
+                rows = []
+                for key, row in self._tree.iter_range(lo=last_key):
+                    if key == last_key:
+                        continue
+                    rows.append(row)
+                    if len(rows) == size:
+                        break
+            if remaining is not None:
+                remaining -= len(rows)
+            songs = [self._catalog.get(row) for row in rows]
+            if len(rows) < size or remaining == 0:
+                return songs, None
+            return songs, (self._row_key(rows[-1]), remaining)
+
+        return self._stream(next_batch)
+
+    def iter_search_by_title_partial(self, title: str, batch_size: int = 500) -> Iterator[dict]:
+        """Lazily yields the songs matching a title substring, in title order.
+
+        Only the matching keys are collected up front; song fields are read
+        in batches as in iter_all_sorted_by_title. A song deleted or re-keyed
+        while the stream is running is skipped.
+
+        Args:
+            title (str): Title substring (case-insensitive).
+            batch_size (int): Number of songs read per batch.
+
+        Returns:
+            Iterator[dict]: Song fields, in title order.
+        """
+        keys = self._lock.read(lambda: [key for key, _ in self._tree.iter_partial(title.lower())])
+
+        def next_batch(start):
+            start = start or 0
+            rows = (self._tree.search(key) for key in keys[start:start + batch_size])
+            songs = [self._catalog.get(row) for row in rows if row is not None]
+            return songs, start + batch_size if start + batch_size < len(keys) else None
+
+        return self._stream(next_batch)
+
+    def count(self) -> int:
+        """Returns the number of songs in the catalog.
+
+        Returns:
+            int: Number of songs.
+        """
+        return len(self._tree)
+
+    @traced()
+    def get_page_sorted_by_title(self, offset: int, limit: int) -> List[SongDAO]:
+        """Retrieves one page of songs sorted by title.
+
+        Args:
+            offset (int): Number of songs to skip.
+            limit (int): Maximum number of songs to return.
+
+        Returns:
+            List[SongDAO]: Songs at the requested positions in title order.
+        """
+        songs = self._lock.read(lambda: self._read_rows(self._tree.get_page(offset, limit)))
+        return [self._to_dao(song) for song in songs]
 
+    @traced()
+    def query(
+        self,
+        ranges: Dict[str, Tuple[Any, Any]],
+        sort_by: str = "title",
+        descending: bool = False,
+        offset: int = 0,
+        limit: int = 50,
+    ) -> Tuple[int, List[SongDAO]]:
+        """Finds the songs matching every predicate, sorted by one field.
+
+        The index whose range holds the fewest songs is chosen by counting
+        with subtree sizes in O(log n); only that range is scanned and the
+        remaining predicates are checked on each row. A query with no
+        predicate other than one on the sort field is answered by position,
+        without scanning the skipped songs.
+
+        Args:
+            ranges (Dict[str, Tuple[Any, Any]]): Inclusive (lo, hi) bounds per
+                field of QUERY_FIELDS; either bound may be None, and lo == hi
+                is an equality predicate. Text fields are case-insensitive.
+            sort_by (str): Field of SORT_FIELDS to sort by.
+            descending (bool): Sort in descending order.
+            offset (int): Number of matching songs to skip.
+            limit (int): Maximum number of songs to return.
+
+        Returns:
+            Tuple[int, List[SongDAO]]: Total number of matching songs and the
+            requested page.
+
+        Raises:
+            ValueError: If a field cannot be filtered or sorted by.
+        """
+        if sort_by not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort by {sort_by!r}; use one of {', '.join(SORT_FIELDS)}.")
+        unknown = [field for field in ranges if field not in QUERY_FIELDS]
+        if unknown:
+            raise ValueError(f"Cannot filter by {', '.join(unknown)}; use {', '.join(QUERY_FIELDS)}.")
+        ranges = {
+            field: tuple(bound.lower() if isinstance(bound, str) else bound for bound in bounds)
+            for field, bounds in ranges.items()
+        }
+        def read():
+            field = min(ranges, key=lambda name: self._indexes[name].count(*ranges[name]), default=sort_by)
+            others = [(self._indexes[name], lo, hi) for name, (lo, hi) in ranges.items() if name != field]
+            if not others and field == sort_by:
+                total, rows = self._ordered_page(field, ranges.get(field, (None, None)), descending, offset, limit)
+            else:
+                rows = [
+                    row for row in self._indexes[field].rows(*ranges[field])
+                    if all(_within(index.value(row), lo, hi) for index, lo, hi in others)
+                ]
+                total = len(rows)
+                if sort_by == "title":
+                    rows.sort(key=self._row_key, reverse=descending)
+                else:
+                    value = self._indexes[sort_by].value
+                    rows.sort(key=lambda row: (value(row), self._row_key(row)), reverse=descending)
+                rows = rows[offset:offset + limit]
+            return total, self._read_rows(rows)
+
+        total, songs = self._lock.read(read)
+        SEARCH_RESULTS.observe(total, "query")
+        return total, [self._to_dao(song) for song in songs]
+
+    @traced()
+    def stats(
+        self, artist: Optional[str] = None, title_from: Optional[str] = None, title_to: Optional[str] = None
+    ) -> dict:
+        """Computes catalog statistics over the whole library or a part of it.
+
+        The scope is the whole library, narrowed to one artist and/or to a
+        title range. The range includes every title from ``title_from`` up
+        to and including the titles starting with ``title_to``. With the AVL
+        engine the statistics come from subtree aggregates, in O(log n)
+        without reading any song; the other engines read the duration and
+        year of every song in scope, in O(log n + k).
+
+        Args:
+            artist (Optional[str]): Artist name (case-insensitive).
+            title_from (Optional[str]): First title of the range (case-insensitive).
+            title_to (Optional[str]): Last title prefix of the range (case-insensitive).
+
+        Returns:
+            dict: ``count``, ``total_duration``, ``average_duration``,
+            ``min_year`` and ``max_year``; the last three are None when no
+            song is in scope.
+        """
+        lo = title_from.lower() if title_from is not None else None
+        hi = title_to.lower() + "\U0010ffff" if title_to is not None else None
+        if artist is not None:
+            return self._lock.read(lambda: self._indexes["artist"].aggregate(artist.lower(), lo, hi))
+        return self._lock.read(lambda: self._tree.aggregate(lo, hi))
+
+    def _ordered_page(
+        self, field: str, bounds: Tuple[Any, Any], descending: bool, offset: int, limit: int
+    ) -> Tuple[int, List[int]]:
+        """Reads one page of a range of an index by position; call inside a read.
+
+        Args:
+            field (str): Indexed field, or "title" for the primary tree.
+            bounds (Tuple[Any, Any]): Inclusive range of the field.
+            descending (bool): Page from the end of the range.
+            offset (int): Number of songs to skip.
+            limit (int): Maximum number of songs to return.
+
+        Returns:
+            Tuple[int, List[int]]: Number of songs in the range and the rows
+            of the page, in the requested order.
+        """
+        if field == "title":
+            total = len(self._tree)
+            page = self._tree.get_page
+        else:
+            index = self._indexes[field]
+            total = index.count(*bounds)
+
+            def page(start, count):
+                return index.page(bounds[0], start, count)
+        if not descending:
+            return total, page(offset, min(limit, total - offset)) if offset < total else []
+        end = total - offset
+        start = max(end - limit, 0)
+        return total, page(start, end - start)[::-1] if end > 0 else []
+
+    @traced()
     def insert_song(self, song: dict) -> None:
         """Adds a song to both the repository and the AVL tree.
 
@@ -93,37 +864,203 @@ class SongService:
             song (dict): Dictionary containing song fields.
 
         Raises:
-            ValueError: If a song with the same ID already exists.
+            SongConflictError: If a song with the same title, artist, and
+                album already exists.
+            ValueError: If the song is invalid or includes an ID.
         """
-        self._repo.add_song(song)
-        dao = self._repo.get_song_by_id(song["id"])
-        if dao:
-            key = self._generate_key(dao)
-            self._tree.insert(key, dao)
+        key = self._generate_key(SongDAO(**song))
+        with self._writing():
+            if self._tree.search(key) is not None:
+                raise SongConflictError("A song with the same title, artist, and album already exists.")
+            with self._lock.write():
+                self._repo.add_song(song)
+                self._index_song(self._catalog.row_of(song["id"]))
+                self._version += 1
+
+    @traced()
+    def update_song(self, song_id: int, new_data: dict) -> dict:
+        """Updates an existing song and re-keys it in the AVL tree.
 
-    def update_song(self, song_id: int, new_data: dict) -> None:
-        """Updates an existing song and reloads the AVL tree.
+        Only the affected node is touched: the old key is deleted and the
+        updated song is inserted under its new key, both in O(log n). The
+        new values and the new key are checked before the song is taken
+        out of the indexes, and the row is indexed again even if the
+        repository rejects the update, so the song never goes missing.
 
         Args:
             song_id (int): ID of the song to update.
             new_data (dict): Dictionary with updated fields.
 
+        Returns:
+            dict: The updated song fields.
+
         Raises:
-            ValueError: If the song with the given ID is not found.
+            SongNotFoundError: If the song with the given ID is not found.
+            SongConflictError: If the update collides with another song's
+                title, artist, and album.
+            ValueError: If the new values are invalid.
         """
-        self._repo.update_song(song_id, new_data)
-        self._tree = AVLTree()
-        self._load_songs_to_tree()
+        with self._writing():
+            row = self._catalog.row_of(song_id)
+            if row is None:
+                raise SongNotFoundError(f"Song with ID {song_id} not found.")
+            candidate = SongDAO(**{**self._catalog.get(row), **new_data})
+            changes = {
+                field: getattr(candidate, field)
+                for field in new_data
+                if field in SongDAO.model_fields and field != "id"
+            }
+            new_key = self._generate_key(candidate)
+            if new_key != self._row_key(row) and self._tree.search(new_key) is not None:
+                raise SongConflictError("A song with the same title, artist, and album already exists.")
 
+            with self._lock.write():
+                self._unindex_song(row)
+                try:
+                    updated = self._repo.update_song(song_id, changes)
+                finally:
+                    self._index_song(row)
+                self._version += 1
+            return updated.model_dump()
+
+    @traced()
     def delete_song_by_id(self, song_id: int) -> None:
         """Deletes a song from the repository and updates the AVL tree.
 
+        If the repository fails to delete the song, it is indexed again.
+
         Args:
             song_id (int): ID of the song to delete.
 
         Raises:
-            ValueError: If the song does not exist.
+            SongNotFoundError: If the song does not exist.
         """
-        self._repo.delete_song(song_id)
-        self._tree = AVLTree()
-        self._load_songs_to_tree()
+        with self._writing():
+            row = self._catalog.row_of(song_id)
+            if row is None:
+                raise SongNotFoundError(f"Song with ID {song_id} not found.")
+            with self._lock.write():
+                self._unindex_song(row)
+                try:
+                    self._repo.delete_song(song_id)
+                except Exception:
+                    self._index_song(row)
+                    raise
+                self._version += 1
+
+    @traced()
+    def insert_songs(self, songs: List[dict]) -> List[int]:
+        """Adds several songs at once; either all of them are added or none.
+
+        The whole batch is validated and converted to catalog values up
+        front, IDs are assigned in one pass, and the repository persists the
+        whole batch in a single flush. Should the repository still reject a
+        song, the songs of the batch added before it are deleted again, so
+        the catalog and the indexes keep matching. Large batches rebuild the
+        AVL tree with a bulk load instead of inserting key by key.
+
+        Args:
+            songs (List[dict]): Dictionaries containing song fields, without IDs.
+
+        Returns:
+            List[int]: IDs assigned to the songs, in input order.
+
+        Raises:
+            ValueError: If a song is invalid or includes an ID, or if a
+                song's title, artist, and album repeat within the batch or
+                match an existing song.
+        """
+        daos = [SongDAO(**song) for song in songs]
+        keys = [self._generate_key(dao) for dao in daos]
+        songs = [dao.model_dump(exclude_unset=True) for dao in daos]
+        with self._writing():
+            conflicts = self._batch_conflicts(songs, keys)
+            if conflicts:
+                raise ValueError("; ".join(conflicts))
+            with self._lock.write():
+                added = []
+                try:
+                    for song in songs:
+                        self._repo.add_song(song)
+                        added.append(song["id"])
+                except Exception:
+                    for song_id in added:
+                        self._repo.delete_song(song_id)
+                    raise
+                self._index_rows(self._catalog.row_of(song_id) for song_id in added)
+                self._version += 1
+        return added
+
+    def _batch_conflicts(self, songs: List[dict], keys: List[str]) -> List[str]:
+        """Describes the songs of a batch that cannot be inserted.
+
+        Args:
+            songs (List[dict]): Songs to insert.
+            keys (List[str]): Their AVL keys, in the same order.
+
+        Returns:
+            List[str]: One message per offending song; empty if the batch is valid.
+        """
+        conflicts = []
+        seen = {}
+        for index, (song, key) in enumerate(zip(songs, keys)):
+            if "id" in song:
+                conflicts.append(f"Song {index} must not include an ID. It is auto-assigned.")
+            elif key in seen:
+                conflicts.append(f"Song {index} duplicates song {seen[key]} of the batch.")
+            elif self._tree.search(key) is not None:
+                conflicts.append(f"Song {index} already exists (same title, artist, and album).")
+            seen.setdefault(key, index)
+        return conflicts
+
+    def _index_rows(self, rows: Iterable[int]) -> None:
+        """Adds several catalog rows to the AVL tree.
+
+        When the batch is larger than the tree, rebuilding the whole tree
+        from sorted keys is cheaper than inserting each key.
+
+        Args:
+            rows (Iterable[int]): Catalog rows to index.
+        """
+        rows = list(rows)
+        if len(rows) > len(self._tree):
+            self._load_songs_to_tree()
+            return
+        for row in rows:
+            self._index_song(row)
+
+    @traced()
+    def delete_songs(self, song_ids: List[int]) -> None:
+        """Deletes several songs at once; either all of them are deleted or none.
+
+        Args:
+            song_ids (List[int]): IDs of the songs to delete.
+
+        Raises:
+            ValueError: If an ID does not exist or is repeated.
+        """
+        with self._writing():
+            missing = [song_id for song_id in song_ids if song_id not in self._catalog]
+            if missing:
+                raise ValueError(f"Songs not found: {', '.join(map(str, missing))}.")
+            if len(set(song_ids)) != len(song_ids):
+                raise ValueError("Song IDs must not repeat.")
+            with self._lock.write():
+                for song_id in song_ids:
+                    self._unindex_song(self._catalog.row_of(song_id))
+                    self._repo.delete_song(song_id)
+                self._version += 1
+
+
+def _within(value: Any, lo: Any, hi: Any) -> bool:
+    """Checks a value against inclusive bounds, either of which may be None.
+
+    Args:
+        value (Any): Value to check.
+        lo (Any): Smallest allowed value, or None.
+        hi (Any): Largest allowed value, or None.
+
+    Returns:
+        bool: True if the value is within the bounds.
+    """
+    return (lo is None or value >= lo) and (hi is None or value <= hi)
@@ -0,0 +1,371 @@
+"""Lightweight span tracing across the controller, service and data layers.
+
+This module is part of the MP3AVLtree project. A trace is started for a
+sampled request and the current span is kept in a context variable, so it
+follows the request into the thread pool that runs synchronous endpoints.
+Functions decorated with traced() open a child span only while a trace is
+active; otherwise they cost a single context variable lookup. Repeated
+calls of the same function under one parent (e.g. a lookup per matching
+song) are folded into one span with a call count, which keeps traces small.
+Finished traces are appended to a local file, one JSON document per line,
+by a background thread, so the request that finished a trace (often on
+the event loop) never waits for serialization or the disk.
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import functools
+import inspect
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, List, Optional
+
+MAX_SPANS_PER_TRACE = 2000
+EXPORT_QUEUE_SIZE = 1000
+
+
+class Span:
+    """Timed operation within a trace.
+
+    Attributes:
+        name (str): Operation name, e.g. ``SongService.query``.
+        trace (Trace): Trace the span belongs to.
+        attributes (dict): Extra details recorded with the span.
+        start (float): perf_counter() value when the span was first opened.
+        duration (float): Seconds spent in the span, over every call.
+        count (int): Number of calls folded into the span.
+        children (List[Span]): Child spans, in the order they were opened.
+    """
+
+    __slots__ = ("name", "trace", "attributes", "start", "duration", "count", "children", "_opened")
+
+    def __init__(self, name: str, trace: "Trace", attributes: Optional[dict] = None):
+        """Initializes and opens a span.
+
+        Args:
+            name (str): Operation name.
+            trace (Trace): Trace the span belongs to.
+            attributes (Optional[dict]): Extra details to record.
+        """
+        self.name = name
+        self.trace = trace
+        self.attributes = attributes or {}
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.count = 1
+        self.children: List[Span] = []
+        self._opened = self.start
+
+    def child(self, name: str, attributes: Optional[dict] = None) -> Optional["Span"]:
+        """Opens a child span, or reopens the previous one if it has the same name.
+
+        Args:
+            name (str): Operation name.
+            attributes (Optional[dict]): Extra details to record.
+
+        Returns:
+            Optional[Span]: The opened span, or None once the trace holds
+            MAX_SPANS_PER_TRACE spans.
+        """
+        if self.children and not attributes:
+            last = self.children[-1]
+            if last.name == name and not last.attributes:
+                last.count += 1
+                last._opened = time.perf_counter()  # pylint: disable=protected-access
+                return last
+        if self.trace.spans >= MAX_SPANS_PER_TRACE:
+            self.trace.dropped += 1
+            return None
+        self.trace.spans += 1
+        span = Span(name, self.trace, attributes)
+        self.children.append(span)
+        return span
+
+    def close(self) -> None:
+        """Adds the time since the span was (re)opened to its duration."""
+        self.duration += time.perf_counter() - self._opened
+
+    def to_dict(self, origin: float) -> dict:
+        """Serializes the span and its children.
+
+        Args:
+            origin (float): perf_counter() value of the trace start.
+
+        Returns:
+            dict: ``name``, ``start_ms`` relative to the trace start,
+            ``duration_ms``, ``count``, ``attributes`` (if any) and
+            ``children`` (if any).
+        """
+        data = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+            "count": self.count,
+        }
+        if self.attributes:
+            data["attributes"] = self.attributes
+        if self.children:
+            data["children"] = [child.to_dict(origin) for child in self.children]
+        return data
+
+
+class Trace:
+    """Tree of spans recorded for one request.
+
+    Attributes:
+        trace_id (str): Random identifier of the trace.
+        timestamp (float): Wall-clock time the trace started.
+        root (Span): Outermost span.
+        spans (int): Number of spans recorded.
+        dropped (int): Spans not recorded because of MAX_SPANS_PER_TRACE.
+    """
+
+    def __init__(self, name: str, attributes: Optional[dict] = None):
+        """Starts a trace with its root span.
+
+        Args:
+            name (str): Name of the root span.
+            attributes (Optional[dict]): Extra details of the root span.
+        """
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.timestamp = time.time()
+        self.spans = 1
+        self.dropped = 0
+        self.root = Span(name, self, attributes)
+
+    def to_dict(self) -> dict:
+        """Serializes the trace.
+
+        Returns:
+            dict: ``trace_id``, ``timestamp``, ``duration_ms``, ``dropped``
+            and the ``root`` span.
+        """
+        return {
+            "trace_id": self.trace_id,
+            "timestamp": round(self.timestamp, 6),
+            "duration_ms": round(self.root.duration * 1000, 3),
+            "dropped": self.dropped,
+            "root": self.root.to_dict(self.root.start),
+        }
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("mp3_current_span", default=None)
+
+
+class Tracer:
+    """Starts sampled traces and appends finished ones to a file.
+
+    Finished traces are queued and written by a daemon thread, started on
+    the first export, which appends every trace waiting in the queue with
+    a single open of the file. When the queue is full (the disk cannot
+    keep up) new traces are discarded rather than slowing down requests.
+
+    Attributes:
+        path (str): File the traces are appended to.
+        enabled (bool): Whether new traces are started.
+        sample_rate (float): Fraction of requests traced, from 0 to 1.
+        exported (int): Number of traces written.
+        discarded (int): Number of traces lost to a full queue or a
+            failed write.
+    """
+
+    def __init__(self, path: str = "traces.jsonl", enabled: bool = False, sample_rate: float = 1.0):
+        """Initializes the tracer.
+
+        Args:
+            path (str): File the traces are appended to.
+            enabled (bool): Start tracing right away.
+            sample_rate (float): Fraction of requests traced, from 0 to 1.
+        """
+        self.path = path
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.exported = 0
+        self.discarded = 0
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Trace]" = queue.Queue(EXPORT_QUEUE_SIZE)
+        self._writer: Optional[threading.Thread] = None
+
+    def configure(self, enabled: Optional[bool] = None, sample_rate: Optional[float] = None,
+                  path: Optional[str] = None) -> None:
+        """Changes the tracing settings; traces already started are unaffected.
+
+        Args:
+            enabled (Optional[bool]): Whether to start new traces.
+            sample_rate (Optional[float]): Fraction of requests traced.
+            path (Optional[str]): File the traces are appended to.
+
+        Raises:
+            ValueError: If the sample rate is not between 0 and 1.
+        """
+        if sample_rate is not None and not 0 <= sample_rate <= 1:
+            raise ValueError("The sample rate must be between 0 and 1.")
+        with self._lock:
+            if enabled is not None:
+                self.enabled = enabled
+            if sample_rate is not None:
+                self.sample_rate = sample_rate
+            if path is not None:
+                self.path = path
+
+    def status(self) -> dict:
+        """Reports the tracing settings.
+
+        Returns:
+            dict: ``enabled``, ``sample_rate``, ``path`` and the numbers of
+            ``exported`` and ``discarded`` traces.
+        """
+        return {"enabled": self.enabled, "sample_rate": self.sample_rate, "path": self.path,
+                "exported": self.exported, "discarded": self.discarded}
+
+    @contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[Optional[Trace]]:
+        """Records a trace of the block if tracing is on and the block is sampled.
+
+        Args:
+            name (str): Name of the root span; the block may rename it once
+                it knows more (e.g. the matched route).
+            **attributes (Any): Extra details of the root span.
+
+        Yields:
+            Optional[Trace]: The trace, or None if the block is not traced.
+        """
+        if not self.enabled or _current.get() is not None or random.random() >= self.sample_rate:
+            yield None
+            return
+        trace = Trace(name, attributes)
+        token = _current.set(trace.root)
+        try:
+            yield trace
+        finally:
+            _current.reset(token)
+            trace.root.close()
+            self.export(trace)
+
+    def export(self, trace: Trace) -> None:
+        """Queues a finished trace for the writer thread; never blocks.
+
+        Args:
+            trace (Trace): Trace to write.
+        """
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="trace-writer", daemon=True)
+                    self._writer.start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.discarded += 1
+
+    def flush(self) -> None:
+        """Blocks until every queued trace has been written."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def _write_loop(self) -> None:
+        """Appends queued traces to the trace file, forever."""
+        while True:
+            traces = [self._queue.get()]
+            while True:
+                try:
+                    traces.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                lines = "".join(json.dumps(trace.to_dict(), ensure_ascii=False, default=str) + "\n"
+                                for trace in traces)
+                path = self.path
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(path, "a", encoding="utf-8") as file:
+                    file.write(lines)
+                self.exported += len(traces)
+            except (OSError, TypeError, ValueError):
+                self.discarded += len(traces)
+            finally:
+                for _ in traces:
+                    self._queue.task_done()
+
+
+TRACER = Tracer()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Records the block as a child of the current span, if a trace is active.
+
+    Args:
+        name (str): Operation name.
+        **attributes (Any): Extra details to record.
+
+    Yields:
+        Optional[Span]: The span, or None if nothing is traced.
+    """
+    parent = _current.get()
+    child = parent.child(name, attributes) if parent is not None else None
+    if child is None:
+        yield None
+        return
+    token = _current.set(child)
+    try:
+        yield child
+    finally:
+        _current.reset(token)
+        child.close()
+
+
+def traced(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """Decorates a function so each call is a span of the active trace.
+
+    Coroutine functions get a coroutine wrapper, so frameworks that inspect
+    the function (FastAPI endpoints) still treat it the same way.
+
+    Args:
+        name (Optional[str]): Span name; defaults to the function's
+            qualified name, e.g. ``AVLTree.search_partial``.
+
+    Returns:
+        Callable[[Callable], Callable]: The decorator.
+    """
+    def decorate(func: Callable) -> Callable:
+        label = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current.get() is None:
+                    return await func(*args, **kwargs)
+                with span(label):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return func(*args, **kwargs)
+            with span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
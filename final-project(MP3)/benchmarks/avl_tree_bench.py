@@ -0,0 +1,136 @@
+"""Microbenchmark for the AVL tree engine of the MP3AVLtree project.
+
+Times insert, exact search, in-order traversal and delete per operation, and
+measures the memory taken per node. With ``--baseline REV`` the same workload
+also runs against ``backend/services/avl_tree.py`` as of a git revision, so
+the speedup and the memory saved per node can be read side by side.
+
+Usage (from the ``final-project(MP3)`` directory):
+
+    python -m benchmarks.avl_tree_bench --size 1000000 --baseline ec84f23
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import random
+import subprocess
+import time
+import tracemalloc
+import types
+from typing import Callable, Dict, List
+
+from backend.services import avl_tree  # pylint: disable=import-error
+
+AVL_TREE_PATH = "backend/services/avl_tree.py"
+
+
+def load_revision(revision: str) -> types.ModuleType:
+    """Loads the AVL tree module as it was at a git revision.
+
+    Args:
+        revision (str): Any git revision (commit, tag, branch).
+
+    Returns:
+        types.ModuleType: The module built from that revision's source.
+    """
+    source = subprocess.run(
+        ["git", "show", f"{revision}:./{AVL_TREE_PATH}"],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    module = types.ModuleType(f"avl_tree_{revision}")
+    exec(compile(source, f"{revision}:{AVL_TREE_PATH}", "exec"), module.__dict__)  # pylint: disable=exec-used
+    return module
+
+
+def make_keys(size: int, seed: int) -> List[str]:
+    """Generates shuffled song-like keys.
+
+    Args:
+        size (int): Number of keys.
+        seed (int): Random seed.
+
+    Returns:
+        List[str]: Distinct keys in random order.
+    """
+    rng = random.Random(seed)
+    keys = [f"song {i:08d} - artist {i % 997} - album {i % 4999}" for i in range(size)]
+    rng.shuffle(keys)
+    return keys
+
+
+def run(module: types.ModuleType, keys: List[str]) -> Dict[str, float]:
+    """Runs the workload against one AVL tree implementation.
+
+    Args:
+        module (types.ModuleType): Module providing AVLTree.
+        keys (List[str]): Keys to insert, search and delete.
+
+    Returns:
+        Dict[str, float]: Nanoseconds per operation and bytes per node.
+    """
+    value = {"title": "benchmark"}
+    tree = module.AVLTree()
+    results: Dict[str, float] = {}
+
+    def timed(name: str, operation: Callable[[], None], count: int, repeat: int = 1) -> None:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            operation()
+            best = min(best, time.perf_counter() - start)
+        results[name] = best * 1e9 / count
+
+    timed("insert", lambda: [tree.insert(key, value) for key in keys], len(keys))
+    timed("search", lambda: [tree.search(key) for key in keys], len(keys), repeat=3)
+    timed("get_all", tree.get_all, len(keys), repeat=3)
+    timed("delete", lambda: [tree.delete(key) for key in keys], len(keys))
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for key in keys:
+        tree.insert(key, value)
+    results["bytes/node"] = (tracemalloc.get_traced_memory()[0] - before) / len(keys)
+    tracemalloc.stop()
+    return results
+
+
+def main() -> None:
+    """Parses arguments, runs the benchmark and prints a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--size", type=int, default=100_000, help="number of songs in the catalog")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for the keys")
+    parser.add_argument("--baseline", help="git revision to compare against")
+    args = parser.parse_args()
+
+    keys = make_keys(args.size, args.seed)
+    current = run(avl_tree, keys)
+    baseline = run(load_revision(args.baseline), keys) if args.baseline else None
+
+    print(f"AVL tree benchmark, {args.size} keys (ns/op, bytes/node)")
+    header = f"{'metric':<12}{'current':>14}"
+    if baseline:
+        header += f"{args.baseline:>14}{'speedup':>10}"
+    print(header)
+    for metric, value in current.items():
+        line = f"{metric:<12}{value:>14.1f}"
+        if baseline:
+            line += f"{baseline[metric]:>14.1f}{baseline[metric] / value:>9.2f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""Benchmark suite for the MP3AVLtree backend at catalog scale.
+
+Generates a seeded synthetic catalog (see benchmarks.catalog_gen) for each
+requested size and times the backend the way the API uses it: loading the
+catalog from JSON and from the binary snapshot, exact and partial title
+search, insert, update, delete and full traversal through SongService.
+Every phase reports ops/sec, latency percentiles and the peak resident
+memory of the process. Each size runs in its own process so that peak
+memory belongs to that size alone.
+
+Results can be written as JSON and compared with a saved baseline; the
+exit status is 1 when a phase got slower than the tolerance allows, so the
+suite can gate changes.
+
+Usage (from the ``final-project(MP3)`` directory):
+
+    python -m benchmarks.backend_bench --sizes 10000 100000 --output current.json
+    python -m benchmarks.backend_bench --sizes 10000 100000 --baseline current.json
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+from backend.repositories.song_repo import SongRepository  # pylint: disable=import-error
+from backend.services.song_service import SongService  # pylint: disable=import-error
+from benchmarks.catalog_gen import write_catalog  # pylint: disable=import-error
+
+PERCENTILES = (50, 95, 99)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Returns the peak resident set size of this process.
+
+    Returns:
+        Optional[float]: Megabytes, or None where ``resource`` is missing.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(ordered: List[float], percent: float) -> float:
+    """Returns a nearest-rank percentile of sorted samples.
+
+    Args:
+        ordered (List[float]): Samples in ascending order.
+        percent (float): Percentile between 0 and 100.
+
+    Returns:
+        float: The sample at that rank.
+    """
+    rank = max(int(round(percent / 100 * len(ordered))) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def measure(operation: Callable[..., object], arguments: Iterable[tuple]) -> dict:
+    """Times each call of an operation and summarizes the latencies.
+
+    Args:
+        operation (Callable[..., object]): Operation to time.
+        arguments (Iterable[tuple]): Positional arguments of each call.
+
+    Returns:
+        dict: ``ops``, ``seconds``, ``ops_per_sec``, ``p50_ms``, ``p95_ms``,
+        ``p99_ms``, ``max_ms`` and ``peak_rss_mb``.
+    """
+    latencies = []
+    clock = time.perf_counter
+    for args in arguments:
+        start = clock()
+        operation(*args)
+        latencies.append(clock() - start)
+    latencies.sort()
+    total = sum(latencies)
+    result = {
+        "ops": len(latencies),
+        "seconds": round(total, 6),
+        "ops_per_sec": round(len(latencies) / total, 2) if total else None,
+    }
+    for percent in PERCENTILES:
+        result[f"p{percent}_ms"] = round(percentile(latencies, percent) * 1000, 4)
+    result["max_ms"] = round(latencies[-1] * 1000, 4)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def run_size(size: int, seed: int, ops: int) -> Dict[str, dict]:
+    """Runs every phase against a fresh catalog of the given size.
+
+    Args:
+        size (int): Number of songs in the catalog.
+        seed (int): Seed of the catalog and of the sampled operations.
+        ops (int): Operations per phase (partial search runs a tenth as many,
+            traversal three).
+
+    Returns:
+        Dict[str, dict]: Measurements per phase, see measure().
+    """
+    rng = random.Random(seed)
+    results: Dict[str, dict] = {}
+    with tempfile.TemporaryDirectory(prefix="mp3-bench-") as workdir:
+        path = os.path.join(workdir, "songs.json")
+        write_catalog(path, size, seed)
+        services: List[SongService] = []
+
+        def load() -> None:
+            services.append(SongService(SongRepository(path)))
+
+        results["load_json"] = measure(load, [()])
+        services.pop().checkpoint()
+        results["load_binary"] = measure(load, [()])
+        service = services.pop()
+
+        catalog = service._catalog  # pylint: disable=protected-access
+        rows = list(catalog.rows())
+        sample = [rng.choice(rows) for _ in range(ops)]
+        results["exact_search"] = measure(
+            service.search_exact,
+            [(catalog.title(row), catalog.artist(row), catalog.album(row)) for row in sample],
+        )
+        words = [catalog.title(row).split()[0][:5] for row in sample[:max(ops // 10, 1)]]
+        results["partial_search"] = measure(service.search_by_title_partial, [(word,) for word in words])
+        results["insert"] = measure(service.insert_song, [(
+            {"title": f"Benchmark {i}", "artist": "Bench", "album": "Bench", "year": 2000, "duration": 200},
+        ) for i in range(ops)])
+        ids = [catalog.song_id(row) for row in sample]
+        results["update"] = measure(
+            service.update_song, [(song_id, {"duration": rng.randint(30, 600)}) for song_id in ids]
+        )
+        results["delete"] = measure(service.delete_song_by_id, [(song_id,) for song_id in sorted(set(ids))])
+        results["traversal"] = measure(service.get_all_sorted_by_title, [()] * 3)
+    return results
+
+
+def git_revision() -> Optional[str]:
+    """Returns the current git commit, if available.
+
+    Returns:
+        Optional[str]: Abbreviated commit hash, or None outside a git checkout.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_isolated(size: int, seed: int, ops: int) -> Dict[str, dict]:
+    """Runs one size in a child process so its peak memory is its own.
+
+    Args:
+        size (int): Number of songs in the catalog.
+        seed (int): Random seed.
+        ops (int): Operations per phase.
+
+    Returns:
+        Dict[str, dict]: Measurements per phase.
+    """
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.backend_bench", "--sizes", str(size),
+         "--seed", str(seed), "--ops", str(ops), "--json", "--in-process"],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output)["results"][str(size)]
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Lists the phases that regressed against a baseline.
+
+    A phase regresses when its throughput drops, or its p95 latency grows,
+    by more than the tolerance.
+
+    Args:
+        current (dict): Results of this run.
+        baseline (dict): Results loaded from the baseline file.
+        tolerance (float): Accepted relative change, e.g. 0.1 for 10%.
+
+    Returns:
+        List[str]: One description per regression.
+    """
+    regressions = []
+    for size, phases in current["results"].items():
+        for phase, result in phases.items():
+            before = baseline.get("results", {}).get(size, {}).get(phase)
+            if not before:
+                continue
+            if result["ops_per_sec"] and before["ops_per_sec"]:
+                if result["ops_per_sec"] < before["ops_per_sec"] * (1 - tolerance):
+                    regressions.append(
+                        f"{size} {phase}: {result['ops_per_sec']:.1f} ops/s, was {before['ops_per_sec']:.1f}"
+                    )
+            if result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{size} {phase}: p95 {result['p95_ms']:.3f} ms, was {before['p95_ms']:.3f}")
+    return regressions
+
+
+def print_table(report: dict, baseline: Optional[dict]) -> None:
+    """Prints the results, with the baseline throughput ratio if given.
+
+    Args:
+        report (dict): Results of this run.
+        baseline (Optional[dict]): Results loaded from the baseline file.
+    """
+    header = f"{'size':>9} {'phase':<15}{'ops/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rss MB':>9}"
+    if baseline:
+        header += f"{'vs base':>9}"
+    print(header)
+    for size, phases in report["results"].items():
+        for phase, result in phases.items():
+            line = (
+                f"{size:>9} {phase:<15}{result['ops_per_sec'] or 0:>12.1f}{result['p50_ms']:>10.3f}"
+                f"{result['p95_ms']:>10.3f}{result['p99_ms']:>10.3f}{result['peak_rss_mb'] or 0:>9.1f}"
+            )
+            before = (baseline or {}).get("results", {}).get(size, {}).get(phase)
+            if before and before["ops_per_sec"] and result["ops_per_sec"]:
+                line += f"{result['ops_per_sec'] / before['ops_per_sec']:>8.2f}x"
+            print(line)
+
+
+def main() -> None:
+    """Parses arguments, runs the suite and reports or compares the results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000],
+                        help="catalog sizes to benchmark (10k to 10M songs)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    parser.add_argument("--ops", type=int, default=1000, help="operations per phase")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="relative slowdown accepted before a phase counts as a regression")
+    parser.add_argument("--in-process", action="store_true", help="run every size in this process")
+    args = parser.parse_args()
+
+    runner = run_size if args.in_process or len(args.sizes) == 1 else run_isolated
+    report = {
+        "meta": {
+            "seed": args.seed,
+            "ops": args.ops,
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": {str(size): runner(size, args.seed, args.ops) for size in sorted(args.sizes)},
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_table(report, baseline)
+
+    if baseline:
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
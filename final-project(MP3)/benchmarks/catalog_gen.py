@@ -0,0 +1,162 @@
+"""Seeded synthetic song catalog generator for the MP3AVLtree benchmarks.
+
+Generates catalogs of any size in the format of ``songs.json``, with the
+skew of a real library: artist popularity follows a Zipf distribution, so a
+few artists own most albums, and every album holds a handful of tracks.
+Titles, artists and albums are drawn from a shared pool of pseudo-words, so
+partial title searches hit realistic numbers of songs. The same size and
+seed always produce the same catalog, and songs are streamed to disk so
+that 10M-song catalogs do not have to fit in memory as Python objects.
+
+Usage (from the ``final-project(MP3)`` directory):
+
+    python -m benchmarks.catalog_gen --size 1000000 --seed 42 --output /tmp/songs.json
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import itertools
+import json
+import random
+from typing import Iterator, List
+
+SYLLABLES = [
+    "la", "me", "to", "ra", "ni", "so", "ka", "lu", "de", "mor", "ven", "tan",
+    "cor", "al", "ma", "ri", "sol", "noc", "be", "ta", "ro", "mi", "ga", "lo",
+    "ver", "an", "el", "on", "is", "ya", "zu", "que", "bri", "for", "gen", "sa",
+]
+WORDS_PER_POOL = 4000
+ZIPF_EXPONENT = 1.0
+SONGS_PER_ARTIST = 25
+TRACKS_PER_ALBUM = (6, 14)
+YEARS = (1950, 2025)
+
+
+def make_words(rng: random.Random, count: int) -> List[str]:
+    """Builds a pool of distinct pronounceable pseudo-words.
+
+    Args:
+        rng (random.Random): Random source.
+        count (int): Number of words.
+
+    Returns:
+        List[str]: Distinct words of two to four syllables.
+    """
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def zipf_weights(count: int, exponent: float = ZIPF_EXPONENT) -> List[float]:
+    """Returns cumulative Zipf weights for use with random.choices.
+
+    Args:
+        count (int): Number of ranks.
+        exponent (float): Skew; larger values concentrate more weight on
+            the first ranks.
+
+    Returns:
+        List[float]: Cumulative weights, one per rank.
+    """
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def generate_catalog(size: int, seed: int = 42) -> Iterator[dict]:
+    """Yields the songs of a synthetic catalog, album by album.
+
+    Songs get consecutive IDs from 1. Within an album titles are distinct,
+    and an artist's albums have distinct names, so every (title, artist,
+    album) key is unique.
+
+    Args:
+        size (int): Number of songs.
+        seed (int): Random seed.
+
+    Yields:
+        dict: Song fields, as stored in ``songs.json``.
+    """
+    rng = random.Random(seed)
+    words = make_words(rng, WORDS_PER_POOL)
+    word_weights = zipf_weights(len(words), 0.9)
+
+    def phrase(low: int, high: int) -> str:
+        picked = rng.choices(words, cum_weights=word_weights, k=rng.randint(low, high))
+        return " ".join(picked).capitalize()
+
+    artists = set()
+    while len(artists) < max(size // SONGS_PER_ARTIST, 1):
+        artists.add(phrase(1, 3))
+    artists = sorted(artists)
+    rng.shuffle(artists)
+    artist_weights = zipf_weights(len(artists))
+    albums_by_artist = {}
+    song_id = 0
+    while song_id < size:
+        artist_index = rng.choices(range(len(artists)), cum_weights=artist_weights)[0]
+        album_names = albums_by_artist.setdefault(artist_index, set())
+        album = phrase(1, 3)
+        while album in album_names:
+            album = f"{album} Vol. {len(album_names) + 1}"
+        album_names.add(album)
+        year = min(int(rng.triangular(YEARS[0], YEARS[1] + 1, YEARS[1])), YEARS[1])
+
+        titles = set()
+        for _ in range(min(rng.randint(*TRACKS_PER_ALBUM), size - song_id)):
+            title = phrase(1, 4)
+            while title in titles:
+                title = f"{title} (Remix)"
+            titles.add(title)
+            song_id += 1
+            yield {
+                "id": song_id,
+                "title": title,
+                "artist": artists[artist_index],
+                "album": album,
+                "year": year,
+                "duration": max(int(rng.gauss(215, 55)), 30),
+            }
+
+
+def write_catalog(path: str, size: int, seed: int = 42) -> None:
+    """Streams a synthetic catalog to a JSON file in the ``songs.json`` format.
+
+    Args:
+        path (str): Output file.
+        size (int): Number of songs.
+        seed (int): Random seed.
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("[")
+        for index, song in enumerate(generate_catalog(size, seed)):
+            file.write(",\n" if index else "\n")
+            file.write(json.dumps(song, ensure_ascii=False))
+        file.write("\n]\n")
+
+
+def main() -> None:
+    """Parses arguments and writes the catalog."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--size", type=int, default=100_000, help="number of songs")
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    parser.add_argument("--output", required=True, help="path of the JSON file to write")
+    args = parser.parse_args()
+    write_catalog(args.output, args.size, args.seed)
+
+
+if __name__ == "__main__":
+    main()
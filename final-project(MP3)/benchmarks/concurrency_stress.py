@@ -0,0 +1,225 @@
+"""Concurrency stress test for SongService.
+
+Runs reader threads (partial search, autocomplete, paging, lookups by ID)
+against writer threads (insert, update, delete) on a private copy of the
+songs file, then checks that no update was lost: the AVL tree, the catalog
+and a fresh service rebuilt from disk must all agree with the operations
+the writers report as successful. Throughput per operation kind is printed.
+
+The writers first run alone for a short baseline. The test also fails when,
+with the readers running, writes drop below --min-write-ratio of that
+baseline: readers must not starve the writers.
+
+Usage (from the ``final-project(MP3)`` directory):
+
+    python -m benchmarks.concurrency_stress --readers 8 --writers 4 --seconds 5
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict
+
+from backend.repositories.song_repo import SONGS_PATH, SongRepository  # pylint: disable=import-error
+from backend.services.song_service import SongService  # pylint: disable=import-error
+
+QUERIES = ["love", "the", "de", "a", "bad", "noche", "you", "ma"]
+
+
+def reader(service: SongService, stop: threading.Event, seed: int, counts: Counter, errors: list) -> None:
+    """Issues read operations until asked to stop.
+
+    Args:
+        service (SongService): Service under test.
+        stop (threading.Event): Set when the run is over.
+        seed (int): Random seed for this thread.
+        counts (Counter): Completed operations per kind.
+        errors (list): Inconsistencies observed by this thread.
+    """
+    rng = random.Random(seed)
+    local: Dict[str, int] = Counter()
+    while not stop.is_set():
+        kind = rng.choice(("search", "autocomplete", "page", "by_id"))
+        if kind == "search":
+            query = rng.choice(QUERIES)
+            for song in service.search_by_title_partial(query):
+                if query not in song.title.lower() + song.artist.lower() + song.album.lower() and \
+                        query not in f"{song.title} - {song.artist} - {song.album}".lower():
+                    errors.append(f"search '{query}' returned {song}")
+        elif kind == "autocomplete":
+            prefix = rng.choice(QUERIES)
+            titles = [song.title.lower() for song in service.autocomplete(prefix, 20)]
+            if titles != sorted(titles) or any(not title.startswith(prefix) for title in titles):
+                errors.append(f"autocomplete '{prefix}' returned {titles}")
+        elif kind == "page":
+            page = service.get_page_sorted_by_title(rng.randrange(max(service.count(), 1)), 50)
+            keys = [f"{s.title} - {s.artist} - {s.album}".lower() for s in page]
+            if keys != sorted(keys):
+                errors.append("page out of order")
+        else:
+            song_id = rng.randrange(1, 1200)
+            song = service.get_song_by_id(song_id)
+            if song is not None and song.id != song_id:
+                errors.append(f"get_song_by_id({song_id}) returned {song}")
+        local[kind] += 1
+    counts.update(local)
+
+
+def writer(service: SongService, stop: threading.Event, seed: int, counts: Counter, owned: dict) -> None:
+    """Inserts, updates and deletes its own songs until asked to stop.
+
+    Each writer only touches the songs it inserted, so the expected final
+    state of those songs is known exactly.
+
+    Args:
+        service (SongService): Service under test.
+        stop (threading.Event): Set when the run is over.
+        seed (int): Random seed for this thread; also tags its songs.
+        counts (Counter): Completed operations per kind.
+        owned (dict): Filled with the expected title of each live song ID.
+    """
+    rng = random.Random(seed)
+    local: Dict[str, int] = Counter()
+    serial = 0
+    while not stop.is_set():
+        kind = rng.choice(("insert", "insert", "update", "delete")) if owned else "insert"
+        if kind == "insert":
+            serial += 1
+            song = {"title": f"stress {seed}-{serial}", "artist": f"writer {seed}",
+                    "album": "stress", "year": 2000, "duration": 180}
+            service.insert_song(song)
+            owned[song["id"]] = song["title"]
+        elif kind == "update":
+            song_id = rng.choice(list(owned))
+            title = f"{owned[song_id]} v{rng.randrange(1_000_000)}"
+            service.update_song(song_id, {"title": title})
+            owned[song_id] = title
+        else:
+            song_id = rng.choice(list(owned))
+            service.delete_song_by_id(song_id)
+            del owned[song_id]
+        local[kind] += 1
+    counts.update(local)
+
+
+def run(service: SongService, readers: int, writers: int, seconds: float, seed: int,
+        owned: list, errors: list) -> Counter:
+    """Runs reader and writer threads against the service for a while.
+
+    Args:
+        service (SongService): Service under test.
+        readers (int): Number of reader threads.
+        writers (int): Number of writer threads.
+        seconds (float): Duration of the run.
+        seed (int): Seed of the first writer; writers of different runs
+            need different seeds so their song titles do not collide.
+        owned (list): Receives one dict of live song IDs per writer.
+        errors (list): Inconsistencies observed by the readers.
+
+    Returns:
+        Counter: Completed operations per kind.
+    """
+    stop = threading.Event()
+    counts: Counter = Counter()
+    owned.extend(dict() for _ in range(writers))
+    threads = [threading.Thread(target=reader, args=(service, stop, i, counts, errors)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(service, stop, seed + i, counts, owned[-writers + i]))
+                for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return counts
+
+
+def write_rate(counts: Counter, seconds: float) -> float:
+    """Computes the write throughput of a run.
+
+    Args:
+        counts (Counter): Completed operations per kind.
+        seconds (float): Duration of the run.
+
+    Returns:
+        float: Inserts, updates and deletes per second.
+    """
+    return sum(counts[kind] for kind in ("insert", "update", "delete")) / seconds
+
+
+def main() -> None:
+    """Runs the stress test and exits with status 1 on any inconsistency or
+    when the readers starve the writers."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--baseline-seconds", type=float, default=1.0)
+    parser.add_argument("--min-write-ratio", type=float, default=0.01,
+                        help="fail if writes/s with readers fall below this fraction of the writers-only rate")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="mp3-stress-")
+    try:
+        path = os.path.join(workdir, "songs.json")
+        shutil.copy(SONGS_PATH, path)
+        service = SongService(SongRepository(path))
+        initial = service.count()
+
+        errors: list = []
+        owned: list = []
+        baseline = write_rate(run(service, 0, args.writers, args.baseline_seconds, 2000, owned, errors),
+                              args.baseline_seconds)
+        counts = run(service, args.readers, args.writers, args.seconds, 1000, owned, errors)
+
+        expected = {song_id: title for songs in owned for song_id, title in songs.items()}
+        reloaded = SongService(SongRepository(path))
+        for name, current in (("live", service), ("reloaded", reloaded)):
+            if current.count() != initial + len(expected):
+                errors.append(f"{name}: {current.count()} songs, expected {initial + len(expected)}")
+            for song_id, title in expected.items():
+                song = current.get_song_by_id(song_id)
+                if song is None or song.title != title:
+                    errors.append(f"{name}: song {song_id} is {song}, expected title '{title}'")
+                elif current.search_exact(song.title, song.artist, song.album) != song:
+                    errors.append(f"{name}: song {song_id} missing from the AVL tree")
+
+        for kind, count in sorted(counts.items()):
+            print(f"{kind:<14}{count:>10} ops {count / args.seconds:>12.1f} ops/s")
+        print(f"{'total':<14}{sum(counts.values()):>10} ops {sum(counts.values()) / args.seconds:>12.1f} ops/s")
+        mixed = write_rate(counts, args.seconds)
+        print(f"writes alone {baseline:.1f} ops/s, with {args.readers} readers {mixed:.1f} ops/s "
+              f"({mixed / baseline if baseline else 0:.1%})")
+        if args.readers and args.writers and mixed < args.min_write_ratio * baseline:
+            errors.append(f"write throughput collapsed below {args.min_write_ratio:.0%} of the writers-only rate")
+        for error in errors[:20]:
+            print(f"ERROR: {error}")
+        print("consistent" if not errors else f"{len(errors)} errors")
+        sys.exit(1 if errors else 0)
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
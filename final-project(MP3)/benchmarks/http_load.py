@@ -0,0 +1,429 @@
+"""End-to-end HTTP load test for the MP3AVLtree song API.
+
+Replays a weighted mix of requests (full listing, title search, add,
+update and delete) at a fixed concurrency against the real FastAPI
+application, so routing, ``response_model`` validation, the CORS middleware
+and JSON encoding are all part of the measurement. Throughput and
+p50/p95/p99 latency are reported per endpoint.
+
+Three targets are supported, none of which needs an external service:
+
+- ``inprocess`` (default) drives the ASGI app directly through httpx,
+  without sockets;
+- ``localhost`` starts uvicorn on a free local port, optionally with
+  several workers sharing the catalog;
+- ``--url`` points at a server that is already running. Its catalog is
+  modified by the add, update and delete requests.
+
+The first two run on a private copy of the catalog (the shipped songs file,
+or a synthetic one with ``--size``), so the repository data is never
+touched. With ``--baseline`` the results are compared with a saved run and
+the exit status is 1 on a regression or on unexpected responses.
+
+Usage (from the ``final-project(MP3)`` directory):
+
+    python -m benchmarks.http_load --requests 5000 --concurrency 32
+    python -m benchmarks.http_load --mode localhost --workers 4 --mix search=80,add=10,update=10
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import httpx
+
+from backend.repositories.song_repo import SONGS_PATH  # pylint: disable=import-error
+from benchmarks.backend_bench import PERCENTILES, compare, git_revision, percentile  # pylint: disable=import-error
+from benchmarks.catalog_gen import write_catalog  # pylint: disable=import-error
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ("all", "search", "add", "update", "delete")
+DEFAULT_MIX = "all=5,search=60,add=15,update=15,delete=5"
+READY_TIMEOUT = 600
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Parses an endpoint mix such as ``search=80,add=20``.
+
+    Args:
+        text (str): Comma-separated ``endpoint=weight`` pairs.
+
+    Returns:
+        Dict[str, float]: Weight per endpoint.
+
+    Raises:
+        ValueError: If an endpoint is unknown or a weight is not positive.
+    """
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name!r}; use {', '.join(ENDPOINTS)}.")
+        mix[name] = float(weight or 1)
+        if mix[name] <= 0:
+            raise ValueError(f"Weight of {name} must be positive.")
+    return mix
+
+
+def prepare_workdir(size: int, seed: int) -> str:
+    """Creates a private working directory holding a catalog to serve.
+
+    Args:
+        size (int): Songs in a synthetic catalog; 0 copies the shipped one.
+        seed (int): Seed of the synthetic catalog.
+
+    Returns:
+        str: Directory to run the server from.
+    """
+    workdir = tempfile.mkdtemp(prefix="mp3-load-")
+    path = os.path.join(workdir, SONGS_PATH)
+    os.makedirs(os.path.dirname(path))
+    if size:
+        write_catalog(path, size, seed)
+    else:
+        shutil.copyfile(os.path.join(PROJECT_DIR, SONGS_PATH), path)
+    return workdir
+
+
+def free_port() -> int:
+    """Finds a free TCP port on the loopback interface.
+
+    Returns:
+        int: Port number.
+    """
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@asynccontextmanager
+async def inprocess_client(workdir: str) -> AsyncIterator[httpx.AsyncClient]:
+    """Runs the app inside this process and yields a client bound to it.
+
+    Args:
+        workdir (str): Directory holding the catalog to serve.
+
+    Yields:
+        httpx.AsyncClient: Client that calls the ASGI app directly.
+    """
+    os.chdir(workdir)
+    from main import app  # pylint: disable=import-error,import-outside-toplevel
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://mp3.test") as client:
+            yield client
+
+
+@asynccontextmanager
+async def localhost_client(workdir: str, workers: int) -> AsyncIterator[httpx.AsyncClient]:
+    """Starts uvicorn on a free local port and yields a client for it.
+
+    Args:
+        workdir (str): Directory holding the catalog to serve.
+        workers (int): Number of uvicorn worker processes. With more than
+            one, the workers share the catalog (MP3_SHARED_CATALOG=1).
+
+    Yields:
+        httpx.AsyncClient: Client pointed at the server.
+    """
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=PROJECT_DIR, MP3_SHARED_CATALOG="1" if workers > 1 else "0")
+    server = subprocess.Popen(  # pylint: disable=consider-using-with
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=workdir, env=env,
+    )
+    try:
+        async with remote_client(f"http://127.0.0.1:{port}") as client:
+            yield client
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+@asynccontextmanager
+async def remote_client(url: str) -> AsyncIterator[httpx.AsyncClient]:
+    """Yields a client for a server reachable over HTTP.
+
+    Args:
+        url (str): Base URL of the server.
+
+    Yields:
+        httpx.AsyncClient: Client pointed at the server.
+    """
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        yield client
+
+
+async def wait_until_ready(client: httpx.AsyncClient) -> None:
+    """Polls the readiness probe until the catalog is loaded.
+
+    Args:
+        client (httpx.AsyncClient): Client for the server.
+
+    Raises:
+        TimeoutError: If the server is not ready within READY_TIMEOUT seconds.
+    """
+    deadline = time.monotonic() + READY_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health/ready")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError("The server did not become ready.")
+
+
+class Workload:
+    """Builds the requests of the mix from the catalog being served.
+
+    Songs to update and songs to delete are drawn from disjoint halves of
+    the catalog, so concurrent requests never update a deleted song.
+    """
+
+    def __init__(self, songs: List[dict], mix: Dict[str, float], seed: int):
+        """Initializes the workload.
+
+        Args:
+            songs (List[dict]): Catalog as returned by /songs/all.
+            mix (Dict[str, float]): Weight per endpoint.
+            seed (int): Random seed.
+        """
+        self.rng = random.Random(seed)
+        ids = [song["id"] for song in songs]
+        self.rng.shuffle(ids)
+        self.update_ids = ids[::2]
+        self.delete_ids = ids[1::2]
+        self.words = sorted({word for song in songs for word in song["title"].lower().split() if len(word) > 2})
+        self.endpoints = list(mix)
+        self.weights = [mix[name] for name in self.endpoints]
+        self.added = 0
+
+    def next_request(self) -> Tuple[str, str, str, Optional[dict], Tuple[int, ...]]:
+        """Picks the next request of the mix.
+
+        Returns:
+            Tuple[str, str, str, Optional[dict], Tuple[int, ...]]: Endpoint
+            name, HTTP method, path, JSON body and accepted status codes.
+        """
+        name = self.rng.choices(self.endpoints, self.weights)[0]
+        if name == "delete" and not self.delete_ids:
+            name = "search"
+        if name == "all":
+            return name, "GET", "/songs/all", None, (200,)
+        if name == "search":
+            word = self.rng.choice(self.words) if self.words else "a"
+            return name, "GET", f"/songs/search/{quote(word)}", None, (200, 404)
+        if name == "add":
+            self.added += 1
+            song = {"title": f"Load test {self.added} {self.rng.random():.6f}", "artist": "Load",
+                    "album": "Test", "year": 2024, "duration": self.rng.randint(60, 400)}
+            return name, "POST", "/songs/add", song, (201,)
+        if name == "update":
+            song_id = self.rng.choice(self.update_ids)
+            return name, "PUT", f"/songs/{song_id}", {"duration": self.rng.randint(60, 400)}, (200,)
+        return name, "DELETE", f"/songs/delete/{self.delete_ids.pop()}", None, (200,)
+
+
+async def run_load(
+    client: httpx.AsyncClient, workload: Workload, requests: int, concurrency: int, warmup: int
+) -> Tuple[Dict[str, List[float]], Dict[str, int], float]:
+    """Sends the requests from ``concurrency`` concurrent tasks.
+
+    Args:
+        client (httpx.AsyncClient): Client for the server.
+        workload (Workload): Source of requests.
+        requests (int): Number of measured requests.
+        concurrency (int): Number of requests in flight at any time.
+        warmup (int): Requests sent first and left out of the results.
+
+    Returns:
+        Tuple[Dict[str, List[float]], Dict[str, int], float]: Latencies in
+        seconds and unexpected responses per endpoint, and the wall-clock
+        duration of the measured part.
+    """
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    remaining = [warmup]
+
+    async def worker() -> None:
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            name, method, path, body, accepted = workload.next_request()
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                status = response.status_code
+            except httpx.TransportError:
+                status = None
+            latencies[name].append(time.perf_counter() - start)
+            if status not in accepted:
+                errors[name] += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    latencies.clear()
+    errors.clear()
+    remaining[0] = requests
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def summarize(latencies: Dict[str, List[float]], errors: Dict[str, int], wall: float) -> Dict[str, dict]:
+    """Turns raw latencies into per-endpoint statistics.
+
+    Args:
+        latencies (Dict[str, List[float]]): Seconds per request, per endpoint.
+        errors (Dict[str, int]): Unexpected responses per endpoint.
+        wall (float): Duration of the measured run.
+
+    Returns:
+        Dict[str, dict]: ``ops``, ``errors``, ``ops_per_sec`` (share of the
+        overall throughput), ``p50_ms``, ``p95_ms``, ``p99_ms`` and
+        ``max_ms`` per endpoint, plus a ``total`` entry.
+    """
+    results = {}
+    latencies = dict(latencies, total=[value for samples in latencies.values() for value in samples])
+    for name, samples in latencies.items():
+        samples.sort()
+        result = {
+            "ops": len(samples),
+            "errors": sum(errors.values()) if name == "total" else errors.get(name, 0),
+            "ops_per_sec": round(len(samples) / wall, 2),
+        }
+        for percent in PERCENTILES:
+            result[f"p{percent}_ms"] = round(percentile(samples, percent) * 1000, 3)
+        result["max_ms"] = round(samples[-1] * 1000, 3)
+        results[name] = result
+    return results
+
+
+async def load_test(args: argparse.Namespace) -> Dict[str, dict]:
+    """Starts the target, runs the load and summarizes it.
+
+    Args:
+        args (argparse.Namespace): Parsed command line.
+
+    Returns:
+        Dict[str, dict]: Statistics per endpoint, see summarize().
+    """
+    workdir = None
+    if args.url:
+        target = remote_client(args.url)
+    else:
+        workdir = prepare_workdir(args.size, args.seed)
+        if args.mode == "localhost":
+            target = localhost_client(workdir, args.workers)
+        else:
+            target = inprocess_client(workdir)
+    try:
+        async with target as client:
+            await wait_until_ready(client)
+            songs = (await client.get("/songs/all")).json()
+            workload = Workload(songs, parse_mix(args.mix), args.seed)
+            latencies, errors, wall = await run_load(client, workload, args.requests, args.concurrency, args.warmup)
+    finally:
+        if workdir is not None:
+            os.chdir(PROJECT_DIR)
+            shutil.rmtree(workdir, ignore_errors=True)
+    return summarize(latencies, errors, wall)
+
+
+def main() -> None:
+    """Parses arguments, runs the load test and reports or compares the results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--mode", choices=("inprocess", "localhost"), default="inprocess",
+                        help="serve the app in this process or with uvicorn on localhost")
+    parser.add_argument("--url", help="load an already running server instead (its data is modified)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers in localhost mode")
+    parser.add_argument("--size", type=int, default=0, help="serve a synthetic catalog of this many songs")
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"endpoint weights (default {DEFAULT_MIX})")
+    parser.add_argument("--requests", type=int, default=2000, help="measured requests")
+    parser.add_argument("--warmup", type=int, default=100, help="unmeasured requests sent first")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="relative slowdown accepted before an endpoint counts as a regression")
+    args = parser.parse_args()
+    parse_mix(args.mix)
+    args.output = os.path.abspath(args.output) if args.output else None
+    sys.path.insert(0, PROJECT_DIR)
+
+    if args.url:
+        label = args.url
+    elif args.mode == "localhost":
+        label = f"localhost-w{args.workers}-c{args.concurrency}"
+    else:
+        label = f"inprocess-c{args.concurrency}"
+    report = {
+        "meta": {
+            "mix": args.mix,
+            "requests": args.requests,
+            "size": args.size,
+            "seed": args.seed,
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": {label: asyncio.run(load_test(args))},
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{label}: {args.requests} requests, mix {args.mix}")
+        print(f"{'endpoint':<10}{'ops':>8}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name, result in report["results"][label].items():
+            print(f"{name:<10}{result['ops']:>8}{result['errors']:>8}{result['ops_per_sec']:>10.1f}"
+                  f"{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}{result['p99_ms']:>10.3f}")
+
+    failures = []
+    if report["results"][label]["total"]["errors"]:
+        failures.append(f"{report['results'][label]['total']['errors']} unexpected responses")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            failures += compare(report, json.load(file), args.tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""Comparative benchmark of the ordered-map engines behind the song indexes.
+
+Runs the same seeded workload against every engine of
+backend.services.index_engines: bulk loading, random inserts, exact
+lookups, 50-key range scans and random deletes, each reported in ops/sec,
+plus the memory taken per key after a bulk load and after random inserts.
+It then replays mixes of reads and writes against a bulk-loaded index:
+
+* ``read_heavy``: 90% lookups, as the API serves searches and pages.
+* ``balanced``: half lookups, half inserts and deletes.
+* ``write_heavy``: 90% inserts and deletes, as during catalog imports.
+* ``scan_heavy``: 30% range scans, as for listings and autocomplete.
+
+Keys have the format of the title index, built from a synthetic catalog
+(see benchmarks.catalog_gen), and values are catalog rows. The fastest
+engine per row is marked with ``*``.
+
+Usage (from the ``final-project(MP3)`` directory):
+
+    python -m benchmarks.index_engines_bench --sizes 100000 1000000
+    python -m benchmarks.index_engines_bench --engines avl btree --output engines.json
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import json
+import platform
+import random
+import time
+import tracemalloc
+from itertools import islice
+from typing import Callable, Dict, List, Tuple
+
+from backend.services.index_engines import ENGINES, create_index  # pylint: disable=import-error
+from backend.services.ordered_map import OrderedMap  # pylint: disable=import-error
+from benchmarks.backend_bench import git_revision  # pylint: disable=import-error
+from benchmarks.catalog_gen import generate_catalog  # pylint: disable=import-error
+
+SCAN_LENGTH = 50
+LOOKUP, INSERT, DELETE, SCAN = range(4)
+WORKLOADS: Dict[str, Tuple[float, float, float, float]] = {
+    "read_heavy": (0.90, 0.05, 0.05, 0.0),
+    "balanced": (0.50, 0.25, 0.25, 0.0),
+    "write_heavy": (0.10, 0.45, 0.45, 0.0),
+    "scan_heavy": (0.60, 0.05, 0.05, 0.30),
+}
+PHASES = ("bulk_load", "insert", "lookup", "range_scan", "delete") + tuple(WORKLOADS)
+MEMORY = ("bytes/key bulk", "bytes/key insert")
+
+
+def make_keys(count: int, seed: int) -> List[str]:
+    """Generates distinct title-index keys in random order.
+
+    Args:
+        count (int): Number of keys.
+        seed (int): Random seed of the catalog and of the order.
+
+    Returns:
+        List[str]: Keys formatted as ``title - artist - album``.
+    """
+    keys = [
+        f"{song['title'].lower()} - {song['artist'].lower()} - {song['album'].lower()}"
+        for song in generate_catalog(count, seed)
+    ]
+    random.Random(seed).shuffle(keys)
+    return keys
+
+
+def plan_workload(
+    mix: Tuple[float, float, float, float], present: List[str], spare: List[str], ops: int, rng: random.Random
+) -> List[Tuple[int, str]]:
+    """Draws the operations of a mixed workload ahead of time.
+
+    Inserts take keys from the spare pool and deletes return them to it, so
+    every insert succeeds and every delete hits, and the size of the index
+    stays close to where it started.
+
+    Args:
+        mix (Tuple[float, float, float, float]): Fractions of lookups,
+            inserts, deletes and scans.
+        present (List[str]): Keys in the index; not modified.
+        spare (List[str]): Keys not in the index; not modified.
+        ops (int): Number of operations.
+        rng (random.Random): Random source.
+
+    Returns:
+        List[Tuple[int, str]]: Kind of operation and key, in order.
+    """
+    present = list(present)
+    spare = list(spare)
+    plan = []
+    for kind in rng.choices((LOOKUP, INSERT, DELETE, SCAN), weights=mix, k=ops):
+        if kind == INSERT and spare:
+            key = spare.pop(rng.randrange(len(spare)))
+            present.append(key)
+        elif kind == DELETE and present:
+            index = rng.randrange(len(present))
+            present[index], present[-1] = present[-1], present[index]
+            key = present.pop()
+            spare.append(key)
+        else:
+            kind = SCAN if kind == SCAN else LOOKUP
+            key = rng.choice(present)
+        plan.append((kind, key))
+    return plan
+
+
+def replay(index: OrderedMap, plan: List[Tuple[int, str]]) -> None:
+    """Runs a planned workload against an index.
+
+    Args:
+        index (OrderedMap): Index holding the planned present keys.
+        plan (List[Tuple[int, str]]): Operations from plan_workload.
+    """
+    search, insert, delete, iter_range = index.search, index.insert, index.delete, index.iter_range
+    for kind, key in plan:
+        if kind == LOOKUP:
+            search(key)
+        elif kind == INSERT:
+            insert(key, 0)
+        elif kind == DELETE:
+            delete(key)
+        else:
+            for _ in islice(iter_range(key), SCAN_LENGTH):
+                pass
+
+
+def ops_per_sec(operation: Callable[[], None], count: int, repeat: int = 1) -> float:
+    """Times an operation and converts the best run to a throughput.
+
+    Args:
+        operation (Callable[[], None]): Runs count operations.
+        count (int): Operations per run.
+        repeat (int): Runs to take the best of; only for read-only work.
+
+    Returns:
+        float: Operations per second of the fastest run.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+
+def bytes_per_key(build: Callable[[], OrderedMap], count: int) -> Tuple[OrderedMap, float]:
+    """Measures the memory an index holds once built.
+
+    Args:
+        build (Callable[[], OrderedMap]): Creates and fills the index.
+        count (int): Number of keys it ends up holding.
+
+    Returns:
+        Tuple[OrderedMap, float]: The index and its bytes per key, not
+        counting the key strings themselves.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    index = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return index, used / count
+
+
+def run_engine(engine: str, keys: List[str], spare: List[str], ops: int, seed: int) -> Dict[str, float]:
+    """Runs every phase and workload against one engine.
+
+    Args:
+        engine (str): Engine name, see index_engines.ENGINES.
+        keys (List[str]): Keys of the index, in random order.
+        spare (List[str]): Keys outside the index, for the mixed workloads.
+        ops (int): Operations per lookup, scan and mixed phase.
+        seed (int): Random seed of the sampled operations.
+
+    Returns:
+        Dict[str, float]: Operations per second per phase, and bytes per key.
+    """
+    rng = random.Random(seed)
+    items = [(key, row) for row, key in enumerate(keys)]
+    results: Dict[str, float] = {}
+
+    index = create_index(engine)
+    results["bulk_load"] = ops_per_sec(lambda: index.bulk_load(items), len(items))
+    sample = [rng.choice(keys) for _ in range(ops)]
+    results["lookup"] = ops_per_sec(lambda: [index.search(key) for key in sample], ops, repeat=3)
+    starts = sample[:max(ops // 10, 1)]
+    results["range_scan"] = ops_per_sec(
+        lambda: [list(islice(index.iter_range(key), SCAN_LENGTH)) for key in starts], len(starts), repeat=3
+    )
+    for name, mix in WORKLOADS.items():
+        plan = plan_workload(mix, keys, spare, ops, random.Random(f"{seed}-{name}"))
+        index.bulk_load(items)
+        results[name] = ops_per_sec(lambda: replay(index, plan), ops)
+
+    index = create_index(engine)
+    results["insert"] = ops_per_sec(lambda: [index.insert(key, row) for key, row in items], len(items))
+    order = list(keys)
+    rng.shuffle(order)
+    results["delete"] = ops_per_sec(lambda: [index.delete(key) for key in order], len(order))
+
+    def bulk() -> OrderedMap:
+        index = create_index(engine)
+        index.bulk_load(items)
+        return index
+
+    def inserted() -> OrderedMap:
+        index = create_index(engine)
+        for key, row in items:
+            index.insert(key, row)
+        return index
+
+    index, results["bytes/key bulk"] = bytes_per_key(bulk, len(items))
+    del index
+    index, results["bytes/key insert"] = bytes_per_key(inserted, len(items))
+    return {name: results[name] for name in PHASES + MEMORY}
+
+
+def run_size(size: int, engines: List[str], ops: int, seed: int) -> Dict[str, Dict[str, float]]:
+    """Runs every engine against an index of the given size.
+
+    Args:
+        size (int): Number of keys in the index.
+        engines (List[str]): Engines to compare.
+        ops (int): Operations per lookup, scan and mixed phase.
+        seed (int): Random seed.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Results per engine, see run_engine.
+    """
+    keys = make_keys(size + ops, seed)
+    return {engine: run_engine(engine, keys[:size], keys[size:], ops, seed) for engine in engines}
+
+
+def print_table(report: dict) -> None:
+    """Prints one table per size, with a column per engine.
+
+    Args:
+        report (dict): Results of the run.
+    """
+    for size, engines in report["results"].items():
+        names = list(engines)
+        print(f"Index engines, {size} keys (ops/sec; bytes/key)")
+        print(f"{'phase':<18}" + "".join(f"{name:>14}" for name in names))
+        for phase in PHASES + MEMORY:
+            values = [engines[name][phase] for name in names]
+            best = min(values) if phase in MEMORY else max(values)
+            print(f"{phase:<18}" + "".join(
+                f"{value:>13.0f}" + ("*" if value == best and len(names) > 1 else " ") for value in values
+            ))
+        print()
+
+
+def main() -> None:
+    """Parses arguments, runs the benchmark and reports the results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000], help="number of keys in the index")
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES),
+                        help="engines to compare")
+    parser.add_argument("--ops", type=int, default=100_000, help="operations per lookup, scan and mixed phase")
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of tables")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "seed": args.seed,
+            "ops": args.ops,
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": {str(size): run_size(size, args.engines, args.ops, args.seed) for size in sorted(args.sizes)},
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_table(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""Randomized self-check of the ordered-map engines behind the song indexes.
+
+Drives every engine of backend.services.index_engines with a seeded random
+mix of operations and compares each answer with a reference model (a sorted
+key list plus a dict of values): insert (including duplicate keys, which
+must be rejected), delete (including missing keys), search, select, rank,
+iter_range, get_page, search_prefix, search_partial and aggregate. Each
+engine runs twice, as the service creates it with a measure (the AVL engine
+then keeps subtree aggregates) and without one, as for the secondary
+indexes that do not aggregate. An index starts from a bulk load of 90% of
+its key pool and then hovers near the full pool, so the largest size is
+actually reached.
+
+Prints one line per engine and size, with the first operation that failed
+for engines that disagree, and exits with status 1 if any engine did.
+
+Usage (from the ``final-project(MP3)`` directory):
+
+    python -m benchmarks.index_engines_check
+    python -m benchmarks.index_engines_check --sizes 100 30000 --ops 50000 --engines btree
+
+Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
+
+This file is part of the MP3AVLtree project.
+
+MP3AVLtree is free software: you can redistribute it and/or modify it under 
+the terms of the GNU General Public License as published by the Free Software 
+Foundation, either version 3 of the License, or (at your option) any later version.
+
+MP3AVLtree is distributed in the hope that it will be useful, but WITHOUT ANY 
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR 
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with 
+MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import bisect
+import math
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from backend.services.index_engines import ENGINES, create_index  # pylint: disable=import-error
+from backend.services.ordered_map import OrderedMap  # pylint: disable=import-error
+from benchmarks.index_engines_bench import make_keys  # pylint: disable=import-error
+
+
+class Mismatch(Exception):
+    """Raised when an engine disagrees with the reference model."""
+
+
+class Reference:
+    """Reference model of an ordered map: a sorted key list and a dict.
+
+    Attributes:
+        keys (List[str]): Keys in order.
+        values (Dict[str, int]): Value of each key.
+    """
+
+    def __init__(self):
+        """Initializes an empty model."""
+        self.keys: List[str] = []
+        self.values: Dict[str, int] = {}
+
+    def insert(self, key: str, value: int) -> None:
+        """Adds a key that is not present yet.
+
+        Args:
+            key (str): Key to add.
+            value (int): Its value.
+        """
+        bisect.insort(self.keys, key)
+        self.values[key] = value
+
+    def delete(self, key: str) -> None:
+        """Removes a key, if present.
+
+        Args:
+            key (str): Key to remove.
+        """
+        if self.values.pop(key, None) is not None:
+            del self.keys[bisect.bisect_left(self.keys, key)]
+
+    def range(self, lo: Optional[str], hi: Optional[str]) -> List[str]:
+        """Returns the keys with lo <= key < hi, in order.
+
+        Args:
+            lo (Optional[str]): Inclusive lower bound, or None.
+            hi (Optional[str]): Exclusive upper bound, or None.
+
+        Returns:
+            List[str]: Keys in range.
+        """
+        start = bisect.bisect_left(self.keys, lo) if lo is not None else 0
+        end = bisect.bisect_left(self.keys, hi) if hi is not None else len(self.keys)
+        return self.keys[start:max(start, end)]
+
+
+def expect(actual, expected, operation: str) -> None:
+    """Raises Mismatch unless an engine answer equals the model's.
+
+    Args:
+        actual: Answer of the engine.
+        expected: Answer of the reference model.
+        operation (str): Description of the call, for the report.
+
+    Raises:
+        Mismatch: If the answers differ.
+    """
+    if actual != expected:
+        raise Mismatch(f"{operation}: got {str(actual)[:200]}, expected {str(expected)[:200]}")
+
+
+def expected_aggregate(keys: List[str], values: Dict[str, int], measure: Callable[[int], Tuple[int, int]]) -> dict:
+    """Computes the statistics aggregate() must report for some keys.
+
+    Args:
+        keys (List[str]): Keys in range.
+        values (Dict[str, int]): Value of each key.
+        measure (Callable[[int], Tuple[int, int]]): Duration and year of a value.
+
+    Returns:
+        dict: Same fields as OrderedMap.aggregate.
+    """
+    measures = [measure(values[key]) for key in keys]
+    total = sum(duration for duration, _ in measures)
+    return {
+        "count": len(measures),
+        "total_duration": total,
+        "average_duration": total / len(measures) if measures else None,
+        "min_year": min((year for _, year in measures), default=None),
+        "max_year": max((year for _, year in measures), default=None),
+    }
+
+
+def check_aggregate(index: OrderedMap, model: Reference, measure, lo: Optional[str], hi: Optional[str]) -> None:
+    """Compares aggregate() over a range with the model.
+
+    Args:
+        index (OrderedMap): Engine under test.
+        model (Reference): Reference model.
+        measure: Duration and year of a value.
+        lo (Optional[str]): Inclusive lower bound, or None.
+        hi (Optional[str]): Exclusive upper bound, or None.
+
+    Raises:
+        Mismatch: If the statistics differ.
+    """
+    actual = index.aggregate(lo, hi)
+    expected = expected_aggregate(model.range(lo, hi), model.values, measure)
+    average = actual.get("average_duration"), expected["average_duration"]
+    if None not in average and math.isclose(*average):
+        actual = dict(actual, average_duration=expected["average_duration"])
+    expect(actual, expected, f"aggregate({lo!r}, {hi!r})")
+
+
+def check_full(index: OrderedMap, model: Reference) -> None:
+    """Compares the whole contents of the engine with the model.
+
+    Args:
+        index (OrderedMap): Engine under test.
+        model (Reference): Reference model.
+
+    Raises:
+        Mismatch: If the size or the ordered entries differ.
+    """
+    expect(len(index), len(model.keys), "len()")
+    expect(list(index.iter_range()), [(key, model.values[key]) for key in model.keys], "iter_range()")
+
+
+def random_bound(model: Reference, pool: List[str], rng: random.Random) -> Optional[str]:
+    """Draws a range bound: None, a present key, any pool key or a prefix of one.
+
+    Args:
+        model (Reference): Reference model.
+        pool (List[str]): Every key the run may use.
+        rng (random.Random): Random source.
+
+    Returns:
+        Optional[str]: The bound.
+    """
+    choice = rng.random()
+    if choice < 0.1:
+        return None
+    if choice < 0.5 and model.keys:
+        return rng.choice(model.keys)
+    key = rng.choice(pool)
+    return key if choice < 0.8 else key[:rng.randint(1, 4)]
+
+
+def run(engine: str, measured: bool, size: int, ops: int, seed: int) -> Dict[str, int]:
+    """Checks one engine on a random workload.
+
+    Args:
+        engine (str): Engine name.
+        measured (bool): Create the index with a measure and check aggregate().
+        size (int): Size of the key pool, the largest the index can grow.
+        ops (int): Number of random operations.
+        seed (int): Random seed.
+
+    Returns:
+        Dict[str, int]: Number of checked calls per operation, and the
+        number of keys left under ``final size``.
+
+    Raises:
+        Mismatch: At the first answer that differs from the model.
+    """
+    rng = random.Random(seed)
+    pool = make_keys(size, seed)
+    durations = [rng.randint(60, 600) for _ in range(size)]
+    years = [rng.randint(1950, 2025) for _ in range(size)]
+    row_of = {key: row for row, key in enumerate(pool)}
+
+    def measure(row: int) -> Tuple[int, int]:
+        return durations[row], years[row]
+
+    index = create_index(engine, measure if measured else None, ngram_index=True)
+    model = Reference()
+    spare = list(pool)
+    rng.shuffle(spare)
+    initial = [spare.pop() for _ in range(size * 9 // 10)]
+    try:
+        index.bulk_load([(initial[0], 0), (initial[0], 1)] if initial else [("a", 0), ("a", 1)])
+        raise Mismatch("bulk_load() accepted a duplicate key")
+    except ValueError:
+        pass
+    index.bulk_load((key, row_of[key]) for key in initial)
+    for key in initial:
+        model.insert(key, row_of[key])
+    check_full(index, model)
+
+    counts: Dict[str, int] = {}
+    operations = ["insert"] * 30 + ["delete"] * 22 + ["search"] * 20 + ["select", "rank"] * 8 + \
+        ["iter_range", "get_page", "search_prefix"] * 3 + ["search_partial"]
+    if measured:
+        operations += ["aggregate"] * 3
+    for step in range(ops):
+        operation = rng.choice(operations)
+        counts[operation] = counts.get(operation, 0) + 1
+        key = rng.choice(pool)
+        if operation == "insert":
+            if spare and rng.random() < 0.8:
+                key = spare.pop(rng.randrange(len(spare)))
+            if key in model.values:
+                try:
+                    index.insert(key, -1)
+                    raise Mismatch(f"insert({key!r}) accepted a duplicate key")
+                except ValueError:
+                    pass
+            else:
+                index.insert(key, row_of[key])
+                model.insert(key, row_of[key])
+            expect(index.search(key), model.values[key], f"search({key!r}) after insert")
+        elif operation == "delete":
+            if model.keys and rng.random() < 0.8:
+                key = rng.choice(model.keys)
+            if key in model.values:
+                spare.append(key)
+            index.delete(key)
+            model.delete(key)
+            expect(index.search(key), None, f"search({key!r}) after delete")
+        elif operation == "search":
+            if model.keys and rng.random() < 0.5:
+                key = rng.choice(model.keys)
+            expect(index.search(key), model.values.get(key), f"search({key!r})")
+        elif operation == "select":
+            position = rng.randint(-1, len(model.keys))
+            expected = (model.keys[position], model.values[model.keys[position]]) \
+                if 0 <= position < len(model.keys) else None
+            expect(index.select(position), expected, f"select({position})")
+        elif operation == "rank":
+            key = random_bound(model, pool, rng) or key
+            expect(index.rank(key), bisect.bisect_left(model.keys, key), f"rank({key!r})")
+        elif operation == "iter_range":
+            lo, hi = random_bound(model, pool, rng), random_bound(model, pool, rng)
+            expected = [(found, model.values[found]) for found in model.range(lo, hi)]
+            expect(list(index.iter_range(lo, hi)), expected, f"iter_range({lo!r}, {hi!r})")
+        elif operation == "get_page":
+            offset, limit = rng.randint(0, len(model.keys) + 5), rng.randint(1, 60)
+            expected = [model.values[found] for found in model.keys[offset:offset + limit]]
+            expect(index.get_page(offset, limit), expected, f"get_page({offset}, {limit})")
+        elif operation == "search_prefix":
+            prefix = key[:rng.randint(1, 6)].upper() if rng.random() < 0.2 else key[:rng.randint(1, 6)]
+            limit = rng.choice([None, 1, 5, 20])
+            expected = [model.values[found] for found in model.range(prefix.lower(), None)
+                        if found.startswith(prefix.lower())][:limit]
+            expect(index.search_prefix(prefix, limit), expected, f"search_prefix({prefix!r}, {limit})")
+        elif operation == "search_partial":
+            start = rng.randrange(len(key))
+            substring = key[start:start + rng.randint(1, 6)]
+            expected = [model.values[found] for found in model.keys if substring in found]
+            expect(index.search_partial(substring), expected, f"search_partial({substring!r})")
+        else:
+            check_aggregate(index, model, measure, random_bound(model, pool, rng), random_bound(model, pool, rng))
+        if step % 5000 == 4999:
+            check_full(index, model)
+    check_full(index, model)
+    if measured:
+        check_aggregate(index, model, measure, None, None)
+    counts["final size"] = len(model.keys)
+    return counts
+
+
+def main() -> None:
+    """Runs the self-check and exits with status 1 on any mismatch."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINES), default=list(ENGINES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[200, 30000],
+                        help="key pool sizes; an index holds up to this many keys")
+    parser.add_argument("--ops", type=int, default=20000, help="random operations per engine and size")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    failures = 0
+    for size in args.sizes:
+        for engine in args.engines:
+            for measured in (True, False):
+                label = f"{engine}{'' if measured else ' (no measure)'}"
+                start = time.perf_counter()
+                try:
+                    counts = run(engine, measured, size, args.ops, args.seed + size)
+                except Mismatch as exc:
+                    failures += 1
+                    print(f"{label:<24}{size:>8} keys  MISMATCH {exc}")
+                    continue
+                final = counts.pop("final size")
+                print(f"{label:<24}{size:>8} keys  ok  {sum(counts.values())} checked calls, "
+                      f"{final} keys at the end, {time.perf_counter() - start:.1f} s")
+    print("all engines agree with the reference" if not failures else f"{failures} engine runs failed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -105,6 +105,20 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    async function autocompleteSongs(prefix, limit = 10) {
+        try {
+            const response = await fetch(`${API_BASE_URL}/songs/autocomplete?prefix=${encodeURIComponent(prefix)}&limit=${limit}`);
+            if (!response.ok) {
+                const errorData = await response.json();
+                throw new Error(errorData.detail || 'Error al autocompletar');
+            }
+            return await response.json();
+        } catch (error) {
+            console.error('Error autocompleting songs:', error);
+            return [];
+        }
+    }
+
     async function addSongToBackend(songData) {
         try {
             const response = await fetch(`${API_BASE_URL}/songs/add`, {
@@ -312,6 +326,23 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
+    // Búsqueda mientras se escribe: usa el prefijo del título (O(log n + k) en el backend)
+    let autocompleteTimer = null;
+    searchInputMP3.addEventListener('input', () => {
+        clearTimeout(autocompleteTimer);
+        const query = searchInputMP3.value.trim();
+        if (!query) {
+            searchResultsList.innerHTML = '';
+            return;
+        }
+        autocompleteTimer = setTimeout(async () => {
+            const results = await autocompleteSongs(query);
+            if (searchInputMP3.value.trim() === query) {
+                renderSongList(results, searchResultsList);
+            }
+        }, 150);
+    });
+
     backToLibraryFromSearch.addEventListener('click', () => {
         showScreen('library');
         searchInputMP3.value = '';
@@ -1,7 +1,10 @@
 """Entry point for the MP3 Song Management API using FastAPI.
 
 This file initializes the FastAPI application and registers the routes
-defined in the song controller.
+defined in the song, health, metrics and diagnostics controllers. The song catalog is loaded in a
+background thread when the application starts, so the server accepts
+connections (and health checks) right away; on shutdown the catalog is
+checkpointed so the next start can load it from the binary snapshot.
 
 Author: Juan Esteban Bedoya <jebedoyal@udistrital.edu.co>
 
@@ -19,15 +22,36 @@ You should have received a copy of the GNU General Public License along with
 MP3AVLtree. If not, see <https://www.gnu.org/licenses/>.
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from backend.controllers import song_router  # pylint: disable=import-error
+from backend.controllers import (  # pylint: disable=import-error
+    DiagnosticsMiddleware,
+    MetricsMiddleware,
+    diagnostics_router,
+    health_router,
+    metrics_router,
+    song_router,
+    song_service,
+)
+from backend.tracing import TRACER  # pylint: disable=import-error
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """Starts loading the song catalog; on shutdown, checkpoints it and
+    writes out the traces still queued."""
+    song_service.start_loading()
+    yield
+    song_service.checkpoint()
+    TRACER.flush()
 
 
 app: FastAPI = FastAPI(
     title="MP3 Song Management API",
     description="API for managing MP3 songs with features like search, insert, delete, and update.",
-    version="0.0.1"
+    version="0.0.1",
+    lifespan=lifespan,
 )
 
 origins = [
@@ -48,4 +72,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(DiagnosticsMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+app.include_router(health_router)
+app.include_router(metrics_router)
+app.include_router(diagnostics_router)
 app.include_router(song_router)